@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: streaming fence scanner vs. the former Mermaid pre-pass + fenced_code.
+
+Compares the scanning pass in memory and streamed from a file (time and peak
+traced memory), and a full render through the engine, where the scanner now
+replaces both the pre-pass and the separate fence extraction.
+
+Usage:
+    python benchmarks/bench_fence_scanner.py [--megabytes N] [--render-megabytes N]
+"""
+
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "markdown_manager"))
+
+from fence_scanner import preprocess_mermaid  # noqa: E402
+from render_engine import RenderEngine  # noqa: E402
+
+SECTION = """## Section {n}
+
+Some prose with a [link](https://example.com) and `inline code`.
+
+```python
+def handler(event):
+    return event["id"]
+```
+
+```mermaid
+graph TD
+    A{n} --> B{n}
+```
+
+```
+flowchart LR
+    X --> Y
+```
+
+- item one
+- item two
+
+"""
+
+
+def legacy_preprocess_mermaid(md_text):
+    """The list-based pre-pass app.py used before the fence scanner (kept for comparison)."""
+    lines = md_text.split("\n")
+    out = []
+    in_fence = False
+    fence_lang = None
+    buf = []
+
+    def is_mermaid_block(text_block):
+        for t in text_block:
+            s = t.strip()
+            if not s:
+                continue
+            return s.lower().startswith(("graph ", "flowchart "))
+        return False
+
+    for line in lines:
+        if not in_fence:
+            if line.startswith("```"):
+                in_fence = True
+                fence_lang = line.strip().lstrip("`").strip()
+                buf = []
+            else:
+                out.append(line)
+        elif line.startswith("```"):
+            is_mermaid = (fence_lang.lower() == "mermaid") if fence_lang else False
+            if is_mermaid or is_mermaid_block(buf):
+                out.append("<div class=\"mermaid\">")
+                out.extend(buf)
+                out.append("</div>")
+            else:
+                out.append("```" + (fence_lang or ""))
+                out.extend(buf)
+                out.append("```")
+            in_fence = False
+            fence_lang = None
+            buf = []
+        else:
+            buf.append(line)
+
+    if in_fence:
+        out.append("```" + (fence_lang or ""))
+        out.extend(buf)
+    return "\n".join(out)
+
+
+def measure(func):
+    """Return (result, best of 3 seconds, peak traced bytes); timing runs without tracemalloc."""
+    elapsed = min(_timed(func) for _ in range(3))
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def document(megabytes):
+    sections = int(megabytes * 1024 * 1024 / len(SECTION))
+    return "".join(SECTION.format(n=n) for n in range(sections))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=8)
+    parser.add_argument("--render-megabytes", type=float, default=1)
+    args = parser.parse_args()
+
+    text = document(args.megabytes)
+    # The pre-pass took the text and returned text for Markdown to split again; the
+    # scanner runs on the lines Markdown has already split, and hands lines on
+    lines = text.split("\n")
+    legacy, legacy_time, legacy_peak = measure(lambda: legacy_preprocess_mermaid(text))
+    scanned, scan_time, scan_peak = measure(lambda: preprocess_mermaid(lines))
+    if legacy != "\n".join(scanned):
+        sys.exit("scanner output differs from the legacy pre-pass")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        del text, lines, legacy, scanned
+
+        # Only the fence currently open is held in memory
+        def stream():
+            with open(path, encoding="utf-8") as f:
+                return sum(1 for _ in preprocess_mermaid(line.rstrip("\n") for line in f))
+
+        _, stream_time, stream_peak = measure(stream)
+
+    print(f"scan of {args.megabytes:g} MB document")
+    print(f"  legacy pre-pass    : {legacy_time * 1000:8.1f} ms, peak {legacy_peak / 1024 / 1024:7.1f} MB")
+    print(f"  fence scanner      : {scan_time * 1000:8.1f} ms, peak {scan_peak / 1024 / 1024:7.1f} MB")
+    print(f"  streamed from file : {stream_time * 1000:8.1f} ms, peak {stream_peak / 1024 / 1024:7.1f} MB")
+
+    text = document(args.render_megabytes)
+    engine = RenderEngine()
+    engine.convert(text)  # warm the pool and the highlight cache
+    render_time = min(_timed(lambda: engine.convert(text)) for _ in range(3))
+    print(f"render of {args.render_megabytes:g} MB document")
+    print(f"  render engine      : {render_time * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput and output parity of the markdown backends on a corpus.
+
+Every available backend (see ``markdown_backends``) renders each markdown file
+below the corpus folder; the report shows documents and megabytes per second,
+and how closely each backend's HTML matches Python-Markdown's after
+normalising attribute order and whitespace. Highlighting is memoized across
+backends, so runs are warmed up first and the numbers compare parsing and
+HTML generation.
+
+Usage:
+    python benchmarks/bench_markdown_backends.py [--corpus DIR] [--repeat N] [--show N]
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import time
+from html.parser import HTMLParser
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src", "markdown_manager"))
+
+from file_scanner import scan_markdown_files  # noqa: E402
+from markdown_backends import PYTHON_MARKDOWN, available_backends  # noqa: E402
+from render_engine import RenderEngine  # noqa: E402
+
+
+class _Normalizer(HTMLParser):
+    """Flatten HTML into tokens that ignore attribute order and whitespace runs."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens = []
+
+    def handle_starttag(self, tag, attrs):
+        normalized = []
+        for name, value in sorted(attrs):
+            if name == "style" and value:
+                value = value.replace(" ", "").rstrip(";")
+            normalized.append(f'{name}="{value}"')
+        self.tokens.append(f"<{tag} {' '.join(normalized)}>")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self.tokens.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        self.tokens.extend(data.split())
+
+
+def normalize(html):
+    parser = _Normalizer()
+    parser.feed(html)
+    parser.close()
+    return parser.tokens
+
+
+def load_corpus(directory):
+    documents = []
+    for rel_path, full_path in scan_markdown_files(directory):
+        with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+            documents.append((rel_path, f.read()))
+    return documents
+
+
+def throughput(engine, documents, repeat):
+    for _, text in documents:
+        engine.convert(text)  # warm the pools and the highlight cache
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _, text in documents:
+            engine.convert(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=ROOT, help="folder of markdown files (default: the repository)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--show", type=int, default=3, help="least similar documents listed per backend")
+    args = parser.parse_args()
+
+    documents = load_corpus(args.corpus)
+    if not documents:
+        sys.exit(f"no markdown files below {args.corpus}")
+    megabytes = sum(len(text.encode("utf-8")) for _, text in documents) / (1024 * 1024)
+    print(f"corpus: {len(documents)} documents, {megabytes:.2f} MB")
+
+    engines = {name: RenderEngine(backend=name) for name in available_backends()}
+    reference = {rel: engines[PYTHON_MARKDOWN].convert(text) for rel, text in documents}
+    baseline = None
+    for name, engine in engines.items():
+        elapsed = throughput(engine, documents, args.repeat)
+        baseline = baseline or elapsed
+        ratios = []
+        for rel, text in documents:
+            expected, actual = normalize(reference[rel]), normalize(engine.convert(text))
+            ratio = 1.0 if expected == actual else difflib.SequenceMatcher(None, expected, actual, autojunk=False).ratio()
+            ratios.append((ratio, rel))
+        identical = sum(1 for ratio, _ in ratios if ratio == 1.0)
+        print(f"{name:16} {len(documents) / elapsed:9.1f} docs/s {megabytes / elapsed:7.2f} MB/s "
+              f"{baseline / elapsed:5.2f}x  parity {sum(r for r, _ in ratios) / len(ratios):6.1%} "
+              f"({identical}/{len(documents)} identical)")
+        for ratio, rel in sorted(ratios)[:args.show]:
+            if ratio < 1.0:
+                print(f"    {ratio:6.1%}  {rel}")
+    if len(engines) == 1:
+        print("markdown-it is not installed (pip install markdown-manager[fast]); only Python-Markdown was measured")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: pooled render engine vs. a new Markdown converter per render.
+
+Usage:
+    python benchmarks/bench_render_engine.py [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "markdown_manager"))
+
+import markdown  # noqa: E402
+
+from render_engine import DEFAULT_EXTENSION_CONFIGS, DEFAULT_EXTENSIONS, RenderEngine  # noqa: E402
+
+SAMPLE = """# Release notes
+
+Short paragraph with **bold**, *italic* and `code`.
+
+| Column | Value |
+|--------|-------|
+| a      | 1     |
+
+```python
+def hello():
+    return "world"
+```
+"""
+
+
+def fresh_converter(text):
+    md = markdown.Markdown(extensions=DEFAULT_EXTENSIONS, extension_configs=DEFAULT_EXTENSION_CONFIGS)
+    return md.convert(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    engine = RenderEngine()
+    engine.convert(SAMPLE)  # warm the pool
+    if fresh_converter(SAMPLE) != engine.convert(SAMPLE):
+        sys.exit("pooled output differs from a fresh converter")
+
+    setup = min(timeit.repeat(
+        lambda: markdown.Markdown(extensions=DEFAULT_EXTENSIONS, extension_configs=DEFAULT_EXTENSION_CONFIGS),
+        number=args.iterations, repeat=3
+    ))
+    fresh = min(timeit.repeat(lambda: fresh_converter(SAMPLE), number=args.iterations, repeat=3))
+    pooled = min(timeit.repeat(lambda: engine.convert(SAMPLE), number=args.iterations, repeat=3))
+
+    per_call = lambda total: total / args.iterations * 1e6
+    print(f"converter setup only : {per_call(setup):8.1f} us/render")
+    print(f"new converter        : {per_call(fresh):8.1f} us/render")
+    print(f"pooled engine        : {per_call(pooled):8.1f} us/render")
+    print(f"speedup              : {fresh / pooled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
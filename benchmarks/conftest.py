@@ -0,0 +1,35 @@
+"""Fixtures for the pytest-benchmark suite: the synthetic corpus of ``corpus.py``."""
+
+import os
+import sys
+
+import pytest
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src", "markdown_manager"))
+
+from corpus import DOCUMENTS, TREES, write_tree  # noqa: E402
+
+# Size of the "large" document; raise it to look at scaling
+LARGE_DOCUMENT_MEGABYTES = float(os.getenv("BENCH_LARGE_MEGABYTES", "1"))
+
+
+@pytest.fixture(scope="session")
+def documents():
+    """Markdown text of every synthetic document kind, keyed by name."""
+    return {
+        name: generate(LARGE_DOCUMENT_MEGABYTES) if name == "large" else generate()
+        for name, generate in DOCUMENTS.items()
+    }
+
+
+@pytest.fixture(scope="session")
+def trees(tmp_path_factory):
+    """Root folders of the synthetic trees, keyed by name."""
+    roots = {}
+    for name, shape in TREES.items():
+        root = str(tmp_path_factory.mktemp(name))
+        write_tree(root, *shape)
+        roots[name] = root
+    return roots
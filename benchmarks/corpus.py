@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Synthetic markdown corpus for the benchmark suite.
+
+Documents are generated from a seeded random source, so every run (and every
+version being compared) measures the same input:
+
+- ``small``: a short README-like page
+- ``large``: prose, lists, code and tables repeated to a target size
+- ``code``, ``tables``, ``mermaid``: documents dominated by one kind of block
+
+``write_tree`` lays documents out as a folder tree; ``deep`` nests a few
+folders per level many levels down, ``wide`` spreads many files over many
+sibling folders.
+
+Usage:
+    python benchmarks/corpus.py OUTPUT_DIR [--megabytes N] [--seed N]
+"""
+
+import argparse
+import os
+import random
+
+WORDS = (
+    "render cache index folder markdown preview export sidebar session engine "
+    "document heading table diagram search module request worker thread value "
+    "config parser stream layout anchor outline project azure summary prompt"
+).split()
+
+LANGUAGES = ("python", "javascript", "bash", "json", "yaml", "sql")
+
+TREES = {
+    # name: (depth, folders per level, files per folder)
+    "deep": (12, 2, 3),
+    "wide": (1, 150, 20),
+}
+
+
+def _sentence(rng, words=12):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng, sentences=4):
+    parts = [_sentence(rng, rng.randint(6, 16)) for _ in range(sentences)]
+    # Some inline markup for the inline processors to work on
+    first, second, rest = parts[0].split(" ", 2)
+    parts[0] = f"{first} **{second}** _{rest}_"
+    parts[-1] = f"{parts[-1]} See `{rng.choice(WORDS)}()` and [the guide](guide/{rng.choice(WORDS)}.md)."
+    return " ".join(parts)
+
+
+def _code_block(rng, lines=12):
+    lang = rng.choice(LANGUAGES)
+    body = "\n".join(
+        f"{'    ' * rng.randint(0, 2)}{rng.choice(WORDS)}_{n} = {rng.choice(WORDS)}({rng.randint(0, 99)})"
+        for n in range(lines)
+    )
+    return f"```{lang}\n{body}\n```"
+
+
+def _table(rng, rows=8, columns=4):
+    header = "| " + " | ".join(rng.choice(WORDS).title() for _ in range(columns)) + " |"
+    rule = "|" + "|".join(rng.choice(("---", ":---", ":---:", "---:")) for _ in range(columns)) + "|"
+    body = [
+        "| " + " | ".join(f"{rng.choice(WORDS)} {rng.randint(0, 999)}" for _ in range(columns)) + " |"
+        for _ in range(rows)
+    ]
+    return "\n".join([header, rule] + body)
+
+
+def _mermaid(rng, nodes=8):
+    edges = "\n".join(f"    N{n}[{rng.choice(WORDS)}] --> N{n + 1}" for n in range(nodes))
+    if rng.random() < 0.5:
+        return f"```mermaid\ngraph TD\n{edges}\n```"
+    # Unlabelled fence recognised by its first line
+    return f"```\nflowchart LR\n{edges}\n```"
+
+
+def _list(rng, items=5):
+    if rng.random() < 0.5:
+        return "\n".join(f"- {_sentence(rng, 6)}" for _ in range(items))
+    return "\n".join(f"{n}. {_sentence(rng, 6)}" for n in range(1, items + 1))
+
+
+def _section(rng, n, blocks):
+    return f"## Section {n}\n\n" + "\n\n".join(block(rng) for block in blocks) + "\n\n"
+
+
+def _build(rng, title, target_bytes, blocks):
+    parts = [f"# {title}\n\n{_paragraph(rng)}\n\n"]
+    size = len(parts[0])
+    n = 1
+    while size < target_bytes:
+        section = _section(rng, n, blocks)
+        parts.append(section)
+        size += len(section)
+        n += 1
+    return "".join(parts)
+
+
+def small_document(seed=0):
+    rng = random.Random(seed)
+    return _build(rng, "Small document", 2 * 1024, (_paragraph, _list, _code_block))
+
+
+def large_document(megabytes=1.0, seed=0):
+    rng = random.Random(seed)
+    blocks = (_paragraph, _list, _paragraph, _code_block, _table, _paragraph)
+    return _build(rng, "Large document", int(megabytes * 1024 * 1024), blocks)
+
+
+def code_heavy_document(kilobytes=128, seed=0):
+    rng = random.Random(seed)
+    return _build(rng, "Code heavy", kilobytes * 1024, (_code_block, _code_block, _code_block, _paragraph))
+
+
+def table_heavy_document(kilobytes=128, seed=0):
+    rng = random.Random(seed)
+    return _build(rng, "Table heavy", kilobytes * 1024, (_table, _table, _paragraph))
+
+
+def mermaid_heavy_document(kilobytes=128, seed=0):
+    rng = random.Random(seed)
+    return _build(rng, "Mermaid heavy", kilobytes * 1024, (_mermaid, _mermaid, _paragraph))
+
+
+DOCUMENTS = {
+    "small": small_document,
+    "large": large_document,
+    "code": code_heavy_document,
+    "tables": table_heavy_document,
+    "mermaid": mermaid_heavy_document,
+}
+
+
+def write_tree(root, depth, breadth, files_per_dir, seed=0):
+    """Write a tree of small documents below ``root`` and return the number of files."""
+    rng = random.Random(seed)
+    count = 0
+    level = [root]
+    for current_depth in range(depth + 1):
+        for folder in level:
+            os.makedirs(folder, exist_ok=True)
+            for n in range(files_per_dir):
+                with open(os.path.join(folder, f"{rng.choice(WORDS)}-{n}.md"), "w", encoding="utf-8") as f:
+                    f.write(small_document(seed=rng.randrange(1 << 30)))
+                count += 1
+            # A file the scanner has to skip
+            with open(os.path.join(folder, "notes.txt"), "w", encoding="utf-8") as f:
+                f.write(_sentence(rng))
+        if current_depth < depth:
+            # Every level gets ``breadth`` folders; only the first one goes deeper
+            level = [os.path.join(level[0], f"{rng.choice(WORDS)}-{i}") for i in range(breadth)]
+    return count
+
+
+def write_corpus(output_dir, megabytes=1.0, seed=0):
+    """Write every document kind and both trees below ``output_dir``."""
+    documents_dir = os.path.join(output_dir, "documents")
+    os.makedirs(documents_dir, exist_ok=True)
+    for name, generate in DOCUMENTS.items():
+        text = generate(megabytes, seed=seed) if name == "large" else generate(seed=seed)
+        with open(os.path.join(documents_dir, f"{name}.md"), "w", encoding="utf-8") as f:
+            f.write(text)
+    return {
+        name: write_tree(os.path.join(output_dir, name), *shape, seed=seed)
+        for name, shape in TREES.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output_dir")
+    parser.add_argument("--megabytes", type=float, default=1.0, help="size of the large document")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    counts = write_corpus(args.output_dir, args.megabytes, args.seed)
+    print(f"wrote {len(DOCUMENTS)} documents and trees "
+          + ", ".join(f"{name} ({count} files)" for name, count in counts.items())
+          + f" to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
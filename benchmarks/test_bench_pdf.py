@@ -0,0 +1,33 @@
+"""Benchmarks of the PDF export: element conversion and full page layout."""
+
+import io
+
+import pytest
+
+from corpus import DOCUMENTS
+from html_document import render_markdown_html
+from pdf_export import MarkdownToPDFConverter, html_to_pdf
+
+
+@pytest.mark.benchmark(group="pdf-setup")
+def test_pdf_converter_setup(benchmark):
+    """Creating a converter; the styles are shared, so this is cheap after the first export."""
+    benchmark(MarkdownToPDFConverter)
+
+
+@pytest.mark.benchmark(group="pdf-elements")
+@pytest.mark.parametrize("kind", DOCUMENTS)
+def test_pdf_elements(benchmark, documents, kind):
+    """Markdown to flowables with the render already cached, as after viewing the document."""
+    converter = MarkdownToPDFConverter()
+    render_markdown_html(documents[kind])
+    elements = benchmark(converter.markdown_to_pdf_elements, documents[kind])
+    assert elements
+
+
+@pytest.mark.benchmark(group="pdf-build")
+@pytest.mark.parametrize("kind", ["small", "code", "tables"])
+def test_pdf_build(benchmark, documents, kind):
+    """Layout and writing of the whole PDF."""
+    html = render_markdown_html(documents[kind])
+    benchmark(lambda: html_to_pdf(html, io.BytesIO()))
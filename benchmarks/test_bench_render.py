@@ -0,0 +1,41 @@
+"""Benchmarks of markdown to HTML rendering and the Mermaid fence pre-pass."""
+
+import pytest
+
+from corpus import DOCUMENTS
+from fence_scanner import preprocess_mermaid
+from html_document import render_markdown_html
+from render_engine import RenderEngine
+
+
+@pytest.fixture(scope="module")
+def engine(documents):
+    engine = RenderEngine()
+    for text in documents.values():
+        engine.convert(text)  # warm the pool and the highlight cache
+    return engine
+
+
+@pytest.mark.benchmark(group="render")
+@pytest.mark.parametrize("kind", DOCUMENTS)
+def test_render(benchmark, engine, documents, kind):
+    """A full conversion, as on a render cache miss."""
+    html = benchmark(engine.convert, documents[kind])
+    assert html
+
+
+@pytest.mark.benchmark(group="render-cached")
+@pytest.mark.parametrize("kind", ["small", "large"])
+def test_render_cached(benchmark, documents, kind):
+    """``render_markdown`` for a document already in the render cache (hashing and lookup)."""
+    text = documents[kind]
+    expected = render_markdown_html(text)
+    assert benchmark(render_markdown_html, text) == expected
+
+
+@pytest.mark.benchmark(group="mermaid-scan")
+@pytest.mark.parametrize("kind", DOCUMENTS)
+def test_preprocess_mermaid(benchmark, documents, kind):
+    lines = documents[kind].split("\n")
+    count = benchmark(lambda: sum(1 for _ in preprocess_mermaid(lines)))
+    assert count
@@ -0,0 +1,50 @@
+"""Benchmarks of finding the markdown files of a folder and building the sidebar tree."""
+
+import os
+import shutil
+
+import pytest
+
+from corpus import TREES
+from file_index import INDEX_DIR, FileIndex
+from file_scanner import scan_markdown_files
+from file_tree import FileTree
+
+
+@pytest.mark.benchmark(group="scan-walk")
+@pytest.mark.parametrize("tree", TREES)
+def test_scan_walk(benchmark, trees, tree):
+    """A full directory walk without the persistent index."""
+    files = benchmark(lambda: list(scan_markdown_files(trees[tree])))
+    assert files
+
+
+@pytest.mark.benchmark(group="scan-index-cold")
+@pytest.mark.parametrize("tree", TREES)
+def test_file_index_cold(benchmark, trees, tree):
+    """``find_markdown_files`` on a folder seen for the first time (builds and saves the index)."""
+    root = trees[tree]
+
+    def setup():
+        shutil.rmtree(os.path.join(root, INDEX_DIR), ignore_errors=True)
+        return (FileIndex(root),), {}
+
+    files = benchmark.pedantic(lambda index: index.refresh(), setup=setup, rounds=10)
+    assert files
+
+
+@pytest.mark.benchmark(group="scan-index-warm")
+@pytest.mark.parametrize("tree", TREES)
+def test_file_index_warm(benchmark, trees, tree):
+    """``find_markdown_files`` on a rerun with nothing changed (directory stats only)."""
+    index = FileIndex(trees[tree])
+    expected = index.refresh()
+    assert benchmark(index.refresh) == expected
+
+
+@pytest.mark.benchmark(group="file-tree")
+@pytest.mark.parametrize("tree", TREES)
+def test_file_tree(benchmark, trees, tree):
+    files = FileIndex(trees[tree]).refresh()
+    file_tree = benchmark(FileTree, files)
+    assert len(file_tree) == len(files)
@@ -9,7 +9,7 @@ REM Check if Python is installed
 python --version >nul 2>&1
 if %errorlevel% neq 0 (
     echo Error: Python is not installed or not in PATH
-    echo Please install Python 3.8+ from https://www.python.org/downloads/
+    echo Please install Python 3.9+ from https://www.python.org/downloads/
     echo Make sure to check "Add Python to PATH" during installation
     pause
     exit /b 1
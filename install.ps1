@@ -16,11 +16,11 @@ function Test-Python {
         $pythonVersion = python --version 2>&1
         if ($pythonVersion -match "Python (\d+\.\d+)") {
             $version = [version]$matches[1]
-            if ($version -ge [version]"3.8") {
+            if ($version -ge [version]"3.9") {
                 Write-Host "✅ Python $($matches[1]) found" -ForegroundColor Green
                 return $true
             } else {
-                Write-Host "❌ Python $($matches[1]) found but version 3.8+ required" -ForegroundColor Red
+                Write-Host "❌ Python $($matches[1]) found but version 3.9+ required" -ForegroundColor Red
                 return $false
             }
         }
@@ -178,11 +178,11 @@ try {
         $response = Read-Host "Would you like to install Python automatically? (y/n)"
         if ($response -eq "y" -or $response -eq "Y") {
             if (!(Install-Python)) {
-                Write-Host "❌ Python installation failed. Please install Python 3.8+ manually." -ForegroundColor Red
+                Write-Host "❌ Python installation failed. Please install Python 3.9+ manually." -ForegroundColor Red
                 exit 1
             }
         } else {
-            Write-Host "❌ Python 3.8+ is required. Please install it first." -ForegroundColor Red
+            Write-Host "❌ Python 3.9+ is required. Please install it first." -ForegroundColor Red
             exit 1
         }
     }
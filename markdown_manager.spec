@@ -24,6 +24,8 @@ a = Analysis(
     datas=[
         # Include all necessary data files
         ('src/markdown_manager/*.py', 'markdown_manager'),
+        # Viewer component page, styles and scripts
+        ('src/markdown_manager/viewer', 'markdown_manager/viewer'),
         ('.env.example', '.'),
         ('README.md', '.'),
         ('CHANGELOG.md', '.'),
@@ -11,7 +11,7 @@ REM Check if Python is available
 python --version >nul 2>&1
 if errorlevel 1 (
     echo ERROR: Python is not installed or not in PATH
-    echo Please install Python 3.8+ and try again
+    echo Please install Python 3.9+ and try again
     pause
     exit /b 1
 )
@@ -25,8 +25,8 @@ def setup_dev_environment():
     print("🚀 Setting up Markdown Manager development environment...")
     
     # Check Python version
-    if sys.version_info < (3, 8):
-        print("❌ Python 3.8 or higher is required")
+    if sys.version_info < (3, 9):
+        print("❌ Python 3.9 or higher is required")
         sys.exit(1)
     
     print(f"✅ Python {sys.version.split()[0]} detected")
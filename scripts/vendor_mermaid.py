@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Vendor the Mermaid bundle used by the markdown viewer and the print view.
+
+Downloads the pinned Mermaid release into src/markdown_manager/viewer/vendor,
+where the app serves it itself, so diagrams render on hosts without internet
+access. Commit the file, or run this script while building images.
+
+The bundle is taken from the release's npm tarball, whose SHA-512 must match
+the ``integrity`` the npm registry publishes for that version. When
+``MERMAID_SHA256`` (or ``--sha256``) is set, the extracted bundle must match
+it as well, and an existing bundle is checked against it. ``--pin`` records
+the SHA-256 of the verified bundle in html_document.py.
+
+Usage:
+    python scripts/vendor_mermaid.py [--force] [--sha256 HEX | --pin]
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "markdown_manager"))
+
+import html_document  # noqa: E402
+from html_document import MERMAID_BUNDLE_PATH, MERMAID_SHA256, MERMAID_VERSION  # noqa: E402
+
+REGISTRY_URL = f"https://registry.npmjs.org/mermaid/{MERMAID_VERSION}"
+BUNDLE_MEMBER = "package/dist/mermaid.min.js"
+
+
+def fetch(url):
+    with urllib.request.urlopen(url, timeout=120) as response:
+        return response.read()
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def download_bundle():
+    """Return mermaid.min.js from the npm tarball, verified against the registry's integrity."""
+    metadata = json.loads(fetch(REGISTRY_URL))
+    dist = metadata["dist"]
+    algorithm, _, expected = dist["integrity"].partition("-")
+    if algorithm != "sha512":
+        sys.exit(f"❌ Unsupported integrity algorithm {algorithm!r} for Mermaid {MERMAID_VERSION}")
+    print(f"Downloading Mermaid {MERMAID_VERSION} from {dist['tarball']}")
+    tarball = fetch(dist["tarball"])
+    if base64.b64encode(hashlib.sha512(tarball).digest()).decode("ascii") != expected:
+        sys.exit("❌ The npm tarball does not match the integrity published by the registry")
+    with tarfile.open(fileobj=io.BytesIO(tarball), mode="r:gz") as archive:
+        return archive.extractfile(BUNDLE_MEMBER).read()
+
+
+def pin(digest):
+    """Record ``digest`` as MERMAID_SHA256 in html_document.py."""
+    path = html_document.__file__
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    source, count = re.subn(r'^MERMAID_SHA256 = ".*"$', f'MERMAID_SHA256 = "{digest}"', source, flags=re.M)
+    if count != 1:
+        sys.exit(f"❌ MERMAID_SHA256 not found in {path}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source)
+    print(f"📌 Pinned Mermaid {MERMAID_VERSION} to sha256 {digest} in {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="download again even if the bundle exists")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--sha256", default=MERMAID_SHA256,
+                       help="expected SHA-256 of the bundle (default: MERMAID_SHA256)")
+    group.add_argument("--pin", action="store_true",
+                       help="record the SHA-256 of the verified bundle as MERMAID_SHA256")
+    args = parser.parse_args()
+    expected = "" if args.pin else args.sha256.lower()
+
+    target = MERMAID_BUNDLE_PATH
+    if os.path.isfile(target) and not args.force:
+        digest = file_sha256(target)
+        if expected and digest != expected:
+            sys.exit(f"❌ Checksum mismatch for {target}: got {digest}; rerun with --force")
+        if args.pin:
+            sys.exit("❌ --pin only records a bundle verified against npm; rerun with --force")
+        print(f"✅ Mermaid is already vendored at {target}")
+        return
+
+    data = download_bundle()
+    digest = hashlib.sha256(data).hexdigest()
+    if expected and digest != expected:
+        sys.exit(f"❌ Checksum mismatch: got {digest}, expected {expected}")
+    if args.pin:
+        pin(digest)
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp_path = target + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, target)
+    print(f"✅ Saved {len(data) // 1024} KB to {target} (sha256 {digest})")
+
+
+if __name__ == "__main__":
+    main()
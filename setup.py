@@ -33,7 +33,6 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
@@ -42,11 +41,12 @@ setup(
         "Topic :: Documentation",
         "Topic :: Software Development :: Documentation",
     ],
-    python_requires=">=3.8",
+    python_requires=">=3.9",
     install_requires=requirements,
     include_package_data=True,
     package_data={
         '': ['*.md', '*.txt', '*.example'],
+        'markdown_manager': ['viewer/*.html', 'viewer/*.css', 'viewer/*.js', 'viewer/vendor/*.js'],
     },
     entry_points={
         'console_scripts': [
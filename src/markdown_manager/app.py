@@ -1,28 +1,52 @@
 import streamlit as st
 import os
-from pathlib import Path
 import markdown
 from markdown.extensions import codehilite, fenced_code, tables, toc
 from streamlit_ace import st_ace
 import base64
-import tempfile
 import time
 from ai_service import ai_service
 from ai_service import CUSTOM_PROMPT_BASE_GUIDELINES, CUSTOM_PROMPT_BASE_CONTENT
-import markdown2
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Preformatted
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
 import re
 from html.parser import HTMLParser
 import json
+import sqlite3
 from azure_sync_service import push_to_azure, pull_from_azure
+from file_index import get_file_index
+from file_scanner import load_ignore_patterns
+from file_tree import FileTree, ancestor_dirs
+from search_index import get_search_index
+from heading_index import get_document_outline
+from quick_open import get_path_index
+from render_cache import get_render_cache, render_cache_key
+from render_engine import get_render_engine
+from html_document import MERMAID_CDN_URL, build_html_document
+from export_jobs import (DONE, EXPORT_JOB_POLL_SECONDS, FAILED, QUEUED, RUNNING, STAGE_WAITING, STAGES,
+                         book_job, get_export_jobs, pdf_job)
+from export_cache import get_export_cache, pdf_export_key, printable_html_key
+from preview_blocks import needs_full_render, render_incremental
+from preview_renderer import PREVIEW_DEBOUNCE_MS, PreviewRenderer
+from large_document import get_large_document, is_large_document
+from viewer_component import markdown_viewer, mermaid_script_url
+from file_watcher import FILE_WATCHER_ENABLED, get_folder_watcher
+from worker_pool import JobTimeout, WorkerPoolBusy, render_html
 import tkinter as tk
 from tkinter import filedialog
 from datetime import datetime
+from typing import Optional
+
+# Entries shown per directory in the sidebar tree before "Show more"
+TREE_PAGE_SIZE = int(os.getenv("TREE_PAGE_SIZE", "50"))
+# Recently opened files remembered for quick-open ranking
+RECENT_FILES_LIMIT = 50
+QUICK_OPEN_LIMIT = 15
+# Headings listed in the outline of a large document
+LARGE_DOCUMENT_OUTLINE_SIZE = 40
+# Headings listed in the sidebar outline of the open document
+OUTLINE_LIMIT = 100
+HEADING_SEARCH_LIMIT = 15
+# How long past the debounce window an editor run waits for its preview before polling
+PREVIEW_WAIT_SECONDS = 0.25
 
 def select_folder():
     """Open a folder selection dialog and return the selected folder path."""
@@ -75,11 +99,19 @@ def save_config(project_root, doc_folder, connection_string):
 
     try:
         os.makedirs(config_dir, exist_ok=True)
-        config_data = {
+        # Keep settings that are only edited by hand (e.g. ignore_patterns)
+        config_data = {}
+        if os.path.exists(config_path):
+            try:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    config_data = json.load(f)
+            except ValueError:
+                config_data = {}
+        config_data.update({
             "project_root_folder": project_root,
             "project_doc_folder": doc_folder,
             "azure_connection_string": connection_string
-        }
+        })
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(config_data, f, indent=4)
 
@@ -218,320 +250,485 @@ def load_recent_projects():
     
     return []
 
-def find_markdown_files(directory):
-    """Recursively find all markdown files in a directory"""
-    markdown_files = []
+def save_recent_file(file_path):
+    """Record a file as most recently opened in the session history"""
+    sessions_dir = get_sessions_folder()
+    if not sessions_dir or not file_path:
+        return False
+
+    session_file = os.path.join(sessions_dir, "recent_projects.json")
+
+    try:
+        sessions_data = {"recent_projects": []}
+        if os.path.exists(session_file):
+            with open(session_file, 'r', encoding='utf-8') as f:
+                sessions_data = json.load(f)
+
+        file_path = os.path.abspath(file_path)
+        recent_files = [f for f in sessions_data.get("recent_files", []) if f.get("path") != file_path]
+        recent_files.insert(0, {"path": file_path, "last_accessed": datetime.now().isoformat()})
+        sessions_data["recent_files"] = recent_files[:RECENT_FILES_LIMIT]
+
+        with open(session_file, 'w', encoding='utf-8') as f:
+            json.dump(sessions_data, f, indent=2)
+        return True
+    except Exception:
+        # Recency only improves quick-open ranking; never interrupt file selection
+        return False
+
+def load_recent_files():
+    """Return recently opened file paths from session history, most recent first"""
+    sessions_dir = get_sessions_folder()
+    if not sessions_dir:
+        return []
+
+    session_file = os.path.join(sessions_dir, "recent_projects.json")
+    try:
+        if os.path.exists(session_file):
+            with open(session_file, 'r', encoding='utf-8') as f:
+                sessions_data = json.load(f)
+            return [f["path"] for f in sessions_data.get("recent_files", []) if f.get("path")]
+    except Exception:
+        pass
+    return []
+
+def find_markdown_files(directory, ignore_patterns=None, progress=None, ignore_root=None):
+    """Recursively find all markdown files in a directory.
+
+    Backed by the persistent index in ``.fyiai/index`` so only directories that
+    changed since the previous call are rescanned. VCS, dependency and build
+    directories are skipped, as is anything matching ``ignore_patterns``
+    (relative to ``ignore_root``, like a ``.gitignore`` there).
+    """
     if not os.path.exists(directory):
-        return markdown_files
-    
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.lower().endswith(('.md', '.markdown')):
-                full_path = os.path.join(root, file)
-                rel_path = os.path.relpath(full_path, directory)
-                markdown_files.append((rel_path, full_path))
-    
-    return sorted(markdown_files)
-
-def _build_file_tree(markdown_files):
-    """Build a nested dict tree from a list of (rel_path, full_path)."""
-    tree = {}
-    for rel_path, full_path in markdown_files:
-        parts = Path(rel_path).parts
-        node = tree
-        for part in parts[:-1]:
-            node = node.setdefault(part, {})
-        node.setdefault('__files__', []).append((parts[-1], full_path))
-    return tree
-
-def _render_file_tree(tree: dict, selected_full_path: str | None = None, base: str = ""):
-    """Render a nested file tree with expanders and return clicked file path if any."""
-    clicked = None
-    # Render directories first
-    for dirname in sorted([k for k in tree.keys() if k != '__files__'], key=lambda s: s.lower()):
-        with st.expander(f"📁 {dirname}", expanded=False, key=f"dir:{base}{dirname}"):
-            child_clicked = _render_file_tree(tree[dirname], selected_full_path, base=f"{base}{dirname}/")
-            if child_clicked:
-                clicked = child_clicked
-    # Render files at this level
-    for fname, full_path in sorted(tree.get('__files__', []), key=lambda x: x[0].lower()):
-        is_selected = (selected_full_path == full_path)
-        button_type = "primary" if is_selected else "secondary"
-        if st.button(f"📄 {fname}", key=f"file:{full_path}", use_container_width=True, type=button_type):
-            clicked = full_path
-    return clicked
+        return []
+    return get_file_index(directory, ignore_patterns, ignore_root).refresh(progress)
 
-def _render_file_tree_v2(tree: dict, selected_full_path: str | None = None, base: str = ""):
-    """Render a nested file tree using expanders (no key arg for compatibility).
+def get_ignore_patterns():
+    """Return the ignore patterns for the current project (defaults plus config.json)."""
+    return load_ignore_patterns(st.session_state.get('project_root_folder', ''))
 
-    Uses unique labels that include the subpath to avoid collisions.
+def get_ignore_root():
+    """Return the folder the ignore patterns are relative to: the project root."""
+    return st.session_state.get('project_root_folder', '') or None
+
+def _scan_with_progress(directory, ignore_patterns):
+    """Run the first scan of a folder, showing partial results while directories are listed."""
+    status = st.empty()
+    last_update = [0.0]
+
+    def progress(files_found, rel_dir):
+        now = time.monotonic()
+        if now - last_update[0] >= 0.2:
+            last_update[0] = now
+            status.caption(f"🔎 Scanning... {files_found} files found so far ({rel_dir or '.'})")
+
+    markdown_files = find_markdown_files(directory, ignore_patterns, progress, get_ignore_root())
+    status.empty()
+    return markdown_files
+
+def get_file_tree(directory):
+    """Return (markdown_files, FileTree) for a directory, rebuilding the tree only when the file set changed.
+
+    With the background watcher enabled the file list comes from its in-memory
+    snapshot, so a rerun does not touch the filesystem at all.
+    """
+    ignore_patterns = get_ignore_patterns()
+    file_index = get_file_index(directory, ignore_patterns, get_ignore_root())
+    if not file_index.has_listing():
+        _scan_with_progress(directory, ignore_patterns)
+
+    if FILE_WATCHER_ENABLED:
+        watcher = get_folder_watcher(directory)
+        version, markdown_files = watcher.snapshot()
+        tree_key = (watcher.root, version)
+    else:
+        markdown_files = find_markdown_files(directory, ignore_patterns, ignore_root=get_ignore_root())
+        tree_key = (file_index.root, file_index.version)
+    if st.session_state.get('file_tree_key') != tree_key:
+        st.session_state.file_tree = FileTree(markdown_files)
+        st.session_state.file_tree_key = tree_key
+    return markdown_files, st.session_state.file_tree
+
+def _toggle_tree_dir(rel_dir):
+    """Expand or collapse a directory in the lazy file tree."""
+    expanded = st.session_state.tree_expanded_dirs
+    if rel_dir in expanded:
+        expanded.discard(rel_dir)
+    else:
+        expanded.add(rel_dir)
+
+def _show_more_tree_entries(rel_dir):
+    """Reveal the next page of entries of a large directory."""
+    limits = st.session_state.tree_page_limits
+    limits[rel_dir] = limits.get(rel_dir, TREE_PAGE_SIZE) + TREE_PAGE_SIZE
+
+def _reveal_in_file_tree(root, selected_full_path):
+    """Expand the directories leading to the selected file once per selection."""
+    if not selected_full_path or st.session_state.get('tree_revealed_file') == selected_full_path:
+        return
+    st.session_state.tree_revealed_file = selected_full_path
+    try:
+        rel_path = os.path.relpath(selected_full_path, root)
+    except ValueError:
+        return
+    if not rel_path.startswith('..'):
+        st.session_state.tree_expanded_dirs.update(ancestor_dirs(rel_path))
+
+def _render_lazy_file_tree(tree: FileTree, selected_full_path: Optional[str] = None, rel_dir: str = "", depth: int = 0):
+    """Render a FileTree, creating widgets only for expanded directories.
+
+    Collapsed directories cost a single button however large they are, and
+    directories with more than TREE_PAGE_SIZE entries are paged.
     Returns the clicked file path if any.
     """
     clicked = None
-    # Render directories first
-    for dirname in sorted([k for k in tree.keys() if k != '__files__'], key=lambda s: s.lower()):
-        label = f"📁 {dirname} [{base}{dirname}]" if base else f"📁 {dirname}"
-        with st.expander(label, expanded=False):
-            child_clicked = _render_file_tree_v2(tree[dirname], selected_full_path, base=f"{base}{dirname}/")
-            if child_clicked:
-                clicked = child_clicked
-    # Render files at this level
-    for fname, full_path in sorted(tree.get('__files__', []), key=lambda x: x[0].lower()):
-        is_selected = (selected_full_path == full_path)
-        button_type = "primary" if is_selected else "secondary"
-        if st.button(f"📄 {fname}", key=f"file:{full_path}", use_container_width=True, type=button_type):
+    indent = "\u2003" * depth
+    limit = st.session_state.tree_page_limits.get(rel_dir, TREE_PAGE_SIZE)
+    for kind, target, name in tree.entries(rel_dir, limit):
+        if kind == "dir":
+            is_expanded = target in st.session_state.tree_expanded_dirs
+            icon = "📂" if is_expanded else "📁"
+            st.button(
+                f"{indent}{icon} {name} ({tree.file_count(target)})",
+                key=f"tree_dir:{target}",
+                use_container_width=True,
+                on_click=_toggle_tree_dir,
+                args=(target,)
+            )
+            if is_expanded:
+                child_clicked = _render_lazy_file_tree(tree, selected_full_path, target, depth + 1)
+                if child_clicked:
+                    clicked = child_clicked
+        else:
+            button_type = "primary" if selected_full_path == target else "secondary"
+            if st.button(f"{indent}📄 {name}", key=f"tree_file:{target}", use_container_width=True, type=button_type):
+                clicked = target
+    remaining = tree.entry_count(rel_dir) - limit
+    if remaining > 0:
+        st.button(
+            f"{indent}⋯ Show {min(remaining, TREE_PAGE_SIZE)} more ({remaining} hidden)",
+            key=f"tree_more:{rel_dir}",
+            use_container_width=True,
+            on_click=_show_more_tree_entries,
+            args=(rel_dir,)
+        )
+    return clicked
+
+def render_quick_open(folder_path, markdown_files, version):
+    """Render the fuzzy file-name box and return the path of a clicked match if any."""
+    query = st.text_input(
+        "⚡ Quick open",
+        key="quick_open_query",
+        placeholder="fuzzy file path, e.g. dpl/rdme",
+        help="Jump to a file by typing parts of its path; recently opened files rank higher"
+    )
+    if not query.strip():
+        return None
+
+    path_index = get_path_index(folder_path, version, [rel for rel, _ in markdown_files])
+    root = os.path.abspath(folder_path)
+    recent = [
+        os.path.relpath(path, root) for path in load_recent_files()
+        if path.startswith(root + os.sep)
+    ]
+    started = time.perf_counter()
+    matches = path_index.search(query, limit=QUICK_OPEN_LIMIT, recent=recent)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(f"{len(matches)} match(es) in {elapsed_ms:.1f} ms")
+
+    clicked = None
+    for rel_path, _ in matches:
+        full_path = os.path.join(folder_path, *rel_path.split("/"))
+        if st.button(f"📄 {rel_path}", key=f"quick_open:{rel_path}", use_container_width=True):
             clicked = full_path
     return clicked
 
-def _preprocess_mermaid(md_text: str) -> str:
-    """Convert mermaid code fences or graph TB blocks into raw mermaid divs.
+def _refreshed_search_index(folder_path, markdown_files):
+    """Return the folder's search index, building it on first use and refreshing it in the background."""
+    search_index = get_search_index(folder_path)
+    if search_index.document_count() == 0 and not search_index.is_updating():
+        with st.spinner("Building search index..."):
+            search_index.update(markdown_files)
+    else:
+        # Pick up edited, added and removed files without blocking the query
+        search_index.update_in_background(markdown_files)
+    return search_index
+
+def render_search_panel(folder_path, markdown_files):
+    """Render the full-text search box for the folder and return a clicked result path if any."""
+    query = st.text_input(
+        "🔍 Search file contents",
+        key="content_search_query",
+        placeholder='words or "exact phrase"',
+        help="Ranked full-text search over every markdown file in this folder"
+    )
+    if not query.strip():
+        return None
+
+    try:
+        search_index = _refreshed_search_index(folder_path, markdown_files)
+        started = time.perf_counter()
+        results = search_index.search(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    except (sqlite3.Error, OSError) as e:
+        st.warning(f"Search is unavailable for this folder: {e}")
+        return None
+
+    if search_index.progress:
+        done, total = search_index.progress
+        st.caption(f"⏳ Updating index ({done}/{total}), results may be incomplete")
+    st.caption(f"{len(results)} result(s) in {elapsed_ms:.1f} ms")
+
+    clicked = None
+    for hit in results:
+        if st.button(f"📄 {hit['rel_path']}", key=f"search_hit:{hit['full_path']}", use_container_width=True):
+            clicked = hit['full_path']
+        if hit['snippet']:
+            st.markdown(
+                f"<div style='font-size: 0.8em; color: #555; margin: -0.5em 0 0.5em 0;'>{hit['snippet']}</div>",
+                unsafe_allow_html=True
+            )
+    return clicked
+
+def _jump_to_heading(full_path, anchor, title):
+    """Ask the viewer to scroll to a heading of ``full_path`` on its next render."""
+    st.session_state.viewer_scroll_target = {
+        "path": full_path, "anchor": anchor, "title": title, "nonce": time.time_ns()
+    }
+
+def render_heading_search(folder_path, markdown_files):
+    """Render the "go to heading" box for the folder and return the file of a clicked heading if any.
 
-    Supports:
-    - ```mermaid ... ```
-    - ``` (first non-empty line starts with graph/flowchart)
+    Headings come from the search index, so no document is rendered to find them.
     """
-    lines = md_text.split("\n")
-    out = []
-    i = 0
-    in_fence = False
-    fence_lang = None
-    buf = []
-
-    def is_mermaid_block(text_block: list[str]) -> bool:
-        # Find first non-empty content line
-        for t in text_block:
-            s = t.strip()
-            if not s:
-                continue
-            # Mermaid flowchart keywords
-            if s.lower().startswith("graph "):
-                return True
-            if s.lower().startswith("flowchart "):
-                return True
-            return False
-        return False
+    query = st.text_input(
+        "🧭 Go to heading",
+        key="heading_search_query",
+        placeholder="section title",
+        help="Jump to a section of any markdown file in this folder"
+    )
+    if not query.strip():
+        return None
 
-    while i < len(lines):
-        line = lines[i]
-        if not in_fence:
-            if line.startswith("```"):
-                in_fence = True
-                fence_lang = line.strip().lstrip("`").strip()  # capture language after ```
-                buf = []
-            else:
-                out.append(line)
-        else:
-            # inside fence
-            if line.startswith("```"):
-                # fence end
-                content_lines = buf
-                is_mermaid = (fence_lang.lower() == "mermaid") if fence_lang else False
-                if not is_mermaid:
-                    # Detect graph TB/TD/LR/RL or flowchart
-                    is_mermaid = is_mermaid_block(content_lines)
-
-                if is_mermaid:
-                    out.append("<div class=\"mermaid\">")
-                    out.extend(content_lines)
-                    out.append("</div>")
-                else:
-                    # restore original fenced block
-                    fence_header = "```" + (fence_lang if fence_lang else "")
-                    out.append(fence_header)
-                    out.extend(content_lines)
-                    out.append("```")
-
-                in_fence = False
-                fence_lang = None
-                buf = []
-            else:
-                buf.append(line)
-        i += 1
+    try:
+        search_index = _refreshed_search_index(folder_path, markdown_files)
+        matches = search_index.find_headings(query, limit=HEADING_SEARCH_LIMIT)
+    except (sqlite3.Error, OSError) as e:
+        st.warning(f"Heading search is unavailable for this folder: {e}")
+        return None
+    if not matches:
+        st.caption("No matching headings")
 
-    # If file ends while still in fence, just flush as original
-    if in_fence:
-        fence_header = "```" + (fence_lang if fence_lang else "")
-        out.append(fence_header)
-        out.extend(buf)
-        # Do not append closing fence; keep as-is for visibility
+    clicked = None
+    for hit in matches:
+        label = f"§ {hit['title']} · {hit['rel_path']}"
+        if st.button(label, key=f"heading_hit:{hit['full_path']}#{hit['anchor']}", use_container_width=True):
+            _jump_to_heading(hit['full_path'], hit['anchor'], hit['title'])
+            clicked = hit['full_path']
+    return clicked
 
-    return "\n".join(out)
+def render_document_outline(selected_file_path):
+    """Render the clickable heading outline of the open document in the sidebar."""
+    if not selected_file_path or is_large_document(selected_file_path):
+        # Large documents show their own outline next to the content
+        return
+    try:
+        headings = get_document_outline(selected_file_path)
+    except OSError:
+        return
+    if not headings:
+        return
+    with st.expander(f"📑 Outline ({len(headings)})", expanded=False):
+        min_level = min(heading.level for heading in headings)
+        for heading in headings[:OUTLINE_LIMIT]:
+            # Em spaces survive in button labels where leading spaces are stripped
+            label = "\u2003" * (heading.level - min_level) + heading.title
+            st.button(
+                label if len(label) <= 80 else label[:77] + "...",
+                key=f"outline:{heading.anchor}",
+                on_click=_jump_to_heading,
+                args=(selected_file_path, heading.anchor, heading.title),
+                use_container_width=True
+            )
+        if len(headings) > OUTLINE_LIMIT:
+            st.caption(f"Showing the first {OUTLINE_LIMIT} headings; use 🧭 Go to heading for the rest")
+
+def render_book_export(folder_path, markdown_files):
+    """Render the sidebar form that merges a folder, or picked documents of it, into one PDF."""
+    with st.expander("📚 Export as one PDF", expanded=False):
+        folders = sorted({os.path.dirname(rel_path) for rel_path, _ in markdown_files})
+        folder = st.selectbox(
+            "Folder", folders, key="book_folder",
+            format_func=lambda f: f or f"{os.path.basename(os.path.normpath(folder_path))} (all files)"
+        )
+        candidates = [
+            (rel_path, full_path) for rel_path, full_path in markdown_files
+            if not folder or rel_path.startswith(folder + os.sep)
+        ]
+        picked = st.multiselect(
+            "Documents", [rel_path for rel_path, _ in candidates], key="book_documents",
+            help=f"Leave empty to include all {len(candidates)} documents of the folder, in tree order"
+        )
+        title = st.text_input("Title", value=os.path.basename(os.path.normpath(os.path.join(folder_path, folder))),
+                              key="book_title")
+        if st.button("📄 Build PDF", key="book_build", use_container_width=True):
+            files = [entry for entry in candidates if entry[0] in set(picked)] if picked else candidates
+            title = title or "Markdown export"
+            _start_export("book", f"{title}.pdf", book_job, files, title)
+            st.info("Building the PDF in the background; it appears under ✏️ Editor Controls when ready.")
 
 def render_markdown(content):
-    """Render markdown content with extensions for better formatting, incl. Mermaid."""
-    # Preprocess to convert Mermaid fences to raw HTML divs so Markdown won't escape them
-    content = _preprocess_mermaid(content)
-
-    md = markdown.Markdown(
-        extensions=[
-            'markdown.extensions.codehilite',
-            'markdown.extensions.fenced_code',
-            'markdown.extensions.tables',
-            'markdown.extensions.toc',
-            'markdown.extensions.nl2br',
-            'markdown.extensions.attr_list',
-            'markdown.extensions.def_list'
-        ],
-        extension_configs={
-            'markdown.extensions.codehilite': {
-                'css_class': 'highlight',
-                'use_pygments': True,
-                'guess_lang': True,
-                'noclasses': False
-            }
-        }
+    """Render markdown content with extensions for better formatting, incl. Mermaid.
+
+    Results are served from the content-addressed render cache, so unchanged
+    documents are not reconverted on reruns, in other sessions or for exports.
+    Large documents are converted in the shared worker pool, so they do not
+    stall other sessions.
+    """
+    return render_html(content)
+
+def render_markdown_for_viewer(content):
+    """Render markdown for the viewer, showing a notice instead of failing when the worker pool is saturated or timed out."""
+    try:
+        return render_markdown(content)
+    except (WorkerPoolBusy, JobTimeout) as e:
+        st.warning(f"⏳ This document could not be rendered right now ({e}). Reload to try again.")
+        return ""
+
+def render_markdown_preview(content):
+    """Render the editor preview block by block, reconverting only blocks that changed."""
+    if needs_full_render(content):
+        return render_markdown(content)
+    config = dict(get_render_engine().profile_config(), mermaid=True, block=True)
+    return render_incremental(
+        content,
+        _convert_markdown,
+        cache=get_render_cache(),
+        cache_key=lambda block: render_cache_key(block, config)
     )
-    return md.convert(content)
 
-class MarkdownToPDFConverter:
-    """Convert markdown to PDF using ReportLab"""
-    
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_styles()
-        
-    def _setup_styles(self):
-        """Setup custom styles for markdown elements"""
-        # Heading styles
-        self.styles.add(ParagraphStyle(
-            name='CustomH1',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=12,
-            spaceBefore=12
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomH2',
-            parent=self.styles['Heading2'],
-            fontSize=18,
-            textColor=colors.HexColor('#34495e'),
-            spaceAfter=10,
-            spaceBefore=10
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomH3',
-            parent=self.styles['Heading3'],
-            fontSize=14,
-            textColor=colors.HexColor('#34495e'),
-            spaceAfter=8,
-            spaceBefore=8
-        ))
-        
-        # Code block style
-        self.styles.add(ParagraphStyle(
-            name='CodeBlock',
-            parent=self.styles['Code'],
-            fontSize=9,
-            fontName='Courier',
-            backgroundColor=colors.HexColor('#f6f8fa'),
-            leftIndent=10,
-            rightIndent=10,
-            spaceAfter=10,
-            spaceBefore=10
-        ))
-        
-        # Regular paragraph
-        self.styles.add(ParagraphStyle(
-            name='CustomBody',
-            parent=self.styles['BodyText'],
-            fontSize=11,
-            leading=14,
-            textColor=colors.HexColor('#333333'),
-            spaceAfter=8
-        ))
-
-    def markdown_to_pdf_elements(self, markdown_text):
-        """Convert markdown text to ReportLab elements"""
-        elements = []
-        
-        # Split by lines for processing
-        lines = markdown_text.split('\n')
-        i = 0
-        
-        while i < len(lines):
-            line = lines[i]
-            
-            # Headers
-            if line.startswith('### '):
-                elements.append(Paragraph(line[4:], self.styles['CustomH3']))
-                elements.append(Spacer(1, 0.1*inch))
-            elif line.startswith('## '):
-                elements.append(Paragraph(line[3:], self.styles['CustomH2']))
-                elements.append(Spacer(1, 0.15*inch))
-            elif line.startswith('# '):
-                elements.append(Paragraph(line[2:], self.styles['CustomH1']))
-                elements.append(Spacer(1, 0.2*inch))
-            
-            # Code blocks
-            elif line.startswith('```'):
-                code_lines = []
-                i += 1
-                while i < len(lines) and not lines[i].startswith('```'):
-                    code_lines.append(lines[i])
-                    i += 1
-                if code_lines:
-                    code_text = '\n'.join(code_lines)
-                    # Use Preformatted for code blocks
-                    elements.append(Preformatted(code_text, self.styles['CodeBlock']))
-                    elements.append(Spacer(1, 0.1*inch))
-            
-            # Bullet points
-            elif line.strip().startswith('- ') or line.strip().startswith('* '):
-                bullet_text = line.strip()[2:]
-                elements.append(Paragraph(f"• {bullet_text}", self.styles['CustomBody']))
-            
-            # Numbered lists
-            elif re.match(r'^\d+\.\s', line.strip()):
-                elements.append(Paragraph(line.strip(), self.styles['CustomBody']))
-            
-            # Regular paragraphs
-            elif line.strip():
-                # Handle inline code
-                line = re.sub(r'`([^`]+)`', r'<font name="Courier">\1</font>', line)
-                # Handle bold
-                line = re.sub(r'\*\*([^*]+)\*\*', r'<b>\1</b>', line)
-                line = re.sub(r'__([^_]+)__', r'<b>\1</b>', line)
-                # Handle italic
-                line = re.sub(r'\*([^*]+)\*', r'<i>\1</i>', line)
-                line = re.sub(r'_([^_]+)_', r'<i>\1</i>', line)
-                
-                elements.append(Paragraph(line, self.styles['CustomBody']))
-            
-            # Empty lines
-            elif not line.strip():
-                elements.append(Spacer(1, 0.1*inch))
-            
-            i += 1
-        
-        return elements
+def _convert_markdown(content):
+    """Convert markdown to HTML (Mermaid fences become raw divs) with a pooled converter, without caching."""
+    return get_render_engine().convert(content)
 
-def export_to_pdf(markdown_content, output_filename):
-    """Export markdown content to PDF using ReportLab"""
+def export_to_pdf(markdown_content, file_name):
+    """Start exporting markdown content to PDF using ReportLab as a background export job.
+
+    The PDF is built in memory (in an export worker for large documents) and
+    shows up in the export panel (``render_export_jobs``) when it is ready;
+    an unchanged document is served from the export cache at once.
+    """
+    cache_key = pdf_export_key(markdown_content)
+    cached = get_export_cache().get(cache_key)
+    if cached is not None:
+        _add_export_record("pdf", file_name, data=cached)
+        return
     try:
-        # Create PDF document
-        doc = SimpleDocTemplate(
-            output_filename,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Convert markdown to PDF elements
-        converter = MarkdownToPDFConverter()
-        elements = converter.markdown_to_pdf_elements(markdown_content)
-        
-        # Build PDF
-        doc.build(elements)
-        return True
-        
-    except Exception as e:
-        st.error(f"Error generating PDF: {str(e)}")
+        # The viewer's cached render, so the PDF needs no second markdown parse
+        html_content = render_markdown(markdown_content)
+    except (WorkerPoolBusy, JobTimeout) as e:
+        st.warning(f"The document could not be rendered right now ({e}). Please try again in a moment.")
+        return
+    _start_export("pdf", file_name, pdf_job, html_content, size=len(html_content), cache_key=cache_key)
+
+def _add_export_record(kind, file_name, job_id=None, data=None, cache_key=None):
+    # A new export of the same file replaces its finished one
+    records = [
+        record for record in st.session_state.get('export_jobs', [])
+        if record["job_id"] is not None or record["file_name"] != file_name
+    ]
+    st.session_state.export_jobs = records
+    records.append({
+        "id": str(time.time_ns()), "kind": kind, "file_name": file_name,
+        "job_id": job_id, "data": data, "error": None, "cache_key": cache_key,
+    })
+
+def _start_export(kind, file_name, fn, *args, size=None, cache_key=None):
+    """Submit an export job and remember it in the session so a later rerun collects its result."""
+    try:
+        job_id = get_export_jobs().submit(fn, *args, label=file_name, size=size)
+    except WorkerPoolBusy:
+        st.warning("The server is busy with other exports. Please try again in a moment.")
+        return
+    _add_export_record(kind, file_name, job_id=job_id, cache_key=cache_key)
+
+def _collect_export(record):
+    """Move a finished job's result (or error) into its session record; return True while it runs."""
+    if record["job_id"] is None:
         return False
+    jobs = get_export_jobs()
+    job = jobs.get(record["job_id"])
+    if job is None:
+        record["error"] = "the export was lost (the server may have restarted)"
+    elif job.status in (QUEUED, RUNNING):
+        return True
+    elif job.status == DONE:
+        record["data"] = job.result()
+        if record["cache_key"]:
+            get_export_cache().put(record["cache_key"], record["data"])
+    elif job.status == FAILED:
+        record["error"] = str(job.error)
+    else:
+        record["error"] = "cancelled"
+    jobs.discard(record["job_id"])
+    record["job_id"] = None
+    return False
+
+def _cancel_export(record_id):
+    records = st.session_state.get('export_jobs', [])
+    for record in records:
+        if record["id"] == record_id and record["job_id"]:
+            get_export_jobs().discard(record["job_id"])
+    st.session_state.export_jobs = [record for record in records if record["id"] != record_id]
+
+def render_export_jobs():
+    """Render the session's exports: progress and Cancel while they run, Download once they finished.
+
+    A fragment polls running jobs, so a long export never blocks the viewer
+    or the editor; results are collected on whichever rerun sees them finished.
+    """
+    records = st.session_state.get('export_jobs')
+    if not records:
+        return
+    running = any([_collect_export(record) for record in records])
+    st.fragment(_export_jobs_fragment, run_every=EXPORT_JOB_POLL_SECONDS if running else None)(running)
+
+def _export_jobs_fragment(polling):
+    jobs = get_export_jobs()
+    running = False
+    for record in st.session_state.get('export_jobs', []):
+        name = record["file_name"]
+        if _collect_export(record):
+            running = True
+            done, total, stage = jobs.progress(record["job_id"]) or (0, 0, STAGE_WAITING)
+            col_progress, col_cancel = st.columns([4, 1])
+            with col_progress:
+                counts = f" ({done}/{total})" if total else ""
+                st.progress(done / total if total else 0.0, text=f"{name}: {STAGES[stage]}{counts}")
+            with col_cancel:
+                st.button("✖", key=f"export_cancel:{record['id']}", help="Cancel this export",
+                          on_click=_cancel_export, args=(record["id"],))
+            continue
+        col_result, col_dismiss = st.columns([4, 1])
+        with col_result:
+            if record["error"]:
+                st.error(f"{name}: {record['error']}")
+            else:
+                data = record["data"]
+                if record["kind"] == "book":
+                    data, summary = data
+                    st.caption(f"{summary.documents} document(s), {summary.pages} pages")
+                    for rel_path, error in summary.failed:
+                        st.warning(f"Left out {rel_path}: {error}")
+                st.download_button(label=f"⬇️ {name}", data=data, file_name=name, mime="application/pdf",
+                                   key=f"export_download:{record['id']}", use_container_width=True)
+        with col_dismiss:
+            st.button("🗑️", key=f"export_dismiss:{record['id']}", help="Remove from the list",
+                      on_click=_cancel_export, args=(record["id"],))
+    if polling and not running:
+        # All finished: one full rerun redraws the panel without the poll timer
+        st.rerun()
 
 def resolve_markdown_link(current_file_path, link_href):
     """Resolve a markdown link relative to the current file"""
@@ -584,6 +781,12 @@ def initialize_session_state():
         st.session_state.confirm_save = False
     if 'confirm_delete' not in st.session_state:
         st.session_state.confirm_delete = False
+
+    # Sidebar file tree state
+    if 'tree_expanded_dirs' not in st.session_state:
+        st.session_state.tree_expanded_dirs = set()
+    if 'tree_page_limits' not in st.session_state:
+        st.session_state.tree_page_limits = {}
     
     # AI summarization session state
     if 'ai_summary' not in st.session_state:
@@ -678,331 +881,238 @@ def check_unsaved_changes():
         return st.session_state.editor_content != st.session_state.original_content
     return False
 
+def read_selected_file(file_path):
+    """Read the open file, reusing the previous read while its mtime and size are unchanged."""
+    st_result = os.stat(file_path)
+    key = (file_path, st_result.st_mtime_ns, st_result.st_size)
+    cached = st.session_state.get('selected_file_cache')
+    if cached and cached[0] == key:
+        return cached[1]
+    with open(file_path, 'r', encoding='utf-8') as file:
+        content = file.read()
+    st.session_state.selected_file_cache = (key, content)
+    return content
+
+def _apply_editor_change(edited_content):
+    """Store new editor text, rerunning only when the unsaved-changes indicator must change."""
+    if edited_content == st.session_state.editor_content:
+        return
+    st.session_state.editor_content = edited_content
+    was_unsaved = st.session_state.get('has_unsaved_changes', False)
+    st.session_state.has_unsaved_changes = check_unsaved_changes()
+    # The preview further down already sees the new text, so a second full run is only
+    # needed to refresh the indicator drawn above the editor
+    if PREVIEW_DEBOUNCE_MS <= 0 or st.session_state.has_unsaved_changes != was_unsaved:
+        st.rerun()
+
+def render_editor(layout, selected_file_path):
+    """Render the editor in the chosen layout, with the live preview where the layout has one.
+
+    ``st_ace`` sends its text back after every pause in typing. The editor
+    runs as a fragment, so that only reruns the editor and the preview, not
+    the whole script with its file scan and file read. A full rerun happens
+    only when the unsaved-changes indicator flips or a slow preview finishes.
+    """
+    st.fragment(_editor_fragment)(layout, selected_file_path)
+
+def _editor_fragment(layout, selected_file_path):
+    if layout == "inline":
+        # Show only editor
+        st.subheader("✏️ Editing Mode")
+        render_editor_toolbar()
+        _editor_input('markdown_editor')
+    elif layout == "side-by-side":
+        # Show editor and preview side by side
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("✏️ Editor")
+            render_editor_toolbar()
+            _editor_input('markdown_editor_sidebyside')
+        with col2:
+            st.subheader("👁️ Live Preview")
+            # Use the HTML component so Mermaid and link handling work in preview
+            render_live_preview(selected_file_path)
+    elif layout == "tabbed":
+        # Show tabs for editor and preview
+        tab1, tab2 = st.tabs(["✏️ Editor", "👁️ Preview"])
+        with tab1:
+            render_editor_toolbar()
+            _editor_input('markdown_editor_tabbed')
+        with tab2:
+            render_live_preview(selected_file_path)
+
+def _editor_input(key):
+    edited_content = st_ace(
+        value=st.session_state.editor_content,
+        language='markdown',
+        theme='github',
+        key=key,
+        height=600,
+        auto_update=True,
+        font_size=14,
+        tab_size=2,
+        wrap=True,
+    )
+    # Update editor content and check for changes
+    _apply_editor_change(edited_content)
+
+def _get_preview_renderer(selected_file_path):
+    """Return this session's background preview renderer for the open file."""
+    path, renderer = st.session_state.get('preview_renderer') or (None, None)
+    if renderer is None or path != selected_file_path:
+        if renderer is not None:
+            renderer.stop()
+        # A new file starts without a stale preview from the previous one
+        renderer = PreviewRenderer(render_markdown_preview)
+        st.session_state.preview_renderer = (selected_file_path, renderer)
+    return renderer
+
+def render_live_preview(selected_file_path):
+    """Render the editor preview.
+
+    With debouncing enabled the text is handed to a worker thread and the last
+    completed preview is shown until the new one is ready. The editor fragment
+    waits a little past the debounce window, so ordinary renders show up in
+    the same fragment run; only slower ones are polled for, and their
+    completion costs one full rerun to stop the poll timer.
+    """
+    content = st.session_state.editor_content
+    if PREVIEW_DEBOUNCE_MS <= 0:
+        render_markdown_component(render_markdown_preview(content), selected_file_path)
+        return
+
+    renderer = _get_preview_renderer(selected_file_path)
+    renderer.submit(content)
+    html_content, pending = renderer.result(wait=PREVIEW_DEBOUNCE_MS / 1000 + PREVIEW_WAIT_SECONDS)
+    if html_content is None:
+        # First preview of this session: render it right away
+        renderer.render_now(content)
+        pending = False
+    poll_seconds = max(PREVIEW_DEBOUNCE_MS / 1000, 0.25)
+    st.fragment(_live_preview_fragment, run_every=poll_seconds if pending else None)(
+        selected_file_path, pending
+    )
+
+def _live_preview_fragment(selected_file_path, polling):
+    renderer = _get_preview_renderer(selected_file_path)
+    html_content, pending = renderer.result()
+    if renderer.error is not None:
+        st.warning(f"Preview failed: {renderer.error}")
+    if pending:
+        st.caption("⏳ Updating preview...")
+    render_markdown_component(html_content or "", selected_file_path)
+    if polling and not pending:
+        # Up to date: one full rerun redraws the fragment without the poll timer
+        st.rerun()
+
+def _go_to_large_document_page(state_key, page):
+    st.session_state[state_key] = page
+
+def render_large_document(selected_file_path):
+    """Show a very large file one section at a time, navigated by its outline.
+
+    The file is indexed once (heading offsets in a memory map) and only the
+    current page is read, rendered and sent, whatever the size of the file.
+    """
+    document = get_large_document(selected_file_path)
+    if not document.pages:
+        st.info("This file is empty.")
+        return
+    state_key = f"large_document_page:{selected_file_path}"
+    target = st.session_state.get('viewer_scroll_target')
+    if (target and target['path'] == selected_file_path
+            and target['nonce'] != st.session_state.get('large_document_jump')):
+        # A heading picked in "Go to heading": open the section that starts with it
+        st.session_state.large_document_jump = target['nonce']
+        for _, heading in document.find_headings(target['title'], len(document.headings)):
+            if heading.title == target['title']:
+                st.session_state[state_key] = heading.page
+                break
+    page = min(st.session_state.get(state_key, 0), len(document.pages) - 1)
+    current_heading = document.pages[page].heading
+
+    st.caption(
+        f"📚 Large document ({document.size / (1024 * 1024):.1f} MB, "
+        f"{len(document.headings)} headings): showing one section at a time"
+    )
+    outline_col, content_col = st.columns([1, 3])
+    with outline_col:
+        st.markdown("**Outline**")
+        query = st.text_input(
+            "Find heading",
+            key=f"large_document_find:{selected_file_path}",
+            placeholder="Filter headings...",
+            label_visibility="collapsed"
+        ).strip()
+        if query:
+            entries = document.find_headings(query, LARGE_DOCUMENT_OUTLINE_SIZE)
+            if not entries:
+                st.caption("No matching headings")
+        else:
+            entries = document.outline_window(page, LARGE_DOCUMENT_OUTLINE_SIZE)
+        for index, heading in entries:
+            # Em spaces survive in button labels where leading spaces are stripped
+            label = "\u2003" * (heading.level - 1) + heading.title
+            st.button(
+                label if len(label) <= 80 else label[:77] + "...",
+                key=f"large_document_heading:{index}",
+                on_click=_go_to_large_document_page,
+                args=(state_key, heading.page),
+                type="primary" if index == current_heading else "secondary",
+                use_container_width=True
+            )
+
+    with content_col:
+        prev_col, info_col, next_col = st.columns([1, 3, 1])
+        with prev_col:
+            st.button("◀ Previous", key="large_document_prev", disabled=page == 0,
+                      on_click=_go_to_large_document_page, args=(state_key, page - 1),
+                      use_container_width=True)
+        with info_col:
+            st.caption(f"Section {page + 1} of {len(document.pages)}: {document.page_title(page)}")
+        with next_col:
+            st.button("Next ▶", key="large_document_next", disabled=page == len(document.pages) - 1,
+                      on_click=_go_to_large_document_page, args=(state_key, page + 1),
+                      use_container_width=True)
+        render_markdown_component(render_markdown_for_viewer(document.page_text(page)), selected_file_path)
+
 def render_markdown_component(html_content, selected_file_path):
-    """Render the markdown HTML component"""
-    import streamlit.components.v1 as components
-    
+    """Render the markdown HTML component and return a newly clicked local link, if any"""
     # Get the base directory for resolving relative links
-    base_dir = os.path.dirname(selected_file_path)
-    
-    full_html = f'''
-<div style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;">
-    <style>
-        .markdown-content {{
-            line-height: 1.6;
-            font-size: 16px;
-            color: #333;
-        }}
-        .markdown-content h1, .markdown-content h2, .markdown-content h3 {{
-            margin-top: 1.5em;
-            margin-bottom: 0.5em;
-            color: #1f2937;
-        }}
-        .markdown-content pre {{
-            background-color: #f8f9fa;
-            border: 1px solid #e9ecef;
-            border-radius: 4px;
-            padding: 1rem;
-            overflow-x: auto;
-            margin: 1em 0;
-        }}
-        .markdown-content code {{
-            background-color: #f8f9fa;
-            padding: 0.2em 0.4em;
-            border-radius: 3px;
-            font-size: 0.9em;
-            font-family: 'Monaco', 'Consolas', 'Courier New', monospace;
-        }}
-        .markdown-content pre code {{
-            background: transparent;
-            padding: 0;
-        }}
-        .markdown-content table {{
-            border-collapse: collapse;
-            width: 100%;
-            margin: 1em 0;
-        }}
-        .markdown-content th, .markdown-content td {{
-            border: 1px solid #ddd;
-            padding: 8px 12px;
-            text-align: left;
-        }}
-        .markdown-content th {{
-            background-color: #f2f2f2;
-            font-weight: bold;
-        }}
-        .highlight {{
-            background-color: #f6f8fa;
-            border-radius: 6px;
-            margin: 1em 0;
-            border: 1px solid #d1d9e0;
-        }}
-        .highlight pre {{
-            margin: 0;
-            background: transparent;
-            border: none;
-        }}
-        
-        /* Syntax highlighting colors - GitHub style */
-        .highlight .k {{ color: #d73a49; font-weight: bold; }} /* Keywords */
-        .highlight .kd {{ color: #d73a49; font-weight: bold; }} /* Keyword declarations */
-        .highlight .kt {{ color: #d73a49; font-weight: bold; }} /* Keyword types */
-        .highlight .s {{ color: #032f62; }} /* Strings */
-        .highlight .s1 {{ color: #032f62; }} /* Single quoted strings */
-        .highlight .s2 {{ color: #032f62; }} /* Double quoted strings */
-        .highlight .sb {{ color: #032f62; }} /* Backtick strings */
-        .highlight .sc {{ color: #032f62; }} /* String chars */
-        .highlight .sd {{ color: #032f62; }} /* String docs */
-        .highlight .se {{ color: #032f62; }} /* String escapes */
-        .highlight .sh {{ color: #032f62; }} /* String heredoc */
-        .highlight .si {{ color: #032f62; }} /* String interpolated */
-        .highlight .sx {{ color: #032f62; }} /* String other */
-        .highlight .sr {{ color: #032f62; }} /* String regex */
-        .highlight .ss {{ color: #032f62; }} /* String symbol */
-        .highlight .c {{ color: #6a737d; font-style: italic; }} /* Comments */
-        .highlight .c1 {{ color: #6a737d; font-style: italic; }} /* Single line comments */
-        .highlight .cm {{ color: #6a737d; font-style: italic; }} /* Multi-line comments */
-        .highlight .cp {{ color: #6a737d; font-style: italic; }} /* Preprocessor comments */
-        .highlight .cs {{ color: #6a737d; font-style: italic; }} /* Comment special */
-        .highlight .n {{ color: #24292e; }} /* Names */
-        .highlight .na {{ color: #6f42c1; }} /* Name attributes */
-        .highlight .nb {{ color: #005cc5; }} /* Name builtins */
-        .highlight .nc {{ color: #6f42c1; }} /* Name class */
-        .highlight .nd {{ color: #6f42c1; }} /* Name decorator */
-        .highlight .ne {{ color: #6f42c1; }} /* Name exception */
-        .highlight .nf {{ color: #6f42c1; }} /* Name function */
-        .highlight .ni {{ color: #005cc5; }} /* Name entity */
-        .highlight .nl {{ color: #005cc5; }} /* Name label */
-        .highlight .nn {{ color: #6f42c1; }} /* Name namespace */
-        .highlight .no {{ color: #005cc5; }} /* Name constant */
-        .highlight .nt {{ color: #22863a; }} /* Name tag */
-        .highlight .nv {{ color: #e36209; }} /* Name variable */
-        .highlight .nx {{ color: #24292e; }} /* Name other */
-        .highlight .o {{ color: #d73a49; }} /* Operators */
-        .highlight .ow {{ color: #d73a49; }} /* Operator word */
-        .highlight .p {{ color: #24292e; }} /* Punctuation */
-        .highlight .m {{ color: #005cc5; }} /* Numbers */
-        .highlight .mf {{ color: #005cc5; }} /* Float */
-        .highlight .mh {{ color: #005cc5; }} /* Hex */
-        .highlight .mi {{ color: #005cc5; }} /* Integer */
-        .highlight .mo {{ color: #005cc5; }} /* Octal */
-        .highlight .mb {{ color: #005cc5; }} /* Binary */
-        .highlight .il {{ color: #005cc5; }} /* Integer long */
-        .highlight .err {{ color: #cb2431; background-color: #ffeef0; }} /* Errors */
-        .highlight .gh {{ color: #005cc5; font-weight: bold; }} /* Generic heading */
-        .highlight .gi {{ color: #22863a; background-color: #f0fff4; }} /* Generic inserted */
-        .highlight .gd {{ color: #cb2431; background-color: #ffeef0; }} /* Generic deleted */
-        .highlight .ge {{ font-style: italic; }} /* Generic emphasis */
-        .highlight .gr {{ color: #cb2431; }} /* Generic error */
-        .highlight .gs {{ font-weight: bold; }} /* Generic strong */
-        .highlight .gu {{ color: #6f42c1; font-weight: bold; }} /* Generic subheading */
-        .highlight .w {{ color: #24292e; }} /* Whitespace */
-        /* Ensure the content area aims to fill viewport minus 200px */
-        .markdown-content {{ min-height: calc(100vh - 200px); }}
-    </style>
-    <!-- Mermaid JS for diagrams -->
-    <script src="https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js"></script>
-    <script>
-        if (window.mermaid) {{
-            try {{
-                mermaid.initialize({{ startOnLoad: true, securityLevel: 'loose' }});
-            }} catch (e) {{
-                console.error('Mermaid init error', e);
-            }}
-        }}
-    </script>
-    <script>
-        // Debug function to log messages
-        function debugLog(message) {{
-            console.log('[Markdown Viewer Debug]', message);
-        }}
-
-        document.addEventListener('DOMContentLoaded', function() {{
-            debugLog('DOM loaded, setting up link listeners');
-            // Resize iframe so bottom gap is <= 200px
-            function setDesiredHeight() {{
-                try {{
-                    const contentH = Math.max(
-                        document.documentElement.scrollHeight,
-                        document.body ? document.body.scrollHeight : 0
-                    );
-                    const desired = Math.max(500, Math.max(contentH + 16, window.innerHeight - 200));
-                    if (window.frameElement) {{
-                        window.frameElement.style.height = desired + 'px';
-                        debugLog('Resized via frameElement to ' + desired);
-                    }} else if (window.Streamlit && typeof window.Streamlit.setFrameHeight === 'function') {{
-                        window.Streamlit.setFrameHeight(desired);
-                        debugLog('Resized via Streamlit.setFrameHeight to ' + desired);
-                    }} else {{
-                        window.parent.postMessage({{ type: 'streamlit:setFrameHeight', height: desired }}, '*');
-                        debugLog('Requested resize via postMessage to ' + desired);
-                    }}
-                }} catch (e) {{
-                    console.warn('Failed to request resize', e);
-                }}
-            }}
-            setDesiredHeight();
-            window.addEventListener('resize', setDesiredHeight);
-            // Observe DOM changes (e.g., Mermaid render) and adjust
-            try {{
-                const mo = new MutationObserver(function() {{ setDesiredHeight(); }});
-                mo.observe(document.body, {{ childList: true, subtree: true, attributes: true }});
-                setTimeout(setDesiredHeight, 400);
-                setTimeout(setDesiredHeight, 900);
-            }} catch (e) {{}}
-            // Initialize Mermaid on load (in case dynamic content)
-            try {{
-                if (window.mermaid) {{
-                    mermaid.init(undefined, document.querySelectorAll('.mermaid'));
-                }}
-            }} catch (e) {{
-                console.error('Mermaid run error', e);
-            }}
-            
-            // Intercept clicks on links
-            document.addEventListener('click', function(e) {{
-                debugLog('Click detected on:', e.target.tagName, e.target.href);
-                
-                if (e.target.tagName === 'A') {{
-                    const href = e.target.getAttribute('href');
-                    debugLog('Link href:', href);
-                    
-                    // Check if it's a local markdown file link
-                    if (href && !href.startsWith('http://') && !href.startsWith('https://') && !href.startsWith('#')) {{
-                        debugLog('Local link detected:', href);
-                        
-                        // Check if it's a markdown file
-                        if (href.toLowerCase().endsWith('.md') || href.toLowerCase().endsWith('.markdown')) {{
-                            debugLog('Markdown file link - preventing default and sending to Streamlit');
-                            e.preventDefault();
-                            
-                            // Try multiple communication methods
-                            const linkData = {{
-                                action: 'navigate_to_file',
-                                href: href,
-                                baseDir: '{base_dir.replace(os.sep, "/")}'
-                            }};
-                            
-                            // Method 1: Streamlit component communication
-                            try {{
-                                window.parent.postMessage({{
-                                    type: "streamlit:setComponentValue",
-                                    value: linkData
-                                }}, "*");
-                                debugLog('Sent via postMessage method 1');
-                            }} catch (e1) {{
-                                debugLog('Method 1 failed:', e1);
-                            }}
-                            
-                            // Method 2: Try different postMessage format
-                            try {{
-                                window.parent.postMessage(linkData, "*");
-                                debugLog('Sent via postMessage method 2');
-                            }} catch (e2) {{
-                                debugLog('Method 2 failed:', e2);
-                            }}
-                            
-                            // Method 3: Store in localStorage and trigger custom event
-                            try {{
-                                localStorage.setItem('markdown_navigation', JSON.stringify(linkData));
-                                window.dispatchEvent(new CustomEvent('markdown_link_clicked', {{ detail: linkData }}));
-                                debugLog('Stored in localStorage and triggered event');
-                            }} catch (e3) {{
-                                debugLog('Method 3 failed:', e3);
-                            }}
-                            
-                            // Method 4: URL navigation fallback
-                            setTimeout(function() {{
-                                try {{
-                                    // Resolve the full path
-                                    let targetPath = href;
-                                    if (!href.startsWith('/')) {{
-                                        targetPath = '{base_dir.replace(os.sep, "/").replace(os.sep, "/")}/' + href;
-                                    }}
-                                    
-                            // Navigate using URL parameters
-                                    const currentUrl = new URL(window.parent.location);
-                                    currentUrl.searchParams.set('navigate_to', targetPath.replace(/\\//g, '\\\\\\\\'));
-                                    window.parent.location.href = currentUrl.toString();
-                                    debugLog('Attempting URL navigation to:', targetPath);
-                                }} catch (e4) {{
-                                    debugLog('Method 4 failed:', e4);
-                                }}
-                            }}, 100);
-                        }} else {{
-                            debugLog('Not a markdown file:', href);
-                        }}
-                    }} else {{
-                        debugLog('External or anchor link, allowing default behavior:', href);
-                    }}
-                }}
-            }});
-            
-            debugLog('Link listener setup complete');
-        }});
-    </script>
-    <div class="markdown-content">
-        {html_content}
-    </div>
-</div>
-'''
-    
-    # Create an interactive component that can communicate back to Streamlit
-    # Increased height to prevent content cutoff at bottom
-    clicked_link = components.html(
-        full_html,
-        height=700,  # JS adjusts to viewport - 200px
-        scrolling=True
-    )
-    
+    base_dir = os.path.dirname(selected_file_path).replace(os.sep, "/")
+    target = st.session_state.get('viewer_scroll_target')
+    scroll_to = None
+    if target and target['path'] == selected_file_path:
+        scroll_to = {"anchor": target['anchor'], "nonce": target['nonce']}
+    clicked_link = markdown_viewer(html_content, base_dir, key="markdown_viewer", scroll_to=scroll_to)
+
+    # The component keeps returning its last value on later reruns; report each click once
+    if isinstance(clicked_link, dict):
+        if clicked_link.get('nonce') == st.session_state.get('handled_viewer_click'):
+            return None
+        st.session_state.handled_viewer_click = clicked_link.get('nonce')
     return clicked_link
 
-def build_printable_html_document(html_content: str, title: str = "Document") -> str:
+def build_printable_html_document(html_content: str, title: str = "Document", mermaid_src=None) -> str:
     """Build a standalone HTML page with Mermaid and print styles.
 
-    The page auto-renders Mermaid and triggers the browser print dialog.
+    The page renders Mermaid (from the vendored bundle when available) and
+    opens the browser print dialog once every diagram has rendered.
     """
-    full = f"""<!DOCTYPE html>
-<html>
-  <head>
-    <meta charset=\"utf-8\" />
-    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-    <title>{title}</title>
-    <style>
-      body {{ margin: 16px; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; color: #333; }}
-      .markdown-content {{ line-height: 1.6; font-size: 16px; }}
-      .markdown-content h1, .markdown-content h2, .markdown-content h3 {{ margin-top: 1.5em; margin-bottom: 0.5em; color: #1f2937; }}
-      .markdown-content pre {{ background-color: #f8f9fa; border: 1px solid #e9ecef; border-radius: 4px; padding: 1rem; overflow-x: auto; margin: 1em 0; }}
-      .markdown-content code {{ background-color: #f8f9fa; padding: 0.2em 0.4em; border-radius: 3px; font-size: 0.9em; font-family: 'Monaco', 'Consolas', 'Courier New', monospace; }}
-      .markdown-content pre code {{ background: transparent; padding: 0; }}
-      .markdown-content table {{ border-collapse: collapse; width: 100%; margin: 1em 0; }}
-      .markdown-content th, .markdown-content td {{ border: 1px solid #ddd; padding: 8px 12px; text-align: left; }}
-      .markdown-content th {{ background-color: #f2f2f2; font-weight: bold; }}
-      @media print {{
-        @page {{ margin: 16mm; }}
-        body {{ background: #fff; }}
-        a[href^=\"http\"]::after {{ content: \" (\" attr(href) \")\"; font-size: 0.85em; color: #666; }}
-        .no-print {{ display: none !important; }}
-        svg {{ break-inside: avoid; }}
-        pre, code, table, .mermaid {{ break-inside: avoid; }}
-      }}
-    </style>
-    <script src=\"https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js\"></script>
-    <script>
-      if (window.mermaid) {{
-        try {{ mermaid.initialize({{ startOnLoad: true, securityLevel: 'loose' }}); }} catch (e) {{ console.error('Mermaid init error', e); }}
-      }}
-      window.addEventListener('load', function() {{
-        try {{ if (window.mermaid) {{ mermaid.init(undefined, document.querySelectorAll('.mermaid')); }} }} catch (e) {{}}
-        setTimeout(function() {{ window.print(); }}, 800);
-      }});
-    </script>
-  </head>
-  <body>
-    <div class=\"markdown-content\">{html_content}</div>
-  </body>
- </html>"""
-    return full
+    return build_html_document(html_content, title, mermaid_src=mermaid_src or mermaid_script_url(),
+                               print_on_load=True)
+
+def printable_html_for(markdown_content, title, mermaid_src=None):
+    """Return the print view of markdown as UTF-8 bytes, from the export cache when unchanged.
+
+    The default Mermaid URL points at the bundle served by the app; pages
+    opened outside the app (downloads) pass ``MERMAID_CDN_URL`` instead.
+    """
+    mermaid_src = mermaid_src or mermaid_script_url()
+    return get_export_cache().get_or_render(
+        printable_html_key(markdown_content, title, mermaid_src),
+        lambda: build_printable_html_document(render_markdown(markdown_content), title, mermaid_src).encode('utf-8')
+    )
 
 def render_editor_toolbar():
     """Render the editor toolbar with formatting buttons"""
@@ -1073,6 +1183,12 @@ def main():
     
     /* Ensure app body can extend closer to viewport bottom */
     main .block-container { min-height: calc(100vh - 200px); }
+
+    /* Left-align file tree entries so nesting is visible */
+    [class*="st-key-tree_"] button, [class*="st-key-tree_"] button > div {
+        justify-content: flex-start !important;
+        text-align: left;
+    }
     </style>
     """, unsafe_allow_html=True)
     
@@ -1101,6 +1217,10 @@ def main():
         # Alternative: Browse local files (folder path input)
         st.subheader("Or browse local folder")
         if st.button("🔄 Refresh", help="Refresh file list", use_container_width=True):
+            # Force a rescan in case the watcher missed something (e.g. network drives)
+            refresh_folder = st.session_state.get('last_folder_path', '')
+            if refresh_folder and os.path.isdir(refresh_folder):
+                find_markdown_files(refresh_folder, get_ignore_patterns(), ignore_root=get_ignore_root())
             st.rerun()
         
         # Initialize folder path with persistent storage using query params
@@ -1138,19 +1258,30 @@ def main():
                 st.query_params.update({"folder": folder_path})
         
         if os.path.exists(folder_path) and os.path.isdir(folder_path):
-            # Find markdown files
-            markdown_files = find_markdown_files(folder_path)
+            # Find markdown files (tree is cached until the file index changes)
+            markdown_files, file_tree = get_file_tree(folder_path)
             
             if markdown_files:
+                # Fuzzy path lookup and full-text search across the folder
+                quick_open_hit = render_quick_open(
+                    folder_path, markdown_files, st.session_state.file_tree_key[1]
+                )
+                search_hit = render_search_panel(folder_path, markdown_files)
+                heading_hit = render_heading_search(folder_path, markdown_files)
+
                 st.write(f"📄 Found {len(markdown_files)} files:")
                 
-                # Tree view instead of flat list
-                file_tree = _build_file_tree(markdown_files)
-                selected_file = _render_file_tree_v2(
+                # Lazy tree view: only expanded directories are rendered
+                if st.session_state.get('tree_root') != folder_path:
+                    st.session_state.tree_root = folder_path
+                    st.session_state.tree_expanded_dirs = set()
+                    st.session_state.tree_page_limits = {}
+                    st.session_state.tree_revealed_file = None
+                _reveal_in_file_tree(folder_path, st.session_state.get('selected_file'))
+                selected_file = _render_lazy_file_tree(
                     file_tree,
-                    selected_full_path=st.session_state.get('selected_file'),
-                    base=""
-                )
+                    selected_full_path=st.session_state.get('selected_file')
+                ) or quick_open_hit or search_hit or heading_hit
                 if selected_file:
                     st.session_state.file_name = os.path.basename(selected_file)
                     st.session_state.last_selected_file = selected_file  # Remember for refresh
@@ -1159,6 +1290,7 @@ def main():
                 if selected_file:
                     # Reset AI summary when selecting new file
                     if selected_file != st.session_state.get('selected_file'):
+                        save_recent_file(selected_file)
                         st.session_state.ai_summary = ""
                         st.session_state.ai_last_template_used = ""
                         st.session_state.ai_summary_tokens = None
@@ -1172,6 +1304,9 @@ def main():
                       'selected_file' not in st.session_state):
                     st.session_state.selected_file = st.session_state.last_selected_file
                     st.session_state.file_name = os.path.basename(st.session_state.last_selected_file)
+
+                render_document_outline(st.session_state.get('selected_file'))
+                render_book_export(folder_path, markdown_files)
             else:
                 st.info("No markdown files found in this folder")
         elif folder_path:
@@ -1329,15 +1464,7 @@ def main():
                             with open(selected_file, 'r', encoding='utf-8') as f:
                                 content = f.read()
                             base_name = os.path.splitext(os.path.basename(selected_file))[0]
-                        pdf_filename = f"{base_name}.pdf"
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                            tmp_filename = tmp_file.name
-                        if export_to_pdf(content, tmp_filename):
-                            with open(tmp_filename, 'rb') as pdf_file:
-                                pdf_data = pdf_file.read()
-                            os.unlink(tmp_filename)
-                            st.download_button(label="⬇️ Download PDF", data=pdf_data, file_name=pdf_filename, mime="application/pdf", use_container_width=True)
-                            st.success("PDF ready.")
+                        export_to_pdf(content, f"{base_name}.pdf")
                     except Exception as e:
                         st.error(f"Error exporting to PDF: {str(e)}")
             with c3:
@@ -1350,8 +1477,7 @@ def main():
                             with open(selected_file, 'r', encoding='utf-8') as f:
                                 content = f.read()
                             base_name = os.path.splitext(os.path.basename(selected_file))[0]
-                        html_content = render_markdown(content)
-                        full_html = build_printable_html_document(html_content, title=base_name)
+                        full_html = printable_html_for(content, base_name).decode('utf-8')
                         import streamlit.components.v1 as components
                         components.html(full_html, height=900, scrolling=True)
                         st.info("Use browser dialog to Save as PDF.")
@@ -1374,6 +1500,9 @@ def main():
                     st.session_state.confirm_delete = True
                     st.rerun()
 
+            # Exports of this session: running with progress, or ready to download
+            render_export_jobs()
+
             # Overwrite when editing
             if file_selected and st.session_state.edit_mode and unsaved:
                 if not st.session_state.get('confirm_save', False):
@@ -1463,28 +1592,8 @@ def main():
                         base_name = os.path.splitext(os.path.basename(st.session_state.selected_file))[0]
                         pdf_filename = f"{base_name}.pdf"
                         
-                        # Create a temporary file for the PDF
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                            tmp_filename = tmp_file.name
-                        
-                        # Export to PDF
-                        if export_to_pdf(content, tmp_filename):
-                            # Read the PDF file
-                            with open(tmp_filename, 'rb') as pdf_file:
-                                pdf_data = pdf_file.read()
-                            
-                            # Clean up temp file
-                            os.unlink(tmp_filename)
-                            
-                            # Offer download
-                            st.download_button(
-                                label="⬇️ Download PDF",
-                                data=pdf_data,
-                                file_name=pdf_filename,
-                                mime="application/pdf",
-                                use_container_width=True
-                            )
-                            st.success(f"✅ PDF generated successfully!")
+                        # Export to PDF in the background; the export panel offers the download
+                        export_to_pdf(content, pdf_filename)
                     except Exception as e:
                         st.error(f"❌ Error exporting to PDF: {str(e)}")
             
@@ -1497,8 +1606,7 @@ def main():
                             with open(st.session_state.selected_file, 'r', encoding='utf-8') as f:
                                 content = f.read()
                             base_name = os.path.splitext(os.path.basename(st.session_state.selected_file))[0]
-                            html_content = render_markdown(content)
-                            full_html = build_printable_html_document(html_content, title=base_name)
+                            full_html = printable_html_for(content, base_name).decode('utf-8')
                             import streamlit.components.v1 as components
                             components.html(full_html, height=900, scrolling=True)
                             st.info("Browser print dialog should appear; choose 'Save as PDF'.")
@@ -1509,11 +1617,10 @@ def main():
                         with open(st.session_state.selected_file, 'r', encoding='utf-8') as f:
                             content_for_dl = f.read()
                         base_name = os.path.splitext(os.path.basename(st.session_state.selected_file))[0]
-                        html_content_for_dl = render_markdown(content_for_dl)
-                        full_html_dl = build_printable_html_document(html_content_for_dl, title=base_name)
                         st.download_button(
                             label="⬇️ Download Print-Ready HTML",
-                            data=full_html_dl.encode('utf-8'),
+                            # The app-relative bundle URL resolves to nothing in a saved file
+                            data=printable_html_for(content_for_dl, base_name, MERMAID_CDN_URL),
                             file_name=f"{base_name}.print.html",
                             mime="text/html",
                             use_container_width=True
@@ -1832,10 +1939,17 @@ def main():
         if not file_name.endswith('.tmp'):
             st.caption(f"Path: {selected_file_path}")
         
+        if not st.session_state.edit_mode and is_large_document(selected_file_path):
+            # Paged by section instead of read and rendered whole
+            try:
+                render_large_document(selected_file_path)
+            except Exception as e:
+                st.error(f"Error reading file: {str(e)}")
+            return
+
         # Read and render markdown content
         try:
-            with open(selected_file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+            content = read_selected_file(selected_file_path)
             
             # Store original content for comparison
             if not st.session_state.edit_mode or st.session_state.original_content == "":
@@ -1846,94 +1960,11 @@ def main():
             if content.strip():
                 # Handle different layouts based on edit mode
                 if st.session_state.edit_mode:
-                    if st.session_state.editor_layout == "inline":
-                        # Show only editor
-                        st.subheader("✏️ Editing Mode")
-                        render_editor_toolbar()
-                        
-                        # Editor component
-                        edited_content = st_ace(
-                            value=st.session_state.editor_content,
-                            language='markdown',
-                            theme='github',
-                            key='markdown_editor',
-                            height=600,
-                            auto_update=True,
-                            font_size=14,
-                            tab_size=2,
-                            wrap=True,
-                            annotations=None,
-                            markers=None,
-                        )
-                        
-                        # Update editor content and check for changes
-                        if edited_content != st.session_state.editor_content:
-                            st.session_state.editor_content = edited_content
-                            st.session_state.has_unsaved_changes = check_unsaved_changes()
-                            st.rerun()
-                    
-                    elif st.session_state.editor_layout == "side-by-side":
-                        # Show editor and preview side by side
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.subheader("✏️ Editor")
-                            render_editor_toolbar()
-                            
-                            edited_content = st_ace(
-                                value=st.session_state.editor_content,
-                                language='markdown',
-                                theme='github',
-                                key='markdown_editor_sidebyside',
-                                height=600,
-                                auto_update=True,
-                                font_size=14,
-                                tab_size=2,
-                                wrap=True
-                            )
-                            
-                            if edited_content != st.session_state.editor_content:
-                                st.session_state.editor_content = edited_content
-                                st.session_state.has_unsaved_changes = check_unsaved_changes()
-                                st.rerun()
-                        
-                        with col2:
-                            st.subheader("👁️ Live Preview")
-                            preview_content = render_markdown(st.session_state.editor_content)
-                            # Use the HTML component so Mermaid and link handling work in preview
-                            _ = render_markdown_component(preview_content, selected_file_path)
-                    
-                    elif st.session_state.editor_layout == "tabbed":
-                        # Show tabs for editor and preview
-                        tab1, tab2 = st.tabs(["✏️ Editor", "👁️ Preview"])
-                        
-                        with tab1:
-                            render_editor_toolbar()
-                            
-                            edited_content = st_ace(
-                                value=st.session_state.editor_content,
-                                language='markdown',
-                                theme='github',
-                                key='markdown_editor_tabbed',
-                                height=600,
-                                auto_update=True,
-                                font_size=14,
-                                tab_size=2,
-                                wrap=True
-                            )
-                            
-                            if edited_content != st.session_state.editor_content:
-                                st.session_state.editor_content = edited_content
-                                st.session_state.has_unsaved_changes = check_unsaved_changes()
-                                st.rerun()
-                        
-                        with tab2:
-                            preview_content = render_markdown(st.session_state.editor_content)
-                            _ = render_markdown_component(preview_content, selected_file_path)
+                    render_editor(st.session_state.editor_layout, selected_file_path)
                 
                 else:
                     # View mode - show rendered markdown with AI summary layouts
-                    html_content = render_markdown(content)
+                    html_content = render_markdown_for_viewer(content)
                     
                     # Check if we need to display in special layout with AI summary
                     has_summary = (st.session_state.ai_summary and 
@@ -34,6 +34,9 @@ def push_to_azure(connection_string, project_root, doc_folder):
                 local_path = os.path.join(root, file_name)
                 # Create a blob path that preserves the relative structure
                 relative_path = os.path.relpath(local_path, doc_folder)
+                # The local file index is machine specific, never upload it
+                if relative_path.startswith(os.path.join(".fyiai", "index") + os.sep):
+                    continue
                 # Azure blob storage uses forward slashes
                 blob_path = relative_path.replace(os.sep, '/')
 
@@ -3,13 +3,91 @@
 Command-line interface for Markdown Manager.
 """
 
+import argparse
 import sys
 import subprocess
 from pathlib import Path
 
 
+def export(argv):
+    """Export a folder of markdown files to a static HTML site."""
+    # The app's modules import each other by their flat names
+    sys.path.insert(0, str(Path(__file__).parent))
+    from file_scanner import load_ignore_patterns
+    from site_export import SITE_EXPORT_WORKERS, export_site
+
+    parser = argparse.ArgumentParser(prog="markdown-manager export", description=export.__doc__)
+    parser.add_argument("source", help="folder containing the markdown files")
+    parser.add_argument("output", help="folder to write the HTML pages to")
+    parser.add_argument("--workers", type=int, default=SITE_EXPORT_WORKERS,
+                        help=f"render processes (default: {SITE_EXPORT_WORKERS})")
+    parser.add_argument("--force", action="store_true", help="render every page, not only changed ones")
+    parser.add_argument("--project-root", help="project folder whose sync config lists ignore patterns (default: source)")
+    args = parser.parse_args(argv)
+
+    ignore_root = args.project_root or args.source
+    ignore_patterns = load_ignore_patterns(ignore_root)
+
+    def progress(done, total, rel_path):
+        print(f"   [{done}/{total}] {rel_path}")
+
+    print(f"📦 Exporting {args.source} to {args.output}...")
+    summary = export_site(args.source, args.output, ignore_patterns, workers=args.workers,
+                          force=args.force, progress=progress, ignore_root=ignore_root)
+    print(f"✅ {summary.rendered} rendered, {summary.skipped} unchanged, {summary.removed} removed")
+    for rel_path, error in summary.failed:
+        print(f"❌ {rel_path}: {error}")
+    return 1 if summary.failed else 0
+
+
+def book(argv):
+    """Merge the markdown files of a folder into one PDF with a table of contents."""
+    # The app's modules import each other by their flat names
+    sys.path.insert(0, str(Path(__file__).parent))
+    from fnmatch import fnmatch
+
+    from file_index import get_file_index
+    from file_scanner import load_ignore_patterns
+    from pdf_book import PDF_BOOK_WORKERS, build_book
+
+    parser = argparse.ArgumentParser(prog="markdown-manager book", description=book.__doc__)
+    parser.add_argument("source", help="folder containing the markdown files")
+    parser.add_argument("output", help="PDF file to write")
+    parser.add_argument("--title", help="title of the book (default: the folder name)")
+    parser.add_argument("--include", action="append", metavar="PATTERN",
+                        help="only files whose relative path matches this glob; may be repeated")
+    parser.add_argument("--workers", type=int, default=PDF_BOOK_WORKERS,
+                        help=f"conversion processes (default: {PDF_BOOK_WORKERS})")
+    parser.add_argument("--project-root", help="project folder whose sync config lists ignore patterns (default: source)")
+    args = parser.parse_args(argv)
+
+    ignore_root = args.project_root or args.source
+    ignore_patterns = load_ignore_patterns(ignore_root)
+    files = get_file_index(args.source, ignore_patterns, ignore_root).refresh()
+    if args.include:
+        files = [entry for entry in files if any(fnmatch(entry[0], pattern) for pattern in args.include)]
+    if not files:
+        print(f"❌ No markdown files found in {args.source}")
+        return 1
+
+    def progress(done, total, rel_path):
+        print(f"   [{done}/{total}] {rel_path}")
+
+    title = args.title or Path(args.source).resolve().name
+    print(f"📚 Merging {len(files)} files from {args.source} into {args.output}...")
+    summary = build_book(files, args.output, title, workers=args.workers, progress=progress)
+    print(f"✅ {summary.documents} documents, {summary.pages} pages")
+    for rel_path, error in summary.failed:
+        print(f"❌ {rel_path}: {error}")
+    return 1 if summary.failed else 0
+
+
 def main():
     """Main entry point for the CLI."""
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        sys.exit(export(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "book":
+        sys.exit(book(sys.argv[2:]))
     try:
         # Get the path to the app module
         app_path = Path(__file__).parent / "app.py"
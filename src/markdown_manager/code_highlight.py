@@ -0,0 +1,204 @@
+"""
+Memoized syntax highlighting for code blocks.
+
+With ``guess_lang`` enabled, codehilite asks Pygments to try every lexer on
+each unlabeled code block on every render, which dominates the render time of
+code-heavy documents. ``highlight_code`` replaces that: languages of
+unlabeled blocks come from a cheap heuristic detector (falling back to
+Pygments' guess only when the heuristics are unsure), and highlighted HTML is
+memoized by (code hash, language, highlighter options), so identical snippets
+are highlighted once per process across documents, sessions and reruns.
+
+Fenced blocks reach it through ``fence_scanner``; ``CachedHighlightExtension``
+routes indented code blocks through it. Add the extension after
+``codehilite``, whose configuration it reuses.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+from markdown.extensions import Extension
+from markdown.extensions.codehilite import CodeHilite, HiliteTreeprocessor
+from pygments.lexers import guess_lexer
+from pygments.util import ClassNotFound
+
+HIGHLIGHT_CACHE_ENTRIES = 4096
+
+
+class _LRU:
+    """Small thread-safe LRU mapping."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_highlight_cache = _LRU(HIGHLIGHT_CACHE_ENTRIES)
+_language_cache = _LRU(HIGHLIGHT_CACHE_ENTRIES)
+
+
+def _digest(code):
+    return hashlib.sha1(code.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+# (language, pattern, weight); the best total score wins
+_LANGUAGE_HINTS = [
+    ("python", r"^[ \t]*(def|class)\s+\w+.*:\s*$", 3),
+    ("python", r"^[ \t]*(from\s+[\w.]+\s+)?import\s+[\w.]+", 2),
+    ("python", r"\b(self|elif|None|True|False)\b|print\(", 1),
+    ("javascript", r"\b(const|let|var)\s+\w+\s*=|=>|\bfunction\s*\w*\s*\(", 2),
+    ("javascript", r"console\.\w+\(|\brequire\(|\bexport\s+(default|const|function)", 2),
+    ("typescript", r"^[ \t]*(interface|type)\s+\w+\s*[={]|:\s*(string|number|boolean)\b", 3),
+    ("go", r"^package\s+\w+\s*$|^func\s+(\(\w+\s+\*?\w+\)\s*)?\w+\(|:=", 3),
+    ("java", r"\bSystem\.out\.print|^import\s+java\.|\bpublic\s+static\s+void\s+main\b", 4),
+    ("csharp", r"^using\s+System|\bnamespace\s+[\w.]+|\bConsole\.Write", 4),
+    ("sql", r"(?i)^[ \t]*(SELECT\s.+\sFROM|INSERT\s+INTO|UPDATE\s+\w+\s+SET|DELETE\s+FROM|CREATE\s+(TABLE|INDEX|VIEW)|ALTER\s+TABLE)\b", 4),
+    ("bash", r"^[ \t]*(\$\s+)?(sudo|pip3?|npm|npx|yarn|git|cd|ls|echo|export|curl|wget|docker|kubectl|make|apt(-get)?|brew|python3?|chmod|mkdir|source)\s", 2),
+    ("bash", r"^#!/(usr/)?bin/(env\s+)?(ba|z)?sh", 5),
+    ("powershell", r"\b(Get|Set|New|Remove|Invoke|Write)-[A-Z]\w+|^[ \t]*\$\w+\s*=|-ExecutionPolicy\b", 3),
+    ("docker", r"^FROM\s+\S+|^(RUN|COPY|ENTRYPOINT|CMD|WORKDIR|EXPOSE)\s", 3),
+    ("css", r"^[ \t]*[.#]?[\w-]+(\s*[,>+~]\s*[.#]?[\w-]+)*\s*\{|^[ \t]*[\w-]+[ \t]*:[ \t]*[^;\n]+;[ \t]*$", 2),
+    ("yaml", r"^[ \t]*(-[ \t]+)?[\w.-]+:([ \t]+[^{}\[\];\n]*)?$", 1),
+    ("ini", r"^[ \t]*\[[\w. -]+\][ \t]*$", 2),
+]
+_COMPILED_HINTS = [(lang, re.compile(pattern, re.MULTILINE), weight) for lang, pattern, weight in _LANGUAGE_HINTS]
+# Scores below this are not trusted and fall back to Pygments' guess
+_MIN_SCORE = 3
+
+
+def _guess_with_heuristics(code):
+    stripped = code.strip()
+    if not stripped:
+        return "text"
+    if stripped[0] in "{[":
+        try:
+            json.loads(stripped)
+            return "json"
+        except ValueError:
+            pass
+    if stripped.startswith("<?xml"):
+        return "xml"
+    if stripped.startswith("<"):
+        return "html"
+    if stripped.startswith("#!"):
+        first = stripped.split("\n", 1)[0]
+        for name, alias in (("python", "python"), ("node", "javascript"), ("pwsh", "powershell")):
+            if name in first:
+                return alias
+
+    scores = {}
+    for lang, pattern, weight in _COMPILED_HINTS:
+        hits = len(pattern.findall(code))
+        if hits:
+            scores[lang] = scores.get(lang, 0) + weight * min(hits, 5)
+    # TypeScript hints are only meaningful on top of JavaScript ones
+    if "typescript" in scores:
+        scores["typescript"] += scores.pop("javascript", 0)
+    if not scores:
+        return None
+    lang, score = max(scores.items(), key=lambda item: item[1])
+    return lang if score >= _MIN_SCORE else None
+
+
+def detect_language(code):
+    """Return a Pygments alias for ``code``, memoized by content hash.
+
+    Cheap regex heuristics decide first; Pygments' (slow) lexer guessing is only
+    used when they are inconclusive, and its answer is memoized too.
+    """
+    key = _digest(code)
+    lang = _language_cache.get(key)
+    if lang is None:
+        lang = _guess_with_heuristics(code)
+        if lang is None:
+            try:
+                lang = guess_lexer(code).aliases[0]
+            except (ClassNotFound, IndexError):
+                lang = "text"
+        _language_cache.put(key, lang)
+    return lang
+
+
+def highlight_code(code, lang, config, shebang=False):
+    """Return codehilite's HTML for ``code``, memoized by (code hash, language, options).
+
+    ``config`` is codehilite's configuration (including ``pygments_style``).
+    Unlabeled code gets its language from ``detect_language`` when
+    ``guess_lang`` is on.
+    """
+    local_config = dict(config)
+    src = code.strip("\n")
+    has_header = shebang and src.lstrip().startswith(("#!", ":::"))
+    if lang is None and local_config.get("guess_lang") and not has_header:
+        lang = detect_language(src)
+        local_config["guess_lang"] = False
+
+    key = (_digest(code), lang, shebang, tuple(sorted((k, repr(v)) for k, v in local_config.items())))
+    html = _highlight_cache.get(key)
+    if html is None:
+        style = local_config.pop("pygments_style", "default")
+        html = CodeHilite(code, lang=lang, style=style, **local_config).hilite(shebang=shebang)
+        _highlight_cache.put(key, html)
+    return html
+
+
+def clear_highlight_caches():
+    _highlight_cache.clear()
+    _language_cache.clear()
+
+
+class CachedHiliteTreeprocessor(HiliteTreeprocessor):
+    """codehilite's tree processor for indented code, backed by the memoized highlighter."""
+
+    def run(self, root):
+        for block in root.iter('pre'):
+            if len(block) == 1 and block[0].tag == 'code':
+                text = block[0].text
+                if text is None:
+                    continue
+                config = dict(self.config, tab_length=self.md.tab_length)
+                html = highlight_code(self.code_unescape(text), None, config, shebang=True)
+                placeholder = self.md.htmlStash.store(html)
+                block.clear()
+                block.tag = 'p'
+                block.text = placeholder
+
+
+class CachedHighlightExtension(Extension):
+    """Route codehilite's indented code highlighting through the memoized highlighter."""
+
+    def extendMarkdown(self, md):
+        if 'hilite' in md.treeprocessors:
+            hiliter = CachedHiliteTreeprocessor(md)
+            hiliter.config = md.treeprocessors['hilite'].config
+            md.treeprocessors.register(hiliter, 'hilite', 30)
+        md.registerExtension(self)
+
+
+def makeExtension(**kwargs):
+    return CachedHighlightExtension(**kwargs)
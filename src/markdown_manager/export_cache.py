@@ -0,0 +1,82 @@
+"""
+Content-addressed cache for export artifacts: PDFs and printable HTML pages.
+
+Exporting an unchanged document used to rebuild its PDF from scratch. Export
+artifacts are keyed like rendered HTML (``render_cache_key``): by the
+markdown source, the renderer configuration and library versions, plus what
+shapes the artifact, i.e. the PDF converter version, ReportLab version and
+page size, or the page template version, title and Mermaid URL of a print
+view. A byte-bounded in-memory LRU serves repeat exports of a process; the
+directory tier (``EXPORT_CACHE_DIR``, by default ``exports/`` inside
+``RENDER_CACHE_DIR``) is shared by restarts and by replicas on the same
+volume, and pruned to ``EXPORT_CACHE_DISK_MAX_BYTES``.
+"""
+
+import os
+import threading
+
+import reportlab
+
+from html_document import DOCUMENT_TEMPLATE_VERSION
+from pdf_export import CONVERTER_VERSION, PAGE_SIZE
+from render_cache import RENDER_CACHE_DIR, RenderCache, render_cache_key
+from render_engine import get_render_engine
+
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Unset (and no RENDER_CACHE_DIR) keeps exports in memory only
+EXPORT_CACHE_DIR = os.getenv(
+    "EXPORT_CACHE_DIR", os.path.join(RENDER_CACHE_DIR, "exports") if RENDER_CACHE_DIR else ""
+)
+EXPORT_CACHE_DISK_MAX_BYTES = int(os.getenv("EXPORT_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+
+class ExportCache(RenderCache):
+    """``RenderCache`` of export artifacts, stored as bytes."""
+
+    suffix = ".export"
+
+    @staticmethod
+    def _encode(data):
+        return data
+
+    @staticmethod
+    def _decode(data):
+        return data
+
+
+def pdf_export_key(markdown_content):
+    """Return the cache key of the PDF export of ``markdown_content``."""
+    config = {
+        "export": "pdf",
+        "converter": CONVERTER_VERSION,
+        "reportlab": reportlab.Version,
+        "page_size": list(PAGE_SIZE),
+        "renderer": get_render_engine().profile_config(),
+    }
+    return render_cache_key(markdown_content, config)
+
+
+def printable_html_key(markdown_content, title, mermaid_src):
+    """Return the cache key of the print view of ``markdown_content``."""
+    config = {
+        "export": "print",
+        "template": DOCUMENT_TEMPLATE_VERSION,
+        "title": title,
+        "mermaid_src": mermaid_src,
+        "renderer": get_render_engine().profile_config(),
+    }
+    return render_cache_key(markdown_content, config)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_export_cache():
+    """Return the process-wide ExportCache, shared by all sessions."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExportCache(EXPORT_CACHE_MAX_BYTES, disk_dir=EXPORT_CACHE_DIR or None,
+                                 disk_max_bytes=EXPORT_CACHE_DISK_MAX_BYTES)
+        return _cache
@@ -0,0 +1,379 @@
+"""
+Background export jobs with progress and cancellation.
+
+PDF exports used to run inside the Streamlit script run, which froze the
+session until the PDF was built. ``ExportJobQueue`` runs them in its own
+pool of worker processes instead: the app submits a job and carries on
+rendering the viewer and editor, and a fragment polls the job until its
+result is collected on a later rerun.
+
+- A job function is a module-level function taking a
+  ``progress(done, total, stage)`` callback followed by its own arguments;
+  ``stage`` is an index into ``STAGES``.
+- Every queued or running job holds one of ``EXPORT_JOB_QUEUE_LIMIT`` slots
+  in shared memory. Workers write the job's progress to its slot, and every
+  progress report checks the slot's cancel flag and raises ``JobCancelled``
+  once it is set. Jobs still waiting for a worker are cancelled outright.
+  Submitting more jobs than there are slots raises ``WorkerPoolBusy``.
+- A job still running ``EXPORT_JOB_TIMEOUT`` seconds after it started, or
+  a few seconds after its cancellation, is taken for stuck outside its
+  progress reports: the queue kills the pool's processes, like
+  ``WorkerPool`` does, and moves the pool's other jobs to a fresh pool. The stuck job
+  fails with ``JobTimeout`` or ends cancelled.
+- Jobs with less input than ``RENDER_INLINE_MAX_BYTES`` run in the calling
+  thread; they finish before ``submit`` returns. ``EXPORT_JOB_WORKERS=0``
+  runs every job inline.
+- Finished jobs keep their result until the session collects it with
+  ``discard`` or ``EXPORT_JOB_RESULT_TTL`` seconds have passed. A watchdog
+  thread enforces deadlines and drops expired results every
+  ``EXPORT_JOB_POLL_SECONDS``, so results of abandoned sessions go even
+  when nobody submits another job.
+
+Workers are started with ``spawn``, like those of ``worker_pool``. Book jobs
+of more than ``PDF_BOOK_INLINE_MAX_BYTES`` start up to ``PDF_BOOK_WORKERS``
+conversion processes inside the worker for the duration of the book.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from pdf_book import build_book_bytes
+from pdf_export import html_to_pdf_bytes
+from worker_pool import RENDER_INLINE_MAX_BYTES, JobTimeout, WorkerPoolBusy
+
+# Worker processes for export jobs; 0 runs every job in the calling thread
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))
+# Jobs queued or running at once before new ones are refused
+EXPORT_JOB_QUEUE_LIMIT = int(os.getenv("EXPORT_JOB_QUEUE_LIMIT", "16"))
+# How often the app polls running jobs for progress (seconds)
+EXPORT_JOB_POLL_SECONDS = float(os.getenv("EXPORT_JOB_POLL_SECONDS", "1"))
+# Seconds a finished job keeps its result for a session to collect
+EXPORT_JOB_RESULT_TTL = float(os.getenv("EXPORT_JOB_RESULT_TTL", "600"))
+# Seconds a job may run in a worker before its pool is restarted
+EXPORT_JOB_TIMEOUT = float(os.getenv("EXPORT_JOB_TIMEOUT", "900"))
+# Seconds a cancelled job may keep running before its pool is restarted
+CANCEL_GRACE_SECONDS = 5
+
+STAGE_WAITING, STAGE_CONVERTING, STAGE_LAYOUT = range(3)
+STAGES = ("Waiting", "Converting", "Laying out")
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a job whose cancellation was requested."""
+
+
+class _Slots:
+    """Progress (done, total, stage), start and cancel flags of the job slots, in shared memory."""
+
+    def __init__(self, count, context):
+        self.progress = context.RawArray('q', 3 * count)
+        self.started = context.RawArray('b', count)
+        self.cancelled = context.RawArray('b', count)
+
+    def reset(self, slot):
+        self.progress[3 * slot:3 * slot + 3] = [0, 0, STAGE_WAITING]
+        self.started[slot] = 0
+        self.cancelled[slot] = 0
+
+    def read(self, slot):
+        return tuple(self.progress[3 * slot:3 * slot + 3])
+
+    def reporter(self, slot):
+        def progress(done, total, stage=STAGE_LAYOUT):
+            if self.cancelled[slot]:
+                raise JobCancelled("export cancelled")
+            self.progress[3 * slot:3 * slot + 3] = [done, total, stage]
+        return progress
+
+
+# The queue's slots as seen by a worker process, set by _init_worker
+_worker_slots = None
+
+
+def _init_worker(slots):
+    global _worker_slots
+    _worker_slots = slots
+
+
+def _run_job(slot, fn, args):
+    _worker_slots.started[slot] = 1
+    return fn(_worker_slots.reporter(slot), *args)
+
+
+class ExportJob:
+    """One submitted export; safe to read from any thread."""
+
+    def __init__(self, job_id, label, future, slot, task, executor=None, deadline=None):
+        self.id = job_id
+        self.label = label
+        self.future = future
+        self.slot = slot
+        # (fn, args), to move the job to a fresh pool
+        self.task = task
+        # Pool running the job, None for inline jobs, and when it must be done
+        self.executor = executor
+        self.deadline = deadline
+        self.cancelled_at = None
+        # JobTimeout or JobCancelled of a job whose pool was killed
+        self.stopped = None
+        self.finished_at = None
+        # Progress when the job finished; its slot may serve another job by then
+        self.final_progress = None
+
+    @property
+    def status(self):
+        future = self.future
+        if future.cancelled():
+            return CANCELLED
+        if not future.done():
+            return RUNNING if future.running() else QUEUED
+        error = self._exception()
+        if error is None:
+            return DONE
+        return CANCELLED if isinstance(error, JobCancelled) else FAILED
+
+    @property
+    def error(self):
+        """The exception of a failed job, else None."""
+        return self._exception() if self.status == FAILED else None
+
+    def result(self):
+        """The job's return value; raises its exception if it failed."""
+        if self.stopped is not None and self.future.done():
+            raise self.stopped
+        return self.future.result()
+
+    def _exception(self):
+        return self.stopped or self.future.exception()
+
+
+class ExportJobQueue:
+    """Bounded process pool of export jobs with shared-memory progress and cancel flags."""
+
+    def __init__(self, workers=EXPORT_JOB_WORKERS, queue_limit=EXPORT_JOB_QUEUE_LIMIT,
+                 inline_max_bytes=RENDER_INLINE_MAX_BYTES, result_ttl=EXPORT_JOB_RESULT_TTL,
+                 timeout=EXPORT_JOB_TIMEOUT, watch_seconds=EXPORT_JOB_POLL_SECONDS):
+        self.workers = workers
+        self.inline_max_bytes = inline_max_bytes
+        self.result_ttl = result_ttl
+        self.timeout = timeout
+        self.watch_seconds = watch_seconds
+        self._context = get_context("spawn")
+        self._slots = _Slots(queue_limit, self._context)
+        self._free_slots = list(range(queue_limit))
+        self._jobs = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self._watchdog = None
+        self._closed = threading.Event()
+
+    def submit(self, fn, *args, label="", size=None):
+        """Start ``fn(progress, *args)`` as a job and return its id.
+
+        ``size`` is the size of the job's input; jobs below ``inline_max_bytes``
+        run in the calling thread. Raises ``WorkerPoolBusy`` when every slot is taken.
+        """
+        with self._lock:
+            self._drop_expired()
+            if not self._free_slots:
+                raise WorkerPoolBusy("too many exports are running; try again shortly")
+            slot = self._free_slots.pop()
+            self._slots.reset(slot)
+        job = ExportJob(uuid.uuid4().hex, label, None, slot, (fn, args))
+        if self.workers <= 0 or (size is not None and size < self.inline_max_bytes):
+            job.future = Future()
+            job.future.set_running_or_notify_cancel()
+            try:
+                job.future.set_result(fn(self._slots.reporter(slot), *args))
+            except Exception as e:
+                job.future.set_exception(e)
+        else:
+            self._start(job)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._start_watchdog()
+        self._watch_future(job)
+        return job.id
+
+    def get(self, job_id):
+        """Return the job with ``job_id``, or None once it was discarded or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def progress(self, job_id):
+        """Return ``(done, total, stage)`` of a job, or None for an unknown job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.final_progress is not None:
+                return job.final_progress
+            return self._slots.read(job.slot)
+
+    def cancel(self, job_id):
+        """Cancel a job: at once if it is still queued, at its next progress report if running."""
+        job = self.get(job_id)
+        # Outside the lock: cancelling a queued job runs its done callback
+        if job is None or job.future.cancel():
+            return
+        with self._lock:
+            if job.final_progress is None:
+                self._slots.cancelled[job.slot] = 1
+                if job.cancelled_at is None:
+                    job.cancelled_at = time.monotonic()
+
+    def discard(self, job_id):
+        """Cancel a job if needed and forget it, e.g. once its result was collected."""
+        self.cancel(job_id)
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def shutdown(self):
+        self._closed.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start(self, job):
+        fn, args = job.task
+        for attempt in range(2):
+            with self._lock:
+                executor = self._get_executor()
+            try:
+                job.future = executor.submit(_run_job, job.slot, fn, args)
+                break
+            except (BrokenProcessPool, RuntimeError):
+                # A crashed worker broke the pool; start a fresh one
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+                if attempt:
+                    raise
+        job.executor = executor
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self._context,
+                initializer=_init_worker, initargs=(self._slots,)
+            )
+        return self._executor
+
+    def _watch_future(self, job):
+        future = job.future
+        future.add_done_callback(lambda _: self._finish(job, future))
+
+    def _finish(self, job, future):
+        with self._lock:
+            # The future of a job that was moved to a fresh pool
+            if job.future is not future:
+                return
+            job.final_progress = self._slots.read(job.slot)
+            job.finished_at = time.monotonic()
+            self._free_slots.append(job.slot)
+
+    def _start_watchdog(self):
+        if self._watchdog is None and not self._closed.is_set():
+            self._watchdog = threading.Thread(target=self._watch, name="export-job-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def _watch(self):
+        while not self._closed.wait(self.watch_seconds):
+            self._check()
+
+    def _check(self):
+        """Drop expired results and restart pools whose jobs are past their deadline."""
+        now = time.monotonic()
+        stuck = set()
+        with self._lock:
+            self._drop_expired()
+            for job in self._jobs.values():
+                # A future counts as running once it is handed to the pool's call
+                # queue; the worker's start flag tells when the job really started
+                if job.executor is None or job.future.done() or not self._slots.started[job.slot]:
+                    continue
+                if job.deadline is None:
+                    job.deadline = now + self.timeout
+                if job.cancelled_at is not None and now - job.cancelled_at > CANCEL_GRACE_SECONDS:
+                    job.stopped = JobCancelled("export cancelled")
+                elif now > job.deadline:
+                    job.stopped = JobTimeout(f"export did not finish within {self.timeout:g} seconds")
+                else:
+                    continue
+                stuck.add(job.executor)
+        for executor in stuck:
+            self._restart(executor)
+
+    def _restart(self, executor):
+        """Kill a pool with a stuck job; its other unfinished jobs run again on a fresh pool."""
+        moved = []
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+            # Swapped under the lock, before the kill: the old futures failing
+            # or finishing meanwhile must not finish these jobs or free their slots
+            for job in self._jobs.values():
+                if job.executor is not executor or job.stopped is not None or job.finished_at is not None:
+                    continue
+                if job.cancelled_at is not None:
+                    job.stopped = JobCancelled("export cancelled")
+                    continue
+                fn, args = job.task
+                self._slots.reset(job.slot)
+                job.executor = self._get_executor()
+                job.future = job.executor.submit(_run_job, job.slot, fn, args)
+                job.deadline = None
+                moved.append(job)
+        for job in moved:
+            self._watch_future(job)
+        # ProcessPoolExecutor cannot stop a running job; end its processes instead.
+        # That fails every future left on the pool, so none is cancelled as well.
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False)
+
+    def _drop_expired(self):
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_export_jobs():
+    """Return the process-wide ExportJobQueue, shared by all sessions."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ExportJobQueue()
+        return _queue
+
+
+def pdf_job(progress, html_content):
+    """Export job: lay rendered markdown HTML out as a PDF and return its bytes."""
+    progress(0, 0, STAGE_CONVERTING)
+    return html_to_pdf_bytes(html_content, progress=progress)
+
+
+def book_job(progress, files, title):
+    """Export job: merge markdown files into one PDF; returns ``(pdf_bytes, summary)``."""
+    return build_book_bytes(
+        files, title,
+        progress=lambda done, total, rel_path: progress(done, total, STAGE_CONVERTING),
+        layout_progress=progress
+    )
@@ -0,0 +1,239 @@
+"""
+Single-pass streaming scanner for fenced code blocks.
+
+``scan_fences`` is a generator over lines that yields plain lines and whole
+fenced blocks, following Python-Markdown's ``fenced_code`` rules (a fence
+closes only on the same marker followed by spaces). Only the lines of the
+fence currently open are buffered, so it can stream multi-megabyte files.
+Lines that are already in a list are not walked one by one: whole fences
+are found by a regular expression over the joined text, and the lines
+between them are handed on in bulk.
+
+``FenceScanExtension`` uses it as the one preprocessing pass of the render
+pipeline: Mermaid diagrams become ``<div class="mermaid">`` blocks, ordinary
+fences go straight to the memoized highlighter (``code_highlight``) and into
+the HTML stash, and fences with ``{attrs}`` or ``hl_lines`` are left to
+``fenced_code``.
+"""
+
+import re
+
+from markdown.extensions import Extension
+from markdown.extensions.codehilite import CodeHiliteExtension
+from markdown.preprocessors import Preprocessor
+
+from code_highlight import highlight_code
+
+# Opening fence as understood by fenced_code: marker, then {attrs} or (.)lang and hl_lines
+_OPENER = r"""(?P<fence>~{3,}|`{3,})[ ]*
+    (?:\{(?P<attrs>[^\n]*)\}
+    |\.?(?P<lang>[\w#.+-]*)[ ]*(?:hl_lines=(?P<quot>"|')(?P<hl_lines>.*?)(?P=quot)[ ]*)?)"""
+_FENCE_OPEN = re.compile("^" + _OPENER + "$", re.VERBOSE)
+# A whole fence in lines joined behind a leading newline: the opening line, the
+# body, and the first line holding the same marker and nothing but spaces
+_FENCE_BLOCK = re.compile(
+    r"\n(?P<open>" + _OPENER + r""")
+    (?P<body>(?:\n[^\n]*)*?)\n(?P<close>(?P=fence)[ ]*)(?=\n|\Z)""",
+    re.VERBOSE
+)
+_FENCE_CHARS = ("```", "~~~")
+# The first non-blank line of an unlabeled Mermaid diagram
+_DIAGRAM_START = re.compile(r"\s*(?i:graph|flowchart)[ ][^\n]*\S")
+
+
+def is_mermaid_code(lang, lines):
+    """A ``mermaid`` block, or an unlabeled one whose first line starts a graph/flowchart."""
+    if lang:
+        return lang.lower() == "mermaid"
+    for line in lines:
+        if line.strip():
+            return _DIAGRAM_START.match(line) is not None
+    return False
+
+
+class Fence:
+    """A complete fenced block: its opening and closing lines and the code between them."""
+
+    __slots__ = ("open_line", "close_line", "marker", "lang", "attrs", "hl_lines", "lines")
+
+    def __init__(self, open_line, match):
+        self.open_line = open_line
+        self.close_line = None
+        self.marker, lang, self.attrs, self.hl_lines = match.group("fence", "lang", "attrs", "hl_lines")
+        self.lang = lang or None
+        self.lines = []
+
+    @property
+    def code(self):
+        """The code with a trailing newline, as fenced_code passes it to the highlighter."""
+        return "\n".join(self.lines) + "\n" if self.lines else ""
+
+    def is_simple(self):
+        """True if no attribute list or line highlighting needs fenced_code's handling."""
+        return not self.attrs and not self.hl_lines
+
+    def is_mermaid(self):
+        return is_mermaid_code(self.lang, self.lines)
+
+    def source_lines(self):
+        yield self.open_line
+        yield from self.lines
+        yield self.close_line
+
+
+def scan_fences(lines):
+    """Yield each line that is not part of a fence, and a ``Fence`` for each fenced block.
+
+    ``lines`` may be any iterable of lines without newlines (e.g. a lazily read
+    file). A fence that is never closed is not a fence: its lines are scanned
+    again as ordinary text.
+    """
+    if isinstance(lines, list):
+        for item in _scan_list(lines):
+            if isinstance(item, list):
+                yield from item
+            else:
+                yield item
+        return
+    pending = iter(lines)
+    while True:
+        for line in pending:
+            match = _FENCE_OPEN.match(line) if line.startswith(_FENCE_CHARS) else None
+            if match is None:
+                yield line
+                continue
+            fence = Fence(line, match)
+            marker, body = fence.marker, fence.lines
+            for line in pending:
+                if line.startswith(marker) and not line[len(marker):].strip(" "):
+                    fence.close_line = line
+                    break
+                body.append(line)
+            else:
+                # Unclosed: the opening line is text and the rest is rescanned
+                yield fence.open_line
+                pending = iter(body)
+                break
+            yield fence
+        else:
+            return
+
+
+def _scan_list(lines):
+    """Like ``scan_fences`` for a list, but yield runs of plain lines as lists.
+
+    Whole fences are found by one regular expression over the joined lines,
+    so the text between them is never looked at line by line in Python.
+    """
+    if not lines:
+        return
+    text = "\n".join([""] + lines)
+    end = 0  # the newline ending the last fence, or the one before the first line
+    for match in _FENCE_BLOCK.finditer(text):
+        if match.start() > end:
+            yield text[end + 1:match.start()].split("\n")
+        open_line, body, close_line = match.group("open", "body", "close")
+        fence = Fence(open_line, match)
+        if body:
+            fence.lines = body[1:].split("\n")
+        fence.close_line = close_line
+        yield fence
+        end = match.end()
+    if end < len(text):
+        yield text[end + 1:].split("\n")
+
+
+def _preprocess_mermaid_list(lines):
+    """``preprocess_mermaid`` for a list: only the marker lines of Mermaid fences change."""
+    text = "\n".join([""] + lines)
+    count = text.count
+    out = list(lines)
+    pos = line = 0  # ``text[pos]`` is the newline before ``lines[line]``
+    for match in _FENCE_BLOCK.finditer(text):
+        lang = match.group("lang")
+        if lang:
+            if lang.lower() != "mermaid":
+                continue
+        elif _DIAGRAM_START.match(text, match.end("open")) is None:
+            continue
+        body_start, body_end = match.span("body")
+        open_index = line + count("\n", pos, body_start) - 1
+        line = open_index + 2 + count("\n", body_start, body_end)
+        pos = match.end()
+        out[open_index] = '<div class="mermaid">'
+        out[line - 1] = "</div>"
+    return out
+
+
+def _scan_runs(lines):
+    """``scan_fences`` yielding lists of plain lines where ``lines`` is a list."""
+    if isinstance(lines, list):
+        return _scan_list(lines)
+    return ([item] if isinstance(item, str) else item for item in scan_fences(lines))
+
+
+def preprocess_mermaid(lines):
+    """Return ``lines`` with Mermaid fences replaced by ``<div class="mermaid">`` blocks.
+
+    A list gives a list; any other iterable is processed lazily.
+    """
+    if isinstance(lines, list):
+        return _preprocess_mermaid_list(lines)
+    return _preprocess_mermaid_stream(lines)
+
+
+def _preprocess_mermaid_stream(lines):
+    for item in scan_fences(lines):
+        if isinstance(item, str):
+            yield item
+        elif item.is_mermaid():
+            yield '<div class="mermaid">'
+            yield from item.lines
+            yield "</div>"
+        else:
+            yield from item.source_lines()
+
+
+class FenceScanPreprocessor(Preprocessor):
+    """Handle Mermaid detection, fence extraction and highlighting in one pass."""
+
+    def __init__(self, md):
+        super().__init__(md)
+        self._codehilite_conf = None
+
+    def run(self, lines):
+        if self._codehilite_conf is None:
+            self._codehilite_conf = {}
+            for ext in self.md.registeredExtensions:
+                if isinstance(ext, CodeHiliteExtension):
+                    self._codehilite_conf = ext.getConfigs()
+        highlight = bool(self._codehilite_conf.get("use_pygments"))
+
+        out = []
+        for item in _scan_runs(lines):
+            if isinstance(item, list):
+                out.extend(item)
+            elif item.is_mermaid():
+                out.append('<div class="mermaid">')
+                out.extend(item.lines)
+                out.append("</div>")
+            elif highlight and item.is_simple():
+                html = highlight_code(item.code, item.lang, self._codehilite_conf)
+                # Same framing fenced_code uses around its placeholder
+                out.extend(("", self.md.htmlStash.store(html), ""))
+            else:
+                out.extend(item.source_lines())
+        return out
+
+
+class FenceScanExtension(Extension):
+    """Register the fence scanner ahead of ``fenced_code``."""
+
+    def extendMarkdown(self, md):
+        # After whitespace normalisation (30), before fenced_code (25)
+        md.preprocessors.register(FenceScanPreprocessor(md), 'fence_scan', 26)
+        md.registerExtension(self)
+
+
+def makeExtension(**kwargs):
+    return FenceScanExtension(**kwargs)
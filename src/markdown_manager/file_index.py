@@ -0,0 +1,210 @@
+"""
+Persistent, incremental index of the markdown files below a folder.
+
+The index records every directory's mtime together with its markdown files and
+subdirectories, and is stored in ``.fyiai/index/files.json`` inside the indexed
+folder. A refresh only stats each directory and rescans the ones whose mtime
+changed, so listing a large, mostly unchanged tree no longer reads every
+directory on every Streamlit rerun. Directories are checked in parallel and
+ignored subtrees are pruned (see ``file_scanner``).
+"""
+
+import json
+import os
+import threading
+import time
+
+from file_scanner import (DEFAULT_IGNORE_PATTERNS, IgnoreRules, ignore_base,
+                          scan_directory, walk_parallel)
+
+INDEX_DIR = os.path.join(".fyiai", "index")
+INDEX_FILE_NAME = "files.json"
+INDEX_FORMAT_VERSION = 2
+
+# Directory mtimes this close to the scan time are not trusted on the next
+# refresh: a change in the same timestamp tick would otherwise go unnoticed.
+RACY_MTIME_WINDOW_NS = 2_000_000_000
+
+
+class FileIndex:
+    """Directory-mtime based index of the markdown files under ``root``.
+
+    ``ignore_root`` is the directory the ignore patterns are relative to (the
+    project root of the sync config); by default they are relative to ``root``.
+    """
+
+    def __init__(self, root, ignore_patterns=DEFAULT_IGNORE_PATTERNS, ignore_root=None):
+        self.root = os.path.abspath(root)
+        self.index_path = os.path.join(self.root, INDEX_DIR, INDEX_FILE_NAME)
+        self.ignore_rules = IgnoreRules(ignore_patterns, ignore_base(self.root, ignore_root))
+        # Bumped whenever the set of markdown files changes
+        self.version = 0
+        self._dirs = {}
+        self._files = []
+        # Immutable (version, files, directories) view for lock-free readers
+        self._snapshot = (0, (), ())
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def set_ignore_patterns(self, patterns, ignore_root=None):
+        """Switch to new ignore patterns, discarding the listing if they changed.
+
+        The snapshot is emptied under a new version, so ``has_listing`` is
+        False until the next refresh and no reader keeps the old file set.
+        """
+        rules = IgnoreRules(patterns, ignore_base(self.root, ignore_root))
+        with self._lock:
+            if (rules.patterns, rules.base) != (self.ignore_rules.patterns, self.ignore_rules.base):
+                self.ignore_rules = rules
+                self._dirs = {}
+                self._files = []
+                self.version += 1
+                self._snapshot = (self.version, (), ())
+                # The index on disk was built with the old patterns
+                self._loaded = True
+
+    def refresh(self, progress=None):
+        """Bring the index up to date and return sorted ``(rel_path, full_path)`` pairs.
+
+        ``progress(files_found, rel_dir)`` is called after every directory that
+        had to be rescanned, so a cold scan can report partial results.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+            new_dirs = {}
+            changed = False
+            files_found = 0
+            scan_started_ns = time.time_ns()
+
+            def visit(rel_dir):
+                full_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+                try:
+                    mtime_ns = os.stat(full_dir).st_mtime_ns
+                except OSError:
+                    return None, ()
+                entry = self._dirs.get(rel_dir)
+                rescanned = entry is None or entry["mtime"] != mtime_ns
+                if rescanned:
+                    entry = scan_directory(full_dir, rel_dir.replace(os.sep, "/"), self.ignore_rules)
+                    if entry is None:
+                        return None, ()
+                    racy = scan_started_ns - mtime_ns < RACY_MTIME_WINDOW_NS
+                    entry["mtime"] = None if racy else mtime_ns
+                children = []
+                for subdir in entry["dirs"]:
+                    rel_subdir = os.path.join(rel_dir, subdir) if rel_dir else subdir
+                    # Writing the index must not invalidate the index
+                    if rel_subdir != INDEX_DIR:
+                        children.append(rel_subdir)
+                return (entry, rescanned), children
+
+            for rel_dir, result in walk_parallel(visit):
+                if result is None:
+                    changed = True
+                    continue
+                entry, rescanned = result
+                new_dirs[rel_dir] = entry
+                files_found += len(entry["files"])
+                if rescanned:
+                    changed = True
+                    if progress:
+                        progress(files_found, rel_dir)
+
+            if changed or new_dirs.keys() != self._dirs.keys():
+                self._dirs = new_dirs
+                files = self._collect_files()
+                if files != self._files:
+                    self._files = files
+                    self.version += 1
+                self._save()
+                self._snapshot = (self.version, tuple(self._files), tuple(self._dirs))
+            elif not self._snapshot[2]:
+                self._snapshot = (self.version, tuple(self._files), tuple(self._dirs))
+
+            return list(self._files)
+
+    def snapshot(self):
+        """Return ``(version, files, directories)`` from the last refresh without rescanning.
+
+        Safe to call while another thread is refreshing; the directories are
+        relative to ``root`` with ``""`` for the root itself.
+        """
+        return self._snapshot
+
+    def has_listing(self):
+        """Return True if a listing is available without a full scan (in memory or on disk)."""
+        if self._snapshot[2] or self._dirs:
+            return True
+        return not self._loaded and os.path.exists(self.index_path)
+
+    def _collect_files(self):
+        """Flatten the directory entries into a sorted list of file pairs."""
+        files = []
+        for rel_dir, entry in self._dirs.items():
+            for name in entry["files"]:
+                rel_path = os.path.join(rel_dir, name) if rel_dir else name
+                files.append((rel_path, os.path.join(self.root, rel_path)))
+        return sorted(files)
+
+    def _load(self):
+        """Load a previously saved index, ignoring missing or stale files."""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("format") != INDEX_FORMAT_VERSION or data.get("sep") != os.sep:
+            return
+        if tuple(data.get("ignore_patterns", ())) != self.ignore_rules.patterns:
+            return
+        if data.get("ignore_base", "") != self.ignore_rules.base:
+            return
+        dirs = data.get("dirs")
+        if isinstance(dirs, dict):
+            self._dirs = dirs
+            self._files = self._collect_files()
+
+    def _save(self):
+        """Persist the index atomically; read-only folders just keep it in memory."""
+        data = {
+            "format": INDEX_FORMAT_VERSION,
+            "sep": os.sep,
+            "ignore_patterns": list(self.ignore_rules.patterns),
+            "ignore_base": self.ignore_rules.base,
+            "dirs": self._dirs,
+        }
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_file_index(root, ignore_patterns=None, ignore_root=None):
+    """Return the process-wide FileIndex for ``root``, shared by all sessions.
+
+    If ``ignore_patterns`` is given the index switches to them, matched
+    relative to ``ignore_root`` (default: ``root``).
+    """
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = FileIndex(key, ignore_patterns or DEFAULT_IGNORE_PATTERNS, ignore_root)
+            _indexes[key] = index
+    if ignore_patterns is not None:
+        index.set_ignore_patterns(ignore_patterns, ignore_root)
+    return index
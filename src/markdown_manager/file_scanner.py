@@ -0,0 +1,278 @@
+"""
+Parallel, pruning directory scanner for markdown files.
+
+Subtrees are listed with ``os.scandir`` on a shared thread pool, which keeps
+latency-bound network mounts (NFS/SMB) busy instead of waiting on one directory
+at a time. Directories matching ``.gitignore``-style patterns (VCS metadata,
+``node_modules``, virtualenvs, build output, generated AI summaries and any
+``ignore_patterns`` from the project config) are never descended into.
+"""
+
+import json
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+MARKDOWN_EXTENSIONS = ('.md', '.markdown')
+
+DEFAULT_IGNORE_PATTERNS = (
+    ".git/",
+    ".hg/",
+    ".svn/",
+    "node_modules/",
+    "venv/",
+    ".venv/",
+    "__pycache__/",
+    ".tox/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    "ai-summary/",
+    "build/",
+    "dist/",
+    "_build/",
+    "**/.fyiai/index/",
+)
+
+SCANNER_MAX_WORKERS = int(os.getenv("SCANNER_MAX_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+
+
+def is_markdown_file(name):
+    """Return True if the file name has a markdown extension."""
+    return name.lower().endswith(MARKDOWN_EXTENSIONS)
+
+
+def _translate_glob(pattern):
+    """Translate one gitignore glob (without leading/trailing slashes) to a regex."""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """Ordered ``.gitignore``-style rules matched against '/'-separated relative paths.
+
+    Supports comments, ``!`` negation, trailing ``/`` for directory-only rules,
+    leading or embedded ``/`` for rules anchored at the patterns' root, and
+    ``*``, ``?``, ``[...]`` and ``**`` wildcards. As in git, the last matching
+    rule wins and nothing below an ignored directory can be re-included.
+
+    Like a ``.gitignore``, the patterns are relative to the directory they
+    belong to (the project root for the sync config). ``base`` is the scan
+    root's path below that directory (see ``ignore_base``); it is prefixed to
+    every path, so anchored rules still apply when a subfolder is scanned.
+    """
+
+    def __init__(self, patterns=DEFAULT_IGNORE_PATTERNS, base=""):
+        self.patterns = tuple(p.strip() for p in patterns if p and p.strip())
+        self.base = base.replace(os.sep, "/").strip("/")
+        self._rules = []
+        for pattern in self.patterns:
+            if pattern.startswith("#"):
+                continue
+            negate = pattern.startswith("!")
+            if negate:
+                pattern = pattern[1:]
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            pattern = pattern.lstrip("/")
+            if not pattern:
+                continue
+            prefix = "^" if anchored else "^(?:.*/)?"
+            regex = re.compile(prefix + _translate_glob(pattern) + "$")
+            self._rules.append((regex, negate, dir_only))
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """Return True if the relative path is excluded by the rules."""
+        rel_path = rel_path.replace(os.sep, "/")
+        if self.base:
+            rel_path = f"{self.base}/{rel_path}"
+        ignored = False
+        for regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                ignored = not negate
+        return ignored
+
+
+def ignore_base(scan_root, pattern_root):
+    """Return ``scan_root`` relative to ``pattern_root`` as an ``IgnoreRules`` base.
+
+    A scan root outside ``pattern_root`` (or no ``pattern_root``) gives ``""``,
+    so the patterns are matched relative to the scan root itself.
+    """
+    if not pattern_root:
+        return ""
+    try:
+        rel = os.path.relpath(os.path.abspath(scan_root), os.path.abspath(pattern_root))
+    except ValueError:
+        # Different drives on Windows
+        return ""
+    if rel == os.curdir or rel == os.pardir or rel.startswith(os.pardir + os.sep):
+        return ""
+    return rel.replace(os.sep, "/")
+
+
+_config_cache = {}
+
+
+def load_ignore_patterns(project_root):
+    """Return the default patterns plus ``ignore_patterns`` from the project's sync config.
+
+    The config lives at ``<project_root>/.fyiai/cloud/sync/config.json``; it is
+    re-read only when its mtime changes. Its patterns are relative to
+    ``project_root``, so pass that as the ``ignore_root`` of the index.
+    """
+    if not project_root:
+        return DEFAULT_IGNORE_PATTERNS
+    config_path = os.path.join(project_root, ".fyiai", "cloud", "sync", "config.json")
+    try:
+        mtime_ns = os.stat(config_path).st_mtime_ns
+    except OSError:
+        return DEFAULT_IGNORE_PATTERNS
+
+    cached = _config_cache.get(config_path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+
+    patterns = DEFAULT_IGNORE_PATTERNS
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            extra = json.load(f).get("ignore_patterns", [])
+        if isinstance(extra, str):
+            extra = extra.splitlines()
+        patterns = DEFAULT_IGNORE_PATTERNS + tuple(str(p) for p in extra)
+    except (OSError, ValueError, AttributeError):
+        pass
+    _config_cache[config_path] = (mtime_ns, patterns)
+    return patterns
+
+
+def scan_directory(full_dir, rel_dir, rules):
+    """List one directory, returning its kept subdirectories and markdown files.
+
+    Returns ``None`` if the directory cannot be read.
+    """
+    dirs = []
+    files = []
+    try:
+        with os.scandir(full_dir) as it:
+            for entry in it:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir():
+                        # Match os.walk: never descend into symlinked directories
+                        if not entry.is_symlink() and not rules.is_ignored(rel_path, is_dir=True):
+                            dirs.append(entry.name)
+                    elif is_markdown_file(entry.name) and not rules.is_ignored(rel_path):
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return {"dirs": sorted(dirs), "files": sorted(files)}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Return the process-wide scanner thread pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=SCANNER_MAX_WORKERS, thread_name_prefix="md-scan")
+        return _pool
+
+
+def walk_parallel(visit, max_workers=None):
+    """Visit a directory tree concurrently, starting at the root (``""``).
+
+    ``visit(rel_dir)`` returns ``(result, child_rel_dirs)``; children are
+    submitted as soon as their parent completes. Yields ``(rel_dir, result)``
+    in completion order.
+    """
+    workers = SCANNER_MAX_WORKERS if max_workers is None else max_workers
+    if workers <= 1:
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            result, children = visit(rel_dir)
+            stack.extend(reversed(children))
+            yield rel_dir, result
+        return
+
+    pool = _get_pool()
+    pending = {pool.submit(visit, ""): ""}
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel_dir = pending.pop(future)
+                result, children = future.result()
+                for child in children:
+                    pending[pool.submit(visit, child)] = child
+                yield rel_dir, result
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def scan_markdown_files(directory, rules=None, max_workers=None):
+    """Stream ``(rel_path, full_path)`` for every markdown file under ``directory``.
+
+    Results arrive per directory as soon as it has been listed, so callers can
+    show partial results; the order is not sorted.
+    """
+    root = os.path.abspath(directory)
+    rules = rules or IgnoreRules()
+
+    def visit(rel_dir):
+        full_dir = os.path.join(root, rel_dir) if rel_dir else root
+        entry = scan_directory(full_dir, rel_dir.replace(os.sep, "/"), rules)
+        if entry is None:
+            return [], []
+        files = []
+        for name in entry["files"]:
+            rel_path = os.path.join(rel_dir, name) if rel_dir else name
+            files.append((rel_path, os.path.join(root, rel_path)))
+        children = [os.path.join(rel_dir, d) if rel_dir else d for d in entry["dirs"]]
+        return files, children
+
+    for _, files in walk_parallel(visit, max_workers):
+        yield from files
@@ -0,0 +1,89 @@
+"""
+Compact directory table for the sidebar file browser.
+
+Instead of a nested dict per directory, the tree keeps one flat mapping from a
+directory's relative path to its sorted child directory names and files. The
+sidebar can then ask for the children of just the directories a user expanded,
+one page at a time, without walking the whole structure on every rerun.
+"""
+
+import os
+
+
+class FileTree:
+    """Flat, pre-sorted view of ``(rel_path, full_path)`` pairs grouped by directory."""
+
+    __slots__ = ("_dirs", "_files", "_counts")
+
+    def __init__(self, markdown_files):
+        dirs = {"": set()}
+        files = {}
+        counts = {"": 0}
+        for rel_path, full_path in markdown_files:
+            parent, name = os.path.split(rel_path)
+            files.setdefault(parent, []).append((name, full_path))
+            # Register every ancestor and count the file towards it
+            child = parent
+            while True:
+                counts[child] = counts.get(child, 0) + 1
+                if not child:
+                    break
+                up, dir_name = os.path.split(child)
+                if child not in dirs:
+                    dirs[child] = set()
+                dirs.setdefault(up, set()).add(dir_name)
+                child = up
+
+        self._dirs = {
+            d: tuple(sorted(names, key=str.lower)) for d, names in dirs.items()
+        }
+        self._files = {
+            d: tuple(sorted(entries, key=lambda e: e[0].lower())) for d, entries in files.items()
+        }
+        self._counts = counts
+
+    def __len__(self):
+        return self._counts[""]
+
+    def subdirs(self, rel_dir=""):
+        """Return the sorted child directory names of ``rel_dir``."""
+        return self._dirs.get(rel_dir, ())
+
+    def files(self, rel_dir=""):
+        """Return the sorted ``(file_name, full_path)`` pairs directly inside ``rel_dir``."""
+        return self._files.get(rel_dir, ())
+
+    def file_count(self, rel_dir=""):
+        """Return the number of files anywhere below ``rel_dir``."""
+        return self._counts.get(rel_dir, 0)
+
+    def entry_count(self, rel_dir=""):
+        """Return the number of direct children (directories and files) of ``rel_dir``."""
+        return len(self.subdirs(rel_dir)) + len(self.files(rel_dir))
+
+    def entries(self, rel_dir="", limit=None):
+        """Return up to ``limit`` children of ``rel_dir``, directories first.
+
+        Directories are ``("dir", rel_path, name)`` and files
+        ``("file", full_path, name)``.
+        """
+        result = []
+        for name in self.subdirs(rel_dir):
+            if limit is not None and len(result) >= limit:
+                return result
+            result.append(("dir", os.path.join(rel_dir, name) if rel_dir else name, name))
+        for name, full_path in self.files(rel_dir):
+            if limit is not None and len(result) >= limit:
+                return result
+            result.append(("file", full_path, name))
+        return result
+
+
+def ancestor_dirs(rel_path):
+    """Return the relative directories containing ``rel_path``, outermost first."""
+    parents = []
+    parent = os.path.dirname(rel_path)
+    while parent:
+        parents.append(parent)
+        parent = os.path.dirname(parent)
+    return list(reversed(parents))
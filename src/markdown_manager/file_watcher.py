@@ -0,0 +1,198 @@
+"""
+Background watcher that keeps the markdown file index of a folder current.
+
+On Linux the watcher subscribes to inotify events for every indexed directory;
+elsewhere, or when inotify is unavailable (e.g. the watch limit is reached), it
+falls back to polling. Either way a change only triggers an incremental
+``FileIndex.refresh()``, and readers take the latest snapshot without touching
+the filesystem, so Streamlit reruns no longer pay for listing the tree.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from file_index import get_file_index
+
+FILE_WATCHER_ENABLED = os.getenv("FILE_WATCHER_ENABLED", "true").lower() == "true"
+FILE_WATCHER_POLL_INTERVAL = float(os.getenv("FILE_WATCHER_POLL_INTERVAL", "2.0"))
+# Watchers for folders nobody looked at recently are stopped beyond this count
+MAX_ACTIVE_WATCHERS = 8
+
+# inotify(7) constants
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_ONLYDIR = 0x01000000
+WATCH_MASK = (IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+# Events arriving within this window are coalesced into one refresh
+EVENT_COALESCE_SECONDS = 0.1
+
+
+class _Inotify:
+    """Minimal ctypes binding for the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path):
+        """Watch a directory and return the watch descriptor."""
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def rm_watch(self, wd):
+        """Stop watching a descriptor; errors for already removed watches are ignored."""
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self, timeout):
+        """Wait up to ``timeout`` seconds and return the number of queued events."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return 0
+        count = 0
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                _, _, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size + name_len
+                count += 1
+        return count
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Keeps the FileIndex of one folder refreshed from a daemon thread."""
+
+    def __init__(self, root):
+        self.index = get_file_index(root)
+        self.root = self.index.root
+        self.backend = None
+        self.last_used = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Index the folder once and start watching it in the background."""
+        self.index.refresh()
+        self._thread = threading.Thread(
+            target=self._run, name=f"folder-watcher:{self.root}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def snapshot(self):
+        """Return ``(version, files)`` for the folder without touching the disk."""
+        self.last_used = time.monotonic()
+        version, files, _ = self.index.snapshot()
+        return version, files
+
+    def _run(self):
+        if sys.platform.startswith("linux"):
+            try:
+                self._run_inotify()
+                return
+            except OSError:
+                # Fall through to polling, e.g. when the watch limit is exhausted
+                pass
+        self._run_polling()
+
+    def _run_polling(self):
+        self.backend = "polling"
+        while not self._stop.wait(FILE_WATCHER_POLL_INTERVAL):
+            self.index.refresh()
+
+    def _run_inotify(self):
+        inotify = _Inotify()
+        watches = {}
+        try:
+            directories = self._sync_watches(inotify, watches)
+            self.backend = "inotify"
+            while not self._stop.is_set():
+                if not inotify.read_events(timeout=1.0):
+                    # Refreshed elsewhere, e.g. after the ignore patterns changed
+                    if self.index.snapshot()[2] != directories:
+                        directories = self._sync_watches(inotify, watches)
+                    continue
+                # Let bursts (checkouts, bulk copies) settle into a single refresh
+                while inotify.read_events(timeout=EVENT_COALESCE_SECONDS):
+                    pass
+                self.index.refresh()
+                directories = self._sync_watches(inotify, watches)
+        finally:
+            inotify.close()
+
+    def _sync_watches(self, inotify, watches):
+        """Watch every indexed directory, refreshing again while new ones appear.
+
+        Returns the indexed directories the watches now match.
+        """
+        while True:
+            _, _, directories = self.index.snapshot()
+            paths = {os.path.join(self.root, d) if d else self.root for d in directories}
+            for path in list(watches):
+                if path not in paths:
+                    inotify.rm_watch(watches.pop(path))
+            added = False
+            for path in paths - watches.keys():
+                try:
+                    watches[path] = inotify.add_watch(path)
+                    added = True
+                except (FileNotFoundError, NotADirectoryError, PermissionError):
+                    continue
+            if not added:
+                return directories
+            # Files created before the new watches existed would otherwise be missed
+            self.index.refresh()
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_folder_watcher(root):
+    """Return the running, process-wide watcher for ``root``, starting it if needed."""
+    key = os.path.abspath(root)
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is not None and watcher.is_alive():
+            return watcher
+        watcher = FolderWatcher(key)
+        _watchers[key] = watcher
+        if len(_watchers) > MAX_ACTIVE_WATCHERS:
+            stale = min(_watchers.values(), key=lambda w: w.last_used)
+            stale.stop()
+            del _watchers[stale.root]
+        watcher.start()
+    return watcher
@@ -0,0 +1,139 @@
+"""
+Heading outlines of markdown documents without rendering them.
+
+``extract_headings`` finds the ATX (``# Title``) and setext (underlined)
+headings of a document in one pass over its lines, skipping fenced code, and
+computes the anchor each heading gets from the ``toc`` extension when the
+document is rendered (including ``{#custom-id}`` attributes and the ``_1``,
+``_2`` suffixes of repeated titles). The sidebar outline and the project-wide
+"go to heading" search (stored in the search index) are built from it, so
+jumping to a section never needs a render of the document first.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+from markdown.extensions.toc import slugify, unique
+
+from fence_scanner import Fence, scan_fences
+
+# Outlines kept per process, keyed by file path
+OUTLINE_CACHE_SIZE = 64
+
+# line: 0-based line number of the heading text
+Heading = namedtuple("Heading", "level title anchor line")
+
+# Python-Markdown's ATX rule: no indentation, no space needed after the hashes
+_ATX = re.compile(r"^(#{1,6})(.*?)#*$")
+_BLOCKQUOTE = re.compile(r"^(?:[ ]{0,3}>[ ]?)+")
+_SETEXT_UNDERLINE = re.compile(r"^(=+|-+)[ ]*$")
+# attr_list on a heading: "# Title {#id .class}"
+_HEADING_ATTRS = re.compile(r"[ ]+\{:?([^}\n]*)\}[ ]*$")
+_ATTR_ID = re.compile(r"(?:^|\s)#([^\s}]+)")
+# Inline markup whose text ends up in the heading (images contribute nothing)
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)|\[([^\]]*)\]\[[^\]]*\]")
+_CODE = re.compile(r"(`+)(.+?)\1")
+_EMPHASIS = re.compile(r"(\*{1,3})(?=\S)(.+?)(?<=\S)\1")
+# Underscores inside words (snake_case) are not emphasis
+_UNDERSCORE_EMPHASIS = re.compile(r"(?<!\w)(_{1,3})(?=\S)(.+?)(?<=\S)\1(?!\w)")
+_TAG = re.compile(r"<[^>]+>")
+
+
+def heading_text(markup):
+    """Return the plain text of a heading's inline markdown, as the toc extension sees it."""
+    text = _IMAGE.sub("", markup)
+    text = _LINK.sub(lambda m: m.group(1) if m.group(1) is not None else m.group(2), text)
+    text = _CODE.sub(lambda m: m.group(2).strip(), text)
+    text = _EMPHASIS.sub(r"\2", text)
+    text = _UNDERSCORE_EMPHASIS.sub(r"\2", text)
+    return _TAG.sub("", text).strip()
+
+
+def _raw_headings(lines):
+    """Yield ``(level, markup, line)`` for every heading outside fenced code."""
+    number = 0
+    # First line of the current block, which could turn out to be a setext heading
+    candidate = None
+    previous_blank = True
+    for item in scan_fences(lines):
+        if isinstance(item, Fence):
+            number += len(item.lines) + 2
+            candidate = None
+            previous_blank = False
+            continue
+        line = item
+        if line[:4].lstrip(" ").startswith(">"):
+            # Headings inside block quotes get anchors too
+            line = _BLOCKQUOTE.sub("", line)
+        if candidate is not None:
+            match = _SETEXT_UNDERLINE.match(line)
+            if match:
+                yield (1 if match.group(1)[0] == "=" else 2), candidate[0], candidate[1]
+                candidate = None
+                previous_blank = False
+                number += 1
+                continue
+            candidate = None
+        if line.startswith("#"):
+            match = _ATX.match(line)
+            yield len(match.group(1)), match.group(2), number
+        elif previous_blank and line.strip() and not line.startswith((" ", "\t", ">", "<")):
+            candidate = (line.strip(), number)
+        previous_blank = not line.strip()
+        number += 1
+
+
+def extract_headings(lines):
+    """Return the ``Heading`` entries of a document given as an iterable of lines.
+
+    ``lines`` may be ``text.splitlines()`` or a file object (read lazily).
+    Headings without text are left out of the outline but still take their
+    anchor, as they do in the rendered document.
+    """
+    found = []
+    used_ids = set()
+    for level, markup, line in _raw_headings(line.rstrip("\r\n") for line in lines):
+        custom_id = None
+        attrs = _HEADING_ATTRS.search(markup)
+        if attrs:
+            id_match = _ATTR_ID.search(attrs.group(1))
+            custom_id = id_match.group(1) if id_match else None
+            markup = markup[:attrs.start()]
+        found.append((level, heading_text(markup), line, custom_id))
+        if custom_id:
+            used_ids.add(custom_id)
+
+    headings = []
+    for level, title, line, custom_id in found:
+        anchor = custom_id or unique(slugify(title, "-"), used_ids)
+        if title:
+            headings.append(Heading(level, title, anchor, line))
+    return headings
+
+
+_outlines = OrderedDict()
+_outlines_lock = threading.Lock()
+
+
+def get_document_outline(path):
+    """Return the headings of the file at ``path``, re-extracted only after it changed."""
+    key = os.path.abspath(path)
+    st_result = os.stat(key)
+    signature = (st_result.st_mtime_ns, st_result.st_size)
+    with _outlines_lock:
+        cached = _outlines.get(key)
+        if cached is not None and cached[0] == signature:
+            _outlines.move_to_end(key)
+            return cached[1]
+
+    with open(key, 'r', encoding='utf-8', errors='replace') as f:
+        headings = extract_headings(f)
+    with _outlines_lock:
+        _outlines[key] = (signature, headings)
+        _outlines.move_to_end(key)
+        while len(_outlines) > OUTLINE_CACHE_SIZE:
+            _outlines.popitem(last=False)
+    return headings
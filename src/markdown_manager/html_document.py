@@ -0,0 +1,115 @@
+"""
+Standalone HTML pages for rendered markdown.
+
+Used by the browser print view and by the static site export. Nothing here
+depends on Streamlit, so the functions also run in export worker processes.
+"""
+
+import html
+import os
+
+from render_cache import get_render_cache, render_cache_key
+from render_engine import get_render_engine
+
+# Vendored Mermaid bundle (fetched by scripts/vendor_mermaid.py); keep the
+# version in sync with MERMAID_SOURCES in viewer/viewer.js
+MERMAID_VERSION = "10.9.1"
+# SHA-256 of the release's mermaid.min.js, checked by vendor_mermaid.py on top of
+# the npm registry's integrity; record it with ``scripts/vendor_mermaid.py --pin``
+MERMAID_SHA256 = ""
+MERMAID_BUNDLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "viewer", "vendor", "mermaid.min.js")
+MERMAID_CDN_URL = f"https://cdn.jsdelivr.net/npm/mermaid@{MERMAID_VERSION}/dist/mermaid.min.js"
+
+# Bump when a change to the page template changes the pages (cached print views, site exports)
+DOCUMENT_TEMPLATE_VERSION = 1
+
+DOCUMENT_STYLE = """
+      body { margin: 16px; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; color: #333; }
+      .markdown-content { line-height: 1.6; font-size: 16px; }
+      .markdown-content h1, .markdown-content h2, .markdown-content h3 { margin-top: 1.5em; margin-bottom: 0.5em; color: #1f2937; }
+      .markdown-content pre { background-color: #f8f9fa; border: 1px solid #e9ecef; border-radius: 4px; padding: 1rem; overflow-x: auto; margin: 1em 0; }
+      .markdown-content code { background-color: #f8f9fa; padding: 0.2em 0.4em; border-radius: 3px; font-size: 0.9em; font-family: 'Monaco', 'Consolas', 'Courier New', monospace; }
+      .markdown-content pre code { background: transparent; padding: 0; }
+      .markdown-content table { border-collapse: collapse; width: 100%; margin: 1em 0; }
+      .markdown-content th, .markdown-content td { border: 1px solid #ddd; padding: 8px 12px; text-align: left; }
+      .markdown-content th { background-color: #f2f2f2; font-weight: bold; }
+      @media print {
+        @page { margin: 16mm; }
+        body { background: #fff; }
+        a[href^="http"]::after { content: " (" attr(href) ")"; font-size: 0.85em; color: #666; }
+        .no-print { display: none !important; }
+        svg { break-inside: avoid; }
+        pre, code, table, .mermaid { break-inside: avoid; }
+      }
+"""
+
+# Renders diagrams; with print_on_load the print dialog opens once every diagram
+# has rendered (or failed), not after a fixed delay
+_MERMAID_SCRIPT = """
+      function renderDiagrams() {
+        var nodes = document.querySelectorAll('.mermaid');
+        if (!window.mermaid || !nodes.length) { return Promise.resolve(nodes); }
+        try {
+          mermaid.initialize({ startOnLoad: false, securityLevel: 'loose' });
+          return Promise.resolve(mermaid.run({ nodes: nodes }))
+            .catch(function(e) { console.error('Mermaid render error', e); })
+            .then(function() { return nodes; });
+        } catch (e) {
+          console.error('Mermaid render error', e);
+          return Promise.resolve(nodes);
+        }
+      }
+"""
+_PRINT_SCRIPT = """
+      window.addEventListener('load', function() {
+        renderDiagrams()
+          .then(function(nodes) {
+            var pending = Array.prototype.filter.call(nodes, function(node) { return !node.querySelector('svg'); });
+            if (pending.length) { console.warn(pending.length + ' diagram(s) did not render'); }
+            return document.fonts ? document.fonts.ready : null;
+          })
+          .then(function() {
+            // Let the browser lay out the new SVGs before opening the dialog
+            requestAnimationFrame(function() { requestAnimationFrame(function() { window.print(); }); });
+          });
+      });
+"""
+_VIEW_SCRIPT = """
+      window.addEventListener('load', renderDiagrams);
+"""
+
+
+def render_markdown_html(content, convert=None):
+    """Convert markdown to HTML through the shared render cache.
+
+    Uses the same cache key as the app's viewer, so the viewer, the print view
+    and site exports reuse each other's results (across processes and hosts
+    when ``RENDER_CACHE_DIR`` is set). ``convert(content)`` replaces the
+    engine's conversion on a cache miss, e.g. to run it in a worker process;
+    it must produce the engine's output.
+    """
+    engine = get_render_engine()
+    key = render_cache_key(content, dict(engine.profile_config(), mermaid=True))
+    return get_render_cache().get_or_render(key, lambda: (convert or engine.convert)(content))
+
+
+def build_html_document(html_content, title="Document", mermaid_src="", print_on_load=False):
+    """Wrap rendered markdown in a standalone page with the print styles.
+
+    ``mermaid_src`` is the URL of the Mermaid bundle (omitted when empty).
+    """
+    mermaid_tag = f'    <script src="{html.escape(mermaid_src)}"></script>\n' if mermaid_src else ""
+    script = _MERMAID_SCRIPT + (_PRINT_SCRIPT if print_on_load else _VIEW_SCRIPT)
+    return f"""<!DOCTYPE html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1" />
+    <title>{html.escape(title)}</title>
+    <style>{DOCUMENT_STYLE}    </style>
+{mermaid_tag}    <script>{script}    </script>
+  </head>
+  <body>
+    <div class="markdown-content">{html_content}</div>
+  </body>
+</html>"""
@@ -0,0 +1,222 @@
+"""
+Section-paginated access to very large markdown files.
+
+Reading a file of tens of megabytes, rendering it to one HTML string and
+sending that to the browser costs memory and seconds on every rerun. Large
+files are instead memory-mapped and indexed once: the byte offsets of their
+headings (outside fenced code) divide them into sections, and sections longer
+than a page are cut at blank lines. The viewer reads, renders and sends a
+single page, so memory use and latency follow the page size, not the file size.
+"""
+
+import bisect
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from fence_scanner import Fence, scan_fences
+
+# Files at least this large open in the paginated viewer
+LARGE_DOCUMENT_THRESHOLD_MB = float(os.getenv("LARGE_DOCUMENT_THRESHOLD_MB", "2"))
+# Sections longer than this are split into several pages
+LARGE_DOCUMENT_PAGE_KB = int(os.getenv("LARGE_DOCUMENT_PAGE_KB", "256"))
+# Indexed documents kept per process
+LARGE_DOCUMENT_CACHE_SIZE = 8
+
+# level: 1-6; page: index of the page the heading starts
+Heading = namedtuple("Heading", "level title offset page")
+# heading: index into headings, or -1 for text before the first heading
+Page = namedtuple("Page", "start end heading")
+
+# Lines that can open/close a fence or be a heading; everything else is skipped unread.
+# A literal "\n" prefix lets the regex engine skip ahead far faster than "^" with MULTILINE.
+_CANDIDATE = re.compile(rb"\n((?:```|~~~|#)[^\r\n]*)")
+_FIRST_CANDIDATE = re.compile(rb"(?:```|~~~|#)[^\r\n]*")
+_BLANK_LINE = re.compile(rb"\n[ \t\r]*\n")
+_NON_BLANK = re.compile(rb"\S")
+_HEADING = re.compile(r"^(#{1,6})(.*?)#*$")
+
+
+class _Line(str):
+    """A decoded line that remembers its byte offset in the file."""
+
+    __slots__ = ("offset", "end")
+
+
+def is_large_document(path):
+    """Return True if ``path`` should be shown with the paginated viewer."""
+    try:
+        return os.path.getsize(path) >= LARGE_DOCUMENT_THRESHOLD_MB * 1024 * 1024
+    except OSError:
+        return False
+
+
+class LargeDocument:
+    """Heading and page index of a markdown file, with pages read on demand."""
+
+    def __init__(self, path, page_bytes=LARGE_DOCUMENT_PAGE_KB * 1024):
+        self.path = path
+        self.page_bytes = page_bytes
+        st_result = os.stat(path)
+        self.signature = (st_result.st_mtime_ns, st_result.st_size)
+        self.size = st_result.st_size
+        self.headings = []
+        self.pages = []
+        self._page_starts = []
+        self._heading_pages = []
+        with self._map() as data:
+            self._build_index(data)
+
+    @contextmanager
+    def _map(self):
+        # Mapped only while reading, so the file can still be saved or replaced (e.g. on Windows)
+        with open(self.path, "rb") as f:
+            if self.size == 0:
+                yield b""
+                return
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield data
+            finally:
+                data.close()
+
+    def _candidate_lines(self, data):
+        first = _FIRST_CANDIDATE.match(data)
+        if first:
+            yield self._line(first.group(), first.start(), first.end())
+        for match in _CANDIDATE.finditer(data):
+            yield self._line(match.group(1), match.start(1), match.end(1))
+
+    @staticmethod
+    def _line(raw, start, end):
+        line = _Line(raw.decode("utf-8", errors="replace"))
+        line.offset, line.end = start, end
+        return line
+
+    def _build_index(self, data):
+        # Lines that are not candidates can neither open nor close a fence, so
+        # scanning the candidates alone finds the same fences as the whole text
+        fence_starts, fence_ends = [], []
+        found = []
+        for item in scan_fences(self._candidate_lines(data)):
+            if isinstance(item, Fence):
+                fence_starts.append(item.open_line.offset)
+                fence_ends.append(item.close_line.end)
+            elif item[0] == "#":
+                match = _HEADING.match(item)
+                title = match.group(2).strip()
+                if title:
+                    found.append((len(match.group(1)), title, item.offset))
+
+        if not found and not _NON_BLANK.search(data):
+            return
+        bounds = [offset for _, _, offset in found]
+        first_heading = 0
+        if not bounds or (bounds[0] > 0 and _NON_BLANK.search(data, 0, bounds[0])):
+            bounds.insert(0, 0)
+            first_heading = -1
+        bounds.append(len(data))
+
+        pages = self.pages
+        for i in range(len(bounds) - 1):
+            heading_index = first_heading + i
+            if heading_index >= 0:
+                level, title, offset = found[heading_index]
+                self.headings.append(Heading(level, title, offset, len(pages)))
+            start, end = bounds[i], bounds[i + 1]
+            if end - start <= self.page_bytes:
+                pages.append(Page(start, end, heading_index))
+                continue
+            for start, end in self._split_section(data, start, end, fence_starts, fence_ends):
+                pages.append(Page(start, end, heading_index))
+        self._page_starts = [page.start for page in pages]
+        self._heading_pages = [heading.page for heading in self.headings]
+
+    def _split_section(self, data, start, end, fence_starts, fence_ends):
+        """Yield ``(start, end)`` pages of a section, cut at blank lines outside fences."""
+        while end - start > self.page_bytes:
+            target = start + self.page_bytes
+            cut = None
+            while cut is None:
+                match = _BLANK_LINE.search(data, target, end)
+                if match is None:
+                    break
+                candidate = match.start() + 1
+                i = bisect.bisect_right(fence_starts, candidate) - 1
+                if i >= 0 and fence_ends[i] > candidate:
+                    target = fence_ends[i]
+                else:
+                    cut = candidate
+            if cut is None or cut >= end:
+                break
+            yield start, cut
+            start = cut
+        yield start, end
+
+    def is_current(self):
+        """Return False once the file changed on disk since it was indexed."""
+        try:
+            st_result = os.stat(self.path)
+        except OSError:
+            return False
+        return (st_result.st_mtime_ns, st_result.st_size) == self.signature
+
+    def page_text(self, index):
+        """Return the markdown of page ``index``."""
+        page = self.pages[index]
+        with self._map() as data:
+            return data[page.start:page.end].decode("utf-8", errors="replace")
+
+    def page_for_offset(self, offset):
+        """Return the index of the page containing byte ``offset``."""
+        return max(0, bisect.bisect_right(self._page_starts, offset) - 1)
+
+    def page_title(self, index):
+        heading = self.pages[index].heading
+        return self.headings[heading].title if heading >= 0 else "Start of document"
+
+    def outline_window(self, page, size):
+        """Return ``(index, heading)`` pairs for about ``size`` headings around ``page``."""
+        if len(self.headings) <= size:
+            return list(enumerate(self.headings))
+        current = max(0, bisect.bisect_right(self._heading_pages, page) - 1)
+        first = min(max(0, current - size // 2), len(self.headings) - size)
+        return list(enumerate(self.headings[first:first + size], start=first))
+
+    def find_headings(self, query, limit):
+        """Return up to ``limit`` ``(index, heading)`` pairs whose title contains ``query``."""
+        query = query.lower()
+        matches = []
+        for i, heading in enumerate(self.headings):
+            if query in heading.title.lower():
+                matches.append((i, heading))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+
+_documents = OrderedDict()
+_documents_lock = threading.Lock()
+
+
+def get_large_document(path):
+    """Return the process-wide index of ``path``, rebuilding it after the file changed."""
+    key = os.path.abspath(path)
+    with _documents_lock:
+        document = _documents.get(key)
+        if document is not None:
+            _documents.move_to_end(key)
+    if document is not None and document.is_current():
+        return document
+
+    # Index outside the lock; other sessions keep reading their documents meanwhile
+    document = LargeDocument(key)
+    with _documents_lock:
+        _documents[key] = document
+        _documents.move_to_end(key)
+        while len(_documents) > LARGE_DOCUMENT_CACHE_SIZE:
+            _documents.popitem(last=False)
+    return document
@@ -0,0 +1,173 @@
+"""
+Alternative markdown engines for the render engine.
+
+``RenderEngine`` converts with pooled Python-Markdown instances by default.
+Setting ``RENDER_BACKEND=markdown-it`` opts the default profile into
+markdown-it-py, a considerably faster CommonMark parser. Its render rules
+follow the Python-Markdown profile for tables, fenced and indented code
+through the memoized highlighter (``code_highlight``), Mermaid ``<div>``
+blocks, ``attr_list`` on headings, paragraphs and links, definition lists,
+line breaks for single newlines (``nl2br``) and ``toc`` heading anchors.
+
+It is not a drop-in replacement: block structure follows CommonMark, not
+Python-Markdown. A list or fence right after a paragraph line starts a new
+block instead of continuing the paragraph, lists nest at two spaces instead
+of four, and list items separated by blank lines get ``<p>`` wrappers in
+different places. Only 5 of the repository's 15 documents render
+identically; ``benchmarks/bench_markdown_backends.py`` reports throughput
+and output parity on a corpus.
+
+markdown-it-py and mdit-py-plugins are optional; without them the engine
+stays on Python-Markdown.
+"""
+
+import re
+
+from markdown.extensions.codehilite import CodeHiliteExtension
+from markdown.extensions.toc import slugify, unique
+
+from code_highlight import highlight_code
+from fence_scanner import is_mermaid_code
+
+try:
+    import markdown_it
+    import mdit_py_plugins
+    from markdown_it import MarkdownIt
+    from mdit_py_plugins.attrs import attrs_plugin
+    from mdit_py_plugins.deflist import deflist_plugin
+except ImportError:
+    MarkdownIt = None
+
+PYTHON_MARKDOWN = "python-markdown"
+MARKDOWN_IT = "markdown-it"
+BACKENDS = (PYTHON_MARKDOWN, MARKDOWN_IT)
+
+# attr_list on the last line of a heading or paragraph: "{: #id .class key=value}"
+_BLOCK_ATTRS = re.compile(r"(?:[ ]+|\n[ ]*)\{:?[ ]*([^}\n ][^}\n]*?)[ ]*\}[ ]*$")
+_ATTR = re.compile(r"""([#.])([^\s#.}]+)|([\w-]+)=(?:"([^"]*)"|'([^']*)'|(\S+))""")
+# Inline attr_list after links, images and code spans; the plugin only knows "{...}"
+_INLINE_ATTRS_COLON = re.compile(r"(?<=[)\]`])\{:[ ]*")
+# Python-Markdown's fenced_code: "lang", ".lang" or "{.lang ...}"
+_FENCE_LANG = re.compile(r"^\{?[ ]*\.?([\w#.+-]*)")
+
+
+def available_backends():
+    """Return the names of the backends usable in this environment."""
+    return BACKENDS if MarkdownIt is not None else (PYTHON_MARKDOWN,)
+
+
+def parse_attrs(text):
+    """Parse the inside of an attr_list (``#id .class key=value``) into ``(name, value)`` pairs."""
+    attrs = []
+    classes = []
+    for prefix, name, key, double, single, bare in _ATTR.findall(text):
+        if prefix == "#":
+            attrs.append(("id", name))
+        elif prefix == ".":
+            classes.append(name)
+        else:
+            attrs.append((key, double or single or bare))
+    if classes:
+        attrs.append(("class", " ".join(classes)))
+    return attrs
+
+
+class MarkdownItBackend:
+    """markdown-it-py with render rules following the Python-Markdown profile (CommonMark blocks)."""
+
+    name = MARKDOWN_IT
+
+    def __init__(self, codehilite_configs):
+        if MarkdownIt is None:
+            raise ImportError("markdown-it-py and mdit-py-plugins are required for the markdown-it backend")
+        # The same resolved options codehilite passes to the highlighter
+        self.codehilite_config = CodeHiliteExtension(**codehilite_configs).getConfigs()
+        md = MarkdownIt("commonmark", {"html": True, "breaks": True}).enable("table")
+        md.use(deflist_plugin).use(attrs_plugin)
+        md.core.ruler.before("inline", "block_attrs", self._block_attrs)
+        md.core.ruler.push("heading_ids", self._heading_ids)
+        md.core.ruler.push("table_align", self._table_align)
+        md.add_render_rule("fence", _render_fence)
+        md.add_render_rule("code_block", _render_code_block)
+        # Shared across threads: a render keeps all of its state in its own env
+        self._md = md
+
+    def config(self):
+        """JSON-serialisable description of the backend, e.g. for cache keys."""
+        return {
+            "backend": self.name,
+            "markdown_it": markdown_it.__version__,
+            "mdit_py_plugins": mdit_py_plugins.__version__,
+            "codehilite": self.codehilite_config,
+        }
+
+    def convert(self, text):
+        return self._md.render(text, {"codehilite": self.codehilite_config})
+
+    @staticmethod
+    def _block_attrs(state):
+        """Apply trailing attr_lists of headings and paragraphs and normalise inline ones."""
+        tokens = state.tokens
+        for i, token in enumerate(tokens):
+            if token.type != "inline":
+                continue
+            opening = tokens[i - 1]
+            if opening.type in ("heading_open", "paragraph_open"):
+                match = _BLOCK_ATTRS.search(token.content)
+                if match and (opening.type == "heading_open" or "\n" in match.group(0)):
+                    for name, value in parse_attrs(match.group(1)):
+                        opening.attrSet(name, value)
+                    token.content = token.content[:match.start()]
+            if "{:" in token.content:
+                token.content = _INLINE_ATTRS_COLON.sub("{", token.content)
+
+    @staticmethod
+    def _table_align(state):
+        """Write column alignment as the tables extension does ("text-align: left;")."""
+        for token in state.tokens:
+            if token.type in ("th_open", "td_open") and "style" in token.attrs:
+                token.attrSet("style", token.attrs["style"].replace(":", ": ") + ";")
+
+    @staticmethod
+    def _heading_ids(state):
+        """Give headings the ids the toc extension would: slugs made unique with _1, _2..."""
+        tokens = state.tokens
+        used_ids = {token.attrs["id"] for token in tokens if "id" in token.attrs}
+        for i, token in enumerate(tokens):
+            if token.type != "heading_open" or "id" in token.attrs:
+                continue
+            text = "".join(
+                child.content for child in tokens[i + 1].children or ()
+                if child.type in ("text", "code_inline")
+            )
+            token.attrSet("id", unique(slugify(text, "-"), used_ids))
+
+
+def _render_fence(renderer, tokens, idx, options, env):
+    token = tokens[idx]
+    lang = _FENCE_LANG.match(token.info.strip()).group(1) or None
+    if is_mermaid_code(lang, token.content.split("\n")):
+        # Left unescaped, like the raw HTML block the Python-Markdown profile emits
+        return '<div class="mermaid">\n' + token.content + "</div>\n"
+    config = env["codehilite"]
+    if not config.get("use_pygments"):
+        return renderer.fence(tokens, idx, options, env)
+    return highlight_code(token.content, lang, config) + "\n"
+
+
+def _render_code_block(renderer, tokens, idx, options, env):
+    config = env["codehilite"]
+    if not config.get("use_pygments"):
+        return renderer.code_block(tokens, idx, options, env)
+    return highlight_code(tokens[idx].content, None, config, shebang=True) + "\n"
+
+
+def create_backend(name, codehilite_configs):
+    """Return the backend called ``name``, or None for Python-Markdown.
+
+    Unknown names and missing optional packages also give None, so a
+    misconfigured deployment keeps rendering with Python-Markdown.
+    """
+    if name == MARKDOWN_IT and MarkdownIt is not None:
+        return MarkdownItBackend(codehilite_configs)
+    return None
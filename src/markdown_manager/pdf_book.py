@@ -0,0 +1,222 @@
+"""
+One PDF from many markdown files, e.g. a handbook exported from a folder.
+
+Each file is rendered and converted to ReportLab flowables
+(``MarkdownToPDFConverter``, exactly as for a single-document export) and
+the flowables are merged in the order the files were given. Books of more
+than ``PDF_BOOK_INLINE_MAX_BYTES`` of markdown are converted by a pool of at
+most ``PDF_BOOK_WORKERS`` processes, started for the book and stopped when it
+is built or fails; starting the processes costs more than converting a
+smaller book in the calling process. The
+book starts with a title page and a generated table of contents, every
+document starts on a new page under a header with its path, and the pages
+are numbered in the footer. The PDF outline (bookmarks) lists the documents
+and their headings down to ``h3``.
+
+The table of contents needs the final page numbers, so the merged story is
+laid out more than once (``multiBuild``); layout, not conversion, dominates
+the time of a large book.
+"""
+
+import html
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+from reportlab.platypus.tableofcontents import TableOfContents
+
+from html_document import render_markdown_html
+from pdf_export import PAGE_MARGIN, PAGE_SIZE, MarkdownToPDFConverter, PdfBuffer, layout_progress_callback
+
+# Processes converting documents; 1 converts in the calling process. Every
+# export worker may run a book, so the cap bounds the processes per export.
+PDF_BOOK_WORKERS = int(os.getenv("PDF_BOOK_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Books with less markdown than this are converted in the calling process
+PDF_BOOK_INLINE_MAX_BYTES = int(os.getenv("PDF_BOOK_INLINE_MAX_BYTES", str(64 * 1024)))
+# Outline levels shown in the table of contents: documents, then their h1 headings
+PDF_BOOK_TOC_DEPTH = 2
+
+# Outline level of each paragraph style; the book's own styles sit above the documents'
+OUTLINE_LEVELS = {"BookDocument": 0, "CustomH1": 1, "CustomH2": 2, "CustomH3": 3}
+
+_TITLE_STYLE = ParagraphStyle(
+    name="BookTitle", fontName="Helvetica-Bold", fontSize=28, leading=34,
+    textColor=colors.HexColor("#2c3e50"), spaceAfter=12
+)
+_SUBTITLE_STYLE = ParagraphStyle(
+    name="BookSubtitle", fontName="Helvetica", fontSize=12, leading=16,
+    textColor=colors.HexColor("#57606a"), spaceAfter=24
+)
+_CONTENTS_STYLE = ParagraphStyle(
+    name="BookContents", fontName="Helvetica-Bold", fontSize=18, leading=22,
+    textColor=colors.HexColor("#34495e"), spaceAfter=12
+)
+_DOCUMENT_STYLE = ParagraphStyle(
+    name="BookDocument", fontName="Helvetica", fontSize=9, leading=12,
+    textColor=colors.HexColor("#57606a"), spaceAfter=12
+)
+_TOC_LEVEL_STYLES = [
+    ParagraphStyle(name="BookTOC0", fontName="Helvetica-Bold", fontSize=11, leading=14,
+                   leftIndent=0, firstLineIndent=0, spaceBefore=6),
+    ParagraphStyle(name="BookTOC1", fontName="Helvetica", fontSize=10, leading=13,
+                   leftIndent=18, firstLineIndent=0),
+]
+
+# pages: page count of the PDF; documents: documents merged;
+# failed: list of (rel_path, error message) left out of the book
+BookSummary = namedtuple("BookSummary", "pages documents failed")
+
+
+def _document_elements(task):
+    """Convert one file to flowables; runs in a worker process.
+
+    Returns ``(rel_path, elements, error)`` with ``error`` None on success.
+    """
+    index, rel_path, full_path, width = task
+    try:
+        with open(full_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        converter = MarkdownToPDFConverter(width, anchor_prefix=f"doc{index}-")
+        return rel_path, converter.html_to_pdf_elements(render_markdown_html(content)), None
+    except Exception as e:
+        return rel_path, None, str(e)
+
+
+class _BookTemplate(SimpleDocTemplate):
+    """Document template that records outline entries and TOC entries for headings."""
+
+    def beforeDocument(self):
+        # Every layout pass draws on a new canvas, so the outline starts over
+        self._outline_key = 0
+        self._outline_level = -1
+
+    def afterFlowable(self, flowable):
+        if not isinstance(flowable, Paragraph):
+            return
+        level = OUTLINE_LEVELS.get(flowable.style.name)
+        if level is None:
+            return
+        # A PDF outline cannot skip levels, e.g. an h3 right below a document
+        level = min(level, self._outline_level + 1)
+        self._outline_level = level
+        self._outline_key += 1
+        key = f"outline{self._outline_key}"
+        text = flowable.getPlainText()
+        self.canv.bookmarkPage(key)
+        self.canv.addOutlineEntry(text, key, level=level, closed=level > 0)
+        if level < PDF_BOOK_TOC_DEPTH:
+            self.notify("TOCEntry", (level, text, self.page, key))
+
+
+def _draw_page_number(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica", 9)
+    canvas.setFillColor(colors.HexColor("#57606a"))
+    canvas.drawCentredString(PAGE_SIZE[0] / 2, PAGE_MARGIN / 2, str(doc.page))
+    canvas.restoreState()
+
+
+def _title_page(title, documents):
+    toc = TableOfContents()
+    toc.levelStyles = _TOC_LEVEL_STYLES
+    return [
+        Paragraph(html.escape(title), _TITLE_STYLE),
+        Paragraph(f"{documents} document(s)", _SUBTITLE_STYLE),
+        Spacer(1, 12),
+        Paragraph("Contents", _CONTENTS_STYLE),
+        toc,
+    ]
+
+
+def _markdown_bytes(files):
+    total = 0
+    for _, full_path in files:
+        try:
+            total += os.path.getsize(full_path)
+        except OSError:
+            pass
+    return total
+
+
+def _convert_in_pool(tasks, workers, progress):
+    # spawn: the app calls this from a multi-threaded server process
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+    # Not executor.map: it cancels the remaining futures on an exception,
+    # and Python 3.11 trips over cancelled futures of killed workers
+    futures = [executor.submit(_document_elements, task) for task in tasks]
+    try:
+        results = _collect((future.result() for future in futures), len(tasks), progress)
+    except BaseException:
+        # E.g. a cancelled export: stop converting instead of waiting for the
+        # remaining documents; killed workers fail every pending document
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False)
+        raise
+    executor.shutdown()
+    return results
+
+
+def _collect(results, total, progress):
+    documents = []
+    failed = []
+    for done, (rel_path, elements, error) in enumerate(results, start=1):
+        if error is not None:
+            failed.append((rel_path, error))
+        else:
+            documents.append((rel_path, elements))
+        if progress:
+            progress(done, total, rel_path)
+    return documents, failed
+
+
+def build_book(files, output, title="Markdown export", workers=PDF_BOOK_WORKERS, progress=None,
+               layout_progress=None, inline_max_bytes=PDF_BOOK_INLINE_MAX_BYTES):
+    """Merge markdown files into one PDF written to ``output`` (a path or file).
+
+    ``files`` are ``(rel_path, full_path)`` pairs in book order, e.g. from the
+    file index. ``progress(done, total, rel_path)`` is called after each
+    converted document and ``layout_progress(done, total)`` while the merged
+    elements are laid out. Files that cannot be read or converted are left
+    out and reported in the summary. Books smaller than
+    ``inline_max_bytes`` are converted without a process pool.
+    """
+    doc = _BookTemplate(
+        output,
+        pagesize=PAGE_SIZE,
+        rightMargin=PAGE_MARGIN,
+        leftMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN,
+        bottomMargin=PAGE_MARGIN,
+        title=title
+    )
+    tasks = [(index, rel_path, full_path, doc.width) for index, (rel_path, full_path) in enumerate(files)]
+    total = len(tasks)
+    if workers > 1 and total > 1 and _markdown_bytes(files) >= inline_max_bytes:
+        documents, failed = _convert_in_pool(tasks, min(workers, total), progress)
+    else:
+        documents, failed = _collect(map(_document_elements, tasks), total, progress)
+
+    story = _title_page(title, len(documents))
+    for rel_path, elements in documents:
+        story.append(PageBreak())
+        story.append(Paragraph(html.escape(rel_path), _DOCUMENT_STYLE))
+        story.extend(elements)
+    if layout_progress is not None:
+        doc.setProgressCallBack(layout_progress_callback(layout_progress))
+    # The title page goes without a number
+    doc.multiBuild(story, onLaterPages=_draw_page_number)
+    return BookSummary(doc.page, len(documents), failed)
+
+
+def build_book_bytes(files, title="Markdown export", workers=PDF_BOOK_WORKERS, progress=None,
+                     layout_progress=None, inline_max_bytes=PDF_BOOK_INLINE_MAX_BYTES):
+    """``build_book`` in memory; returns ``(pdf_bytes, summary)``."""
+    buffer = PdfBuffer()
+    summary = build_book(files, buffer, title, workers=workers, progress=progress,
+                         layout_progress=layout_progress, inline_max_bytes=inline_max_bytes)
+    return buffer.getvalue(), summary
@@ -0,0 +1,572 @@
+"""
+Conversion of markdown to ReportLab flowables for PDF export.
+
+The converter does not parse markdown itself: it walks the HTML of the render
+engine (served from the render cache when the document was viewed before) in
+a single streaming pass and emits ReportLab flowables as elements close, so
+the PDF gets the same structure as the viewer: headings with anchors,
+paragraphs with inline markup, nested ordered and unordered lists, tables,
+block quotes, definition lists, code blocks and Mermaid sources.
+
+Paragraph styles are built once per process (``get_pdf_styles``) and shared
+by every export. Nothing here depends on Streamlit, so ``html_to_pdf`` can run
+in a worker process (see ``worker_pool``).
+"""
+
+import html
+import re
+import threading
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import (HRFlowable, ListFlowable, ListItem, Paragraph, Preformatted,
+                                SimpleDocTemplate, Table, TableStyle)
+
+from html_document import render_markdown_html
+
+# Bump when a change to the converter changes the PDFs it produces (cached exports)
+CONVERTER_VERSION = 1
+
+PAGE_SIZE = A4
+PAGE_MARGIN = 72
+# Width of the text frame on a page
+FRAME_WIDTH = PAGE_SIZE[0] - 2 * PAGE_MARGIN
+
+LIST_INDENT = 18
+QUOTE_INDENT = 18
+# Block quotes nested deeper than this share the innermost style
+MAX_QUOTE_DEPTH = 4
+
+HEADING_STYLES = {
+    "h1": "CustomH1", "h2": "CustomH2", "h3": "CustomH3",
+    "h4": "CustomH4", "h5": "CustomH4", "h6": "CustomH4",
+}
+# Inline HTML tags and the ReportLab paragraph markup they become
+INLINE_MARKUP = {
+    "strong": ("<b>", "</b>"), "b": ("<b>", "</b>"),
+    "em": ("<i>", "</i>"), "i": ("<i>", "</i>"),
+    "code": ('<font name="Courier">', "</font>"),
+    "del": ("<strike>", "</strike>"), "s": ("<strike>", "</strike>"), "strike": ("<strike>", "</strike>"),
+    "u": ("<u>", "</u>"), "ins": ("<u>", "</u>"),
+    "sup": ("<super>", "</super>"), "sub": ("<sub>", "</sub>"),
+}
+# Links that mean something outside the exported document
+_EXTERNAL_LINK = re.compile(r"^(?:https?|mailto|ftp):", re.IGNORECASE)
+_TEXT_ALIGN = re.compile(r"text-align:\s*(left|center|right)")
+_ALIGNMENTS = {"left": TA_LEFT, "center": TA_CENTER, "right": TA_RIGHT}
+_ALIGN_NAMES = {TA_LEFT: "LEFT", TA_CENTER: "CENTER", TA_RIGHT: "RIGHT"}
+
+# One token of the engine's HTML: text, a start or end tag, a comment or a lone "<"
+_TOKEN = re.compile(
+    r"(?P<text>[^<]+)"
+    r"|<(?P<close>/)?(?P<tag>[a-zA-Z][a-zA-Z0-9]*)(?P<attrs>(?:[^>\"']|\"[^\"]*\"|'[^']*')*)>"
+    r"|<!--.*?-->|<![^>]*>|(?P<stray><)",
+    re.DOTALL
+)
+_ATTR = re.compile(r"""([a-zA-Z_:][-\w:.]*)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>/]+))""")
+_MERMAID_CLASS = re.compile(r"""\bclass\s*=\s*["'][^"']*\bmermaid\b""")
+_BR = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+# Left plus right padding of table cells (ReportLab's default is 6 points each)
+_CELL_PADDING = 12
+# Narrowest width handed to nested content, e.g. a table inside a table cell
+_MIN_WIDTH = 24
+_CELL_OPEN = re.compile(r"<t[dh][\s>]", re.IGNORECASE)
+
+_TABLE_STYLE = TableStyle([
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#d0d7de")),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("TOPPADDING", (0, 0), (-1, -1), 4),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+])
+
+_styles = None
+_styles_lock = threading.Lock()
+
+
+def _build_styles():
+    styles = getSampleStyleSheet()
+    body = ParagraphStyle(
+        name='CustomBody',
+        parent=styles['BodyText'],
+        fontSize=11,
+        leading=14,
+        textColor=colors.HexColor('#333333'),
+        spaceAfter=8
+    )
+    styles.add(ParagraphStyle(
+        name='CustomH1',
+        parent=styles['Heading1'],
+        fontSize=24,
+        leading=28,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=12,
+        spaceBefore=12
+    ))
+    styles.add(ParagraphStyle(
+        name='CustomH2',
+        parent=styles['Heading2'],
+        fontSize=18,
+        leading=22,
+        textColor=colors.HexColor('#34495e'),
+        spaceAfter=10,
+        spaceBefore=10
+    ))
+    styles.add(ParagraphStyle(
+        name='CustomH3',
+        parent=styles['Heading3'],
+        fontSize=14,
+        leading=18,
+        textColor=colors.HexColor('#34495e'),
+        spaceAfter=8,
+        spaceBefore=8
+    ))
+    styles.add(ParagraphStyle(
+        name='CustomH4',
+        parent=styles['Heading4'],
+        fontSize=12,
+        leading=15,
+        textColor=colors.HexColor('#34495e'),
+        spaceAfter=6,
+        spaceBefore=6
+    ))
+    styles.add(ParagraphStyle(
+        name='CodeBlock',
+        parent=styles['Code'],
+        fontSize=9,
+        fontName='Courier',
+        backgroundColor=colors.HexColor('#f6f8fa'),
+        leftIndent=10,
+        rightIndent=10,
+        spaceAfter=10,
+        spaceBefore=10
+    ))
+    styles.add(body)
+    styles.add(ParagraphStyle(name='ListBody', parent=body, spaceAfter=2))
+    styles.add(ParagraphStyle(name='DefinitionTerm', parent=body, fontName='Helvetica-Bold', spaceAfter=2))
+    styles.add(ParagraphStyle(name='DefinitionBody', parent=body, leftIndent=LIST_INDENT))
+    for depth in range(1, MAX_QUOTE_DEPTH + 1):
+        styles.add(ParagraphStyle(
+            name=f'Quote{depth}',
+            parent=body,
+            leftIndent=QUOTE_INDENT * depth,
+            textColor=colors.HexColor('#57606a')
+        ))
+    for align, alignment in _ALIGNMENTS.items():
+        styles.add(ParagraphStyle(
+            name=f'TableCell-{align}', parent=body, fontSize=10, leading=12, spaceAfter=0, alignment=alignment
+        ))
+        styles.add(ParagraphStyle(
+            name=f'TableHeader-{align}', parent=styles[f'TableCell-{align}'], fontName='Helvetica-Bold'
+        ))
+    return styles
+
+
+def get_pdf_styles():
+    """Return the process-wide stylesheet of the PDF export, built on first use.
+
+    Treat it as read-only: it is shared by all exports and threads.
+    """
+    global _styles
+    with _styles_lock:
+        if _styles is None:
+            _styles = _build_styles()
+        return _styles
+
+
+class _Context:
+    """Where block flowables currently go, and the style of bare text there."""
+
+    __slots__ = ("flowables", "style", "width")
+
+    def __init__(self, flowables, style, width):
+        self.flowables = flowables
+        self.style = style
+        self.width = width
+
+
+class _FlowableBuilder:
+    """Single pass over rendered markdown HTML that collects ReportLab flowables.
+
+    The HTML comes from the render engine, so a regex tokenizer is enough and
+    several times faster than ``html.parser``. Code blocks and Mermaid
+    diagrams are cut out whole instead of visiting every highlighting span.
+    """
+
+    def __init__(self, styles, width, anchor_prefix=""):
+        self.styles = styles
+        self.anchor_prefix = anchor_prefix
+        self.elements = []
+        self._contexts = [_Context(self.elements, 'CustomBody', width)]
+        # Paragraph markup collected for the current text block and its style
+        self._inline = []
+        self._block_style = None
+        self._anchor = None
+        # Open inline tags as (tag, opening, closing) markup, innermost last,
+        # and those already open when the current block started
+        self._open_inline = []
+        self._carried_inline = []
+        self._lists = []
+        self._tables = []
+        self._quote_depth = 0
+
+    def build(self, html_content):
+        pos = 0
+        length = len(html_content)
+        while pos < length:
+            match = _TOKEN.match(html_content, pos)
+            pos = match.end()
+            if match.group("text") is not None:
+                self._inline.append(_paragraph_text(match.group("text")))
+                continue
+            tag = match.group("tag")
+            if tag is None:
+                if match.group("stray"):
+                    self._inline.append("&lt;")
+                continue  # comment or doctype
+            tag = tag.lower()
+            if match.group("close"):
+                self._end(tag)
+                continue
+            raw_attrs = match.group("attrs")
+            if tag == "pre" or (tag == "div" and _MERMAID_CLASS.search(raw_attrs)):
+                end = html_content.find(f"</{tag}>", pos)
+                end = length if end < 0 else end
+                self._code_block(html_content[pos:end])
+                pos = end + len(tag) + 3
+            elif tag == "table":
+                self._start_table(_first_row_cells(html_content, pos))
+            elif tag in ("script", "style"):
+                end = html_content.find(f"</{tag}>", pos)
+                pos = length if end < 0 else end + len(tag) + 3
+            else:
+                self._start(tag, raw_attrs)
+        self._flush()
+        return self.elements
+
+    def _start(self, tag, raw_attrs):
+        if tag in INLINE_MARKUP:
+            opening, closing = INLINE_MARKUP[tag]
+            self._inline.append(opening)
+            self._open_inline.append((tag, opening, closing))
+        elif tag == "a":
+            href = _attrs(raw_attrs).get("href", "")
+            if _EXTERNAL_LINK.match(href):
+                opening = f'<a href="{html.escape(href)}" color="#0366d6">'
+                self._inline.append(opening)
+                self._open_inline.append((tag, opening, "</a>"))
+            else:
+                self._open_inline.append((tag, "", ""))
+        elif tag == "br":
+            self._inline.append("<br/>")
+        elif tag == "img":
+            alt = _attrs(raw_attrs).get("alt")
+            if alt:
+                self._inline.append(f"<i>[{html.escape(alt, quote=False)}]</i>")
+        elif tag in ("p", "dt", "dd") or tag in HEADING_STYLES:
+            self._flush()
+            if tag in HEADING_STYLES:
+                self._block_style = HEADING_STYLES[tag]
+                self._anchor = _attrs(raw_attrs).get("id")
+            elif tag == "dt":
+                self._block_style = 'DefinitionTerm'
+            elif tag == "dd":
+                self._block_style = 'DefinitionBody'
+        elif tag in ("ul", "ol"):
+            self._flush()
+            start = _attrs(raw_attrs).get("start", "1") if tag == "ol" else "1"
+            self._lists.append((tag == "ol", int(start) if start.isdigit() else 1, []))
+        elif tag == "li":
+            self._flush()
+            parent = self._contexts[-1]
+            self._contexts.append(_Context([], 'ListBody', max(parent.width - LIST_INDENT, _MIN_WIDTH)))
+        elif tag == "blockquote":
+            self._flush()
+            self._quote_depth += 1
+            parent = self._contexts[-1]
+            depth = min(self._quote_depth, MAX_QUOTE_DEPTH)
+            self._contexts.append(_Context(parent.flowables, f'Quote{depth}',
+                                           max(parent.width - QUOTE_INDENT, _MIN_WIDTH)))
+        elif tag == "tr" and self._tables:
+            self._tables[-1]["rows"].append([])
+        elif tag in ("th", "td") and self._tables:
+            self._flush()
+            match = _TEXT_ALIGN.search(raw_attrs)
+            kind = "TableHeader" if tag == "th" else "TableCell"
+            # Block content of the cell, e.g. a nested table, gets the column's width
+            table = self._tables[-1]
+            columns = max(table["columns"], len(table["rows"][-1]) + 1 if table["rows"] else 1)
+            width = max(table["width"] / columns - _CELL_PADDING, _MIN_WIDTH)
+            self._contexts.append(_Context([], f"{kind}-{match.group(1) if match else 'left'}", width))
+        elif tag == "hr":
+            self._flush()
+            self._add(HRFlowable(width="100%", thickness=0.5, color=colors.HexColor("#d0d7de"),
+                                 spaceBefore=6, spaceAfter=6))
+
+    def _end(self, tag):
+        if tag in INLINE_MARKUP or tag == "a":
+            self._close_inline(tag)
+        elif tag in ("p", "dt", "dd") or tag in HEADING_STYLES:
+            self._flush()
+        elif tag in ("ul", "ol") and self._lists:
+            self._flush()
+            ordered, start, items = self._lists.pop()
+            if items:
+                depth = len(self._lists)
+                self._add(ListFlowable(
+                    items,
+                    bulletType="1" if ordered else "bullet",
+                    start=start if ordered else ("•" if depth == 0 else "–"),
+                    leftIndent=LIST_INDENT,
+                    bulletFontSize=10 if ordered else 8,
+                ))
+        elif tag == "li" and len(self._contexts) > 1:
+            self._flush()
+            context = self._contexts.pop()
+            if self._lists:
+                self._lists[-1][2].append(ListItem(context.flowables or [Paragraph("", self.styles['ListBody'])]))
+            else:
+                # A stray <li> in raw HTML: keep its content
+                self._contexts[-1].flowables.extend(context.flowables)
+        elif tag == "blockquote" and self._quote_depth:
+            self._flush()
+            self._quote_depth -= 1
+            self._contexts.pop()
+        elif tag in ("th", "td") and self._tables and len(self._contexts) > 1:
+            context = self._contexts[-1]
+            if context.flowables:
+                self._flush()
+                cell = context.flowables
+            else:
+                # Plain cell text; the table decides whether it needs a Paragraph
+                cell = (self._take_text(), context.style)
+            self._contexts.pop()
+            rows = self._tables[-1]["rows"]
+            if not rows:
+                rows.append([])
+            rows[-1].append(cell)
+        elif tag == "thead" and self._tables:
+            self._tables[-1]["header_rows"] = len(self._tables[-1]["rows"])
+        elif tag == "table" and self._tables:
+            self._add_table(self._tables.pop())
+
+    def _start_table(self, columns):
+        """Open a table whose first row has ``columns`` cells (as far as a look ahead can tell)."""
+        self._flush()
+        self._tables.append({
+            "rows": [], "header_rows": 0, "width": self._contexts[-1].width, "columns": max(columns, 1)
+        })
+
+    def _add(self, flowable):
+        self._contexts[-1].flowables.append(flowable)
+
+    def _close_inline(self, tag):
+        """Close the innermost open ``tag``, reopening tags raw HTML left open inside it."""
+        for index in range(len(self._open_inline) - 1, -1, -1):
+            if self._open_inline[index][0] == tag:
+                break
+        else:
+            return
+        inner = self._open_inline[index + 1:]
+        self._inline.extend(closing for _, _, closing in reversed(inner))
+        self._inline.append(self._open_inline[index][2])
+        self._inline.extend(opening for _, opening, _ in inner)
+        del self._open_inline[index]
+
+    def _take_text(self):
+        """Return the markup collected for the current block and start the next one.
+
+        Raw HTML can leave inline tags open across blocks, e.g. ``<b>`` in one
+        paragraph and ``</b>`` in the next; a Paragraph must be balanced, so
+        they are closed here and reopened in the next block, like a browser does.
+        """
+        text = "".join(self._inline).strip()
+        self._inline = []
+        carried, self._carried_inline = self._carried_inline, list(self._open_inline)
+        if not carried and not self._open_inline:
+            return text
+        if not _TAG.sub("", text).strip():
+            return ""
+        return ("".join(opening for _, opening, _ in carried) + text
+                + "".join(closing for _, _, closing in reversed(self._open_inline)))
+
+    def _flush(self):
+        """Turn the text collected so far into a paragraph of the current block's style."""
+        text = self._take_text()
+        style = self._block_style or self._contexts[-1].style
+        anchor, self._anchor = self._anchor, None
+        self._block_style = None
+        if not text:
+            return
+        if anchor:
+            text = f'<a name="{html.escape(self.anchor_prefix + anchor)}"/>{text}'
+        self._add(Paragraph(text, self.styles[style]))
+
+    def _code_block(self, inner_html):
+        self._flush()
+        text = _BR.sub("\n", inner_html)
+        text = html.unescape(_TAG.sub("", text) if "<" in text else text).strip("\n")
+        if text:
+            self._add(Preformatted(text, self.styles['CodeBlock']))
+
+    def _add_table(self, table):
+        rows = [row for row in table["rows"] if row]
+        if not rows:
+            return
+        columns = max(len(row) for row in rows)
+        # Deeply nested tables overflow their cell rather than get no room at all
+        column_width = max(table["width"] / columns, _MIN_WIDTH)
+        header_rows = table["header_rows"]
+        alignments = {}
+        data = []
+        for row in rows:
+            cells = []
+            for c, cell in enumerate(row):
+                if isinstance(cell, tuple):
+                    style = self.styles[cell[1]]
+                    alignments[c] = style.alignment
+                    cell = _table_cell(cell[0], style, column_width)
+                cells.append(cell)
+            data.append(cells + [""] * (columns - len(cells)))
+        flowable = Table(data, colWidths=[column_width] * columns, repeatRows=header_rows, hAlign="LEFT")
+        flowable.setStyle(_TABLE_STYLE)
+        # Font, colour and alignment of the cells kept as plain strings
+        cell_style, header_style = self.styles['TableCell-left'], self.styles['TableHeader-left']
+        commands = [
+            ("FONT", (0, 0), (-1, -1), cell_style.fontName, cell_style.fontSize, cell_style.leading),
+            ("TEXTCOLOR", (0, 0), (-1, -1), cell_style.textColor),
+        ]
+        if header_rows:
+            commands.append(("FONT", (0, 0), (-1, header_rows - 1), header_style.fontName,
+                             header_style.fontSize, header_style.leading))
+            commands.append(("BACKGROUND", (0, 0), (-1, header_rows - 1), colors.HexColor("#f6f8fa")))
+        for c, alignment in alignments.items():
+            if alignment != TA_LEFT:
+                commands.append(("ALIGN", (c, 0), (c, -1), _ALIGN_NAMES[alignment]))
+        flowable.setStyle(commands)
+        flowable.spaceAfter = 10
+        self._add(flowable)
+
+
+def _first_row_cells(html_content, pos):
+    """Count the cells opened between ``pos`` (just after ``<table>``) and the first ``</tr>``."""
+    end = html_content.find("</tr>", pos)
+    return len(_CELL_OPEN.findall(html_content, pos, len(html_content) if end < 0 else end))
+
+
+def _table_cell(markup, style, column_width):
+    """Return a table cell as a plain string when it fits on one line, else as a Paragraph.
+
+    Plain strings skip paragraph parsing and line breaking, which dominate
+    the cost of large tables.
+    """
+    if "<" not in markup:
+        text = html.unescape(markup)
+        if stringWidth(text, style.fontName, style.fontSize) <= column_width - _CELL_PADDING:
+            return text
+    return Paragraph(markup, style) if markup else ""
+
+
+def _attrs(raw_attrs):
+    return {
+        name.lower(): html.unescape(next((v for v in values if v), ""))
+        for name, *values in _ATTR.findall(raw_attrs)
+    }
+
+
+def _paragraph_text(text):
+    """HTML text as ReportLab paragraph markup: entities resolved, markup characters escaped."""
+    if "&" in text:
+        text = html.unescape(text)
+    return html.escape(text, quote=False) if ("<" in text or ">" in text or "&" in text) else text
+
+
+class MarkdownToPDFConverter:
+    """Convert markdown to PDF using ReportLab"""
+
+    def __init__(self, width=FRAME_WIDTH, anchor_prefix=""):
+        self.styles = get_pdf_styles()
+        self.width = width
+        # Prepended to heading anchors, keeping them unique when documents are merged
+        self.anchor_prefix = anchor_prefix
+
+    def html_to_pdf_elements(self, html_content):
+        """Convert rendered markdown HTML to ReportLab elements in one pass"""
+        return _FlowableBuilder(self.styles, self.width, self.anchor_prefix).build(html_content)
+
+    def markdown_to_pdf_elements(self, markdown_text):
+        """Convert markdown text to ReportLab elements"""
+        return self.html_to_pdf_elements(render_markdown_html(markdown_text))
+
+
+def layout_progress_callback(progress):
+    """Adapt ``progress(done, total)`` to ReportLab's progress callback.
+
+    Called with the number of top-level flowables laid out so far; raising
+    from ``progress`` aborts the build (e.g. to cancel an export). Each layout
+    pass of a ``multiBuild`` counts from zero again.
+    """
+    total = 0
+
+    def callback(kind, value):
+        nonlocal total
+        if kind == "SIZE_EST":
+            total = value
+        elif kind == "PROGRESS":
+            progress(min(value, total), total)
+    return callback
+
+
+def html_to_pdf(html_content, output, progress=None):
+    """Lay rendered markdown HTML out on A4 pages and write the PDF to ``output`` (a path or file).
+
+    ``progress(done, total)`` reports the elements laid out (see ``layout_progress_callback``).
+    """
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=PAGE_SIZE,
+        rightMargin=PAGE_MARGIN,
+        leftMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN,
+        bottomMargin=PAGE_MARGIN
+    )
+    if progress is not None:
+        doc.setProgressCallBack(layout_progress_callback(progress))
+    doc.build(MarkdownToPDFConverter(doc.width).html_to_pdf_elements(html_content))
+
+
+class PdfBuffer:
+    """Write target keeping the PDF ReportLab writes as it is, without copying it.
+
+    ReportLab assembles the whole document in memory and writes it with a
+    single ``write``; a ``BytesIO`` would copy it into its own buffer, and
+    the peak would be two PDFs. Memory is not bounded below one PDF either
+    way, so spooling to disk would not help.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(data)
+        return len(data)
+
+    def getvalue(self):
+        if len(self._chunks) == 1:
+            return self._chunks[0]
+        return b"".join(self._chunks)
+
+
+def html_to_pdf_bytes(html_content, progress=None):
+    """Lay rendered markdown HTML out as a PDF in memory and return its bytes."""
+    buffer = PdfBuffer()
+    html_to_pdf(html_content, buffer, progress)
+    return buffer.getvalue()
+
+
+def build_pdf(markdown_content, output):
+    """Render markdown and write it as a PDF to ``output`` (a path or file)."""
+    html_to_pdf(render_markdown_html(markdown_content), output)
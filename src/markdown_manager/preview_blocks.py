@@ -0,0 +1,130 @@
+"""
+Block-incremental rendering for the live editor preview.
+
+The document is split into top-level blocks (fenced code, headings, paragraphs,
+tables, lists, quotes) and each block is rendered on its own and cached by its
+content hash. After an edit only the blocks whose text changed are converted
+again, so preview latency follows the size of the edit rather than the size of
+the document. Documents using features that span blocks (reference-style link
+definitions, ``[TOC]`` markers, raw HTML) are rendered in one piece instead.
+"""
+
+import re
+
+from fence_scanner import scan_fences
+
+# Python-Markdown only recognises hash headings in the first column
+_ATX_HEADING = re.compile(r"^#{1,6}")
+_LIST_ITEM = re.compile(r"^ {0,3}([*+-]|\d+[.)])\s")
+_BLOCKQUOTE = re.compile(r"^ {0,3}>")
+_DEF_LIST_ITEM = re.compile(r"^ {0,3}:\s")
+
+# Features whose output depends on other blocks of the document
+_CROSS_BLOCK = re.compile(
+    r"^ {0,3}\[[^\]]+\]:\s"      # reference-style link definition
+    r"|^ {0,3}\[TOC\]\s*$"       # table of contents marker
+    r"|^ {0,3}<[A-Za-z!/]",      # raw HTML block
+    re.MULTILINE
+)
+_HEADING_ID = re.compile(r'(<h[1-6][^>]*?\sid=")([^"]*)(")')
+
+
+def needs_full_render(text):
+    """Return True if ``text`` uses constructs that cannot be rendered block by block."""
+    return _CROSS_BLOCK.search(text) is not None
+
+
+def split_blocks(text):
+    """Split markdown into top-level blocks that render independently.
+
+    Blank lines separate blocks except inside fenced code, which is kept
+    whole; fences are found by ``scan_fences``, so they open and close
+    exactly where the renderer's do. Indented lines, further list items, quote lines and definitions
+    after a blank line stay with the block they continue; hash headings
+    always form their own block.
+    """
+    blocks = []
+    current = []
+    pending_blank = 0
+
+    def flush():
+        if current:
+            blocks.append("\n".join(current))
+            current.clear()
+
+    for line in scan_fences(text.split("\n")):
+        if not isinstance(line, str):
+            # A fence directly under text stays in that block
+            if pending_blank or not current:
+                flush()
+            pending_blank = 0
+            current.extend(line.source_lines())
+            continue
+
+        if not line.strip():
+            if current:
+                pending_blank += 1
+            continue
+
+        if _ATX_HEADING.match(line):
+            flush()
+            pending_blank = 0
+            blocks.append(line)
+            continue
+
+        if current and pending_blank and not _continues(current[0], line):
+            flush()
+        elif current and pending_blank:
+            current.extend([""] * pending_blank)
+        pending_blank = 0
+        current.append(line)
+
+    flush()
+    return blocks
+
+
+def _continues(first_line, line):
+    """Return True if ``line`` after a blank line still belongs to the block starting with ``first_line``."""
+    if line[:1] in (" ", "\t"):
+        return True
+    if _LIST_ITEM.match(first_line) and _LIST_ITEM.match(line):
+        return True
+    if _BLOCKQUOTE.match(first_line) and _BLOCKQUOTE.match(line):
+        return True
+    return _DEF_LIST_ITEM.match(line) is not None
+
+
+def dedupe_heading_ids(html):
+    """Make heading ids unique across separately rendered blocks.
+
+    Mirrors the toc extension, which suffixes repeated ids with ``_1``, ``_2``...
+    """
+    seen = set()
+
+    def unique(match):
+        base = match.group(2)
+        heading_id = base
+        n = 0
+        while heading_id in seen:
+            n += 1
+            heading_id = f"{base}_{n}"
+        seen.add(heading_id)
+        return f"{match.group(1)}{heading_id}{match.group(3)}"
+
+    return _HEADING_ID.sub(unique, html)
+
+
+def render_incremental(text, render_block, cache=None, cache_key=None):
+    """Render ``text`` block by block and join the HTML.
+
+    ``render_block(block)`` converts one block. With a ``cache`` (a
+    ``RenderCache``) and ``cache_key(block)`` each block's HTML is reused until
+    its text changes.
+    """
+    parts = []
+    for block in split_blocks(text):
+        if cache is not None:
+            parts.append(cache.get_or_render(cache_key(block), lambda: render_block(block)))
+        else:
+            parts.append(render_block(block))
+    return dedupe_heading_ids("\n".join(part for part in parts if part))
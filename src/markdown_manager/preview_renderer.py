@@ -0,0 +1,109 @@
+"""
+Debounced background rendering for the editor preview.
+
+Each editing session owns a ``PreviewRenderer``. The editor submits every new
+version of the text; a worker thread waits until no edit arrived for the
+debounce window and then renders only the newest text. Until that finishes
+the UI keeps showing the last completed preview, so typing never waits for a
+render of a large document.
+"""
+
+import os
+import threading
+import time
+
+PREVIEW_DEBOUNCE_MS = int(os.getenv("PREVIEW_DEBOUNCE_MS", "300"))
+
+
+class PreviewRenderer:
+    """Coalesce preview requests and render the latest one in a worker thread."""
+
+    def __init__(self, render, debounce_seconds=PREVIEW_DEBOUNCE_MS / 1000):
+        self.render = render
+        self.debounce_seconds = debounce_seconds
+        self.error = None
+        self._text = None
+        self._submitted_at = 0.0
+        self._seq = 0
+        self._rendered_seq = 0
+        self._html = None
+        self._html_seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def submit(self, text):
+        """Queue ``text`` for rendering; a no-op if it is already the newest request."""
+        with self._cond:
+            if text == self._text:
+                return
+            self._text = text
+            self._seq += 1
+            self._submitted_at = time.monotonic()
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="preview-renderer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def result(self, wait=0.0):
+        """Return ``(html, pending)`` for the last completed render.
+
+        ``html`` is None until the first render finished; ``pending`` is True
+        while a newer submission is still being debounced or rendered. Waits up
+        to ``wait`` seconds for the newest submission first.
+        """
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while self._rendered_seq != self._seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._html, self._rendered_seq != self._seq
+
+    def render_now(self, text):
+        """Render ``text`` synchronously, bypassing the debounce (e.g. for the first preview)."""
+        html = self.render(text)
+        with self._cond:
+            self._text = text
+            self._seq += 1
+            self._rendered_seq = self._html_seq = self._seq
+            self._html = html
+            self._cond.notify_all()
+        return html
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and self._rendered_seq == self._seq:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                # Let the edits settle: restart the window whenever a new one arrives
+                quiet_for = time.monotonic() - self._submitted_at
+                if quiet_for < self.debounce_seconds:
+                    self._cond.wait(self.debounce_seconds - quiet_for)
+                    continue
+                text, seq = self._text, self._seq
+
+            try:
+                html = self.render(text)
+                error = None
+            except Exception as e:  # keep the worker alive for the next edit
+                html, error = None, e
+
+            with self._cond:
+                self.error = error
+                # Never replace a newer preview (e.g. from render_now) with an older one
+                if html is not None and seq > self._html_seq:
+                    self._html = html
+                    self._html_seq = seq
+                # A newer submission keeps the preview pending
+                self._rendered_seq = max(self._rendered_seq, seq)
+                self._cond.notify_all()
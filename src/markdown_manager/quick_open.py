@@ -0,0 +1,261 @@
+"""
+Fuzzy quick-open over the relative paths of a folder.
+
+``PathIndex`` precomputes, for every path, its lowercased form, a bitmask of the
+characters it contains and a trigram inverted index. A query first collects
+paths containing it as a substring (trigram postings intersection), then tops
+the candidates up with subsequence matches found by the character mask and a
+compiled regex, and only scores that bounded candidate set. Results stay
+interactive on projects with 100k paths.
+"""
+
+import heapq
+import os
+import re
+import threading
+from array import array
+
+# Upper bound on candidates that get the (comparatively slow) fuzzy scoring
+MAX_SCORED_CANDIDATES = 3000
+# Score added for the most recently opened file, decaying with its rank
+RECENCY_WEIGHT = 40.0
+
+_BOUNDARY_CHARS = "/\\_-. "
+
+
+def _char_mask(text):
+    """Return a bitmask with one bit per distinct character (folded into 63 buckets)."""
+    mask = 0
+    for ch in set(text):
+        mask |= 1 << (ord(ch) % 63)
+    return mask
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _lower(text):
+    """Lowercase ``text`` character by character, so offsets stay valid in ``text``.
+
+    ``str.lower`` can lengthen a string ('İ' becomes 'i' plus a combining dot),
+    which would shift every offset after it; such characters keep only the
+    first character of their lowercase form.
+    """
+    lower = text.lower()
+    if len(lower) == len(text):
+        return lower
+    return "".join(ch.lower()[0] for ch in text)
+
+
+def fuzzy_score(query, path):
+    """Score how well lowercase ``query`` matches ``path``; None if it is not a subsequence.
+
+    Contiguous matches, matches at word boundaries and matches inside the file
+    name score higher; longer paths score slightly lower.
+    """
+    lower = _lower(path)
+    base_start = max(lower.rfind("/"), lower.rfind("\\")) + 1
+    length_penalty = len(path) * 0.2
+
+    idx = lower.find(query, base_start)
+    if idx >= 0:
+        # Substring of the file name: the strongest kind of match
+        bonus = 20 if idx == base_start else 0
+        return 100.0 + bonus + 10 * len(query) - length_penalty
+    idx = lower.find(query)
+    if idx >= 0:
+        bonus = 10 if idx == 0 or lower[idx - 1] in _BOUNDARY_CHARS else 0
+        return 60.0 + bonus + 6 * len(query) - length_penalty
+
+    # Greedy subsequence match, preferring the file name for the tail of the query
+    score = 0.0
+    pos = 0
+    prev = -2
+    for ch in query:
+        found = lower.find(ch, pos)
+        if found < 0:
+            return None
+        if found == prev + 1:
+            score += 5
+        if found == 0 or lower[found - 1] in _BOUNDARY_CHARS or (path[found].isupper() and not path[found - 1].isupper()):
+            score += 8
+        if found >= base_start:
+            score += 3
+        score += 1
+        prev = found
+        pos = found + 1
+    return score - length_penalty
+
+
+class PathIndex:
+    """Trigram and character-mask index of relative paths for fuzzy lookup.
+
+    Trigrams are indexed per distinct path segment (directory or file name)
+    rather than per path, because deep trees repeat the same directory names
+    across thousands of paths; each segment maps back to the paths using it.
+    """
+
+    __slots__ = ("paths", "_lower", "_ids", "_masks", "_by_length",
+                 "_segments", "_segment_paths", "_postings")
+
+    def __init__(self, rel_paths):
+        self.paths = [p.replace(os.sep, "/") for p in rel_paths]
+        self._lower = [_lower(p) for p in self.paths]
+        self._ids = {p: i for i, p in enumerate(self.paths)}
+        self._masks = [_char_mask(p) for p in self._lower]
+        self._by_length = sorted(range(len(self.paths)), key=lambda i: len(self.paths[i]))
+
+        segment_ids = {}
+        segment_paths = []
+        for i, lower in enumerate(self._lower):
+            for segment in set(lower.split("/")):
+                seg_id = segment_ids.get(segment)
+                if seg_id is None:
+                    seg_id = segment_ids[segment] = len(segment_paths)
+                    segment_paths.append(array("I"))
+                segment_paths[seg_id].append(i)
+        self._segments = list(segment_ids)
+        self._segment_paths = segment_paths
+
+        postings = {}
+        for seg_id, segment in enumerate(self._segments):
+            for gram in _trigrams(segment):
+                bucket = postings.get(gram)
+                if bucket is None:
+                    postings[gram] = bucket = array("I")
+                bucket.append(seg_id)
+        self._postings = postings
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _matching_segments(self, text):
+        """Return ids of segments containing ``text``."""
+        grams = _trigrams(text)
+        if not grams:
+            return [s for s, segment in enumerate(self._segments) if text in segment]
+        lists = []
+        for gram in grams:
+            bucket = self._postings.get(gram)
+            if bucket is None:
+                return []
+            lists.append(bucket)
+        lists.sort(key=len)
+        ids = set(lists[0])
+        for bucket in lists[1:]:
+            ids.intersection_update(bucket)
+            if not ids:
+                return []
+        # Trigrams can all be present without the text being contiguous
+        return [s for s in ids if text in self._segments[s]]
+
+    def _substring_candidates(self, query):
+        """Return ids of paths containing ``query``."""
+        parts = [part for part in query.split("/") if part]
+        if not parts:
+            return [i for i, lower in enumerate(self._lower) if query in lower]
+        # Every part between slashes lies within a single segment; look up the longest
+        key = max(parts, key=len)
+        ids = set()
+        for seg_id in self._matching_segments(key):
+            ids.update(self._segment_paths[seg_id])
+        if query == key:
+            return list(ids)
+        return [i for i in ids if query in self._lower[i]]
+
+    def _subsequence_candidates(self, query, exclude, limit):
+        """Return up to ``limit`` ids of paths containing ``query`` as a subsequence."""
+        query_mask = _char_mask(query)
+        # "a[^b]*b[^c]*c" finds the leftmost subsequence without backtracking
+        parts = [re.escape(query[0])]
+        for ch in query[1:]:
+            parts.append(f"[^{re.escape(ch)}]*{re.escape(ch)}")
+        pattern = re.compile("".join(parts))
+        found = []
+        for i, mask in enumerate(self._masks):
+            if mask & query_mask == query_mask and i not in exclude and pattern.search(self._lower[i]):
+                found.append(i)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def search(self, query, limit=20, recent=None):
+        """Return up to ``limit`` ``(rel_path, score)`` pairs, best first.
+
+        ``recent`` is an optional list of relative paths, most recently opened
+        first; they get a decaying score bonus. An empty query returns the
+        recent paths that are in the index.
+        """
+        recent_rank = {p.replace(os.sep, "/"): rank for rank, p in enumerate(recent or [])}
+        q = "".join(_lower(query).split())
+        if not q:
+            known = [p for p in recent_rank if p in self._ids]
+            return [(p, 0.0) for p in known[:limit]]
+
+        candidates = self._substring_candidates(q)
+        if len(candidates) > MAX_SCORED_CANDIDATES:
+            # Keep recently opened files in play, then prefer short paths
+            matching = set(candidates)
+            candidates = [i for i in self._by_length if i in matching][:MAX_SCORED_CANDIDATES]
+            kept = set(candidates)
+            for path in recent_rank:
+                i = self._ids.get(path)
+                if i in matching and i not in kept:
+                    candidates.append(i)
+        elif len(candidates) < limit:
+            # Too few substring hits: widen to paths matching as a subsequence
+            candidates += self._subsequence_candidates(
+                q, set(candidates), MAX_SCORED_CANDIDATES - len(candidates)
+            )
+
+        scored = []
+        for i in candidates:
+            path = self.paths[i]
+            score = fuzzy_score(q, path)
+            if score is None:
+                continue
+            rank = recent_rank.get(path)
+            if rank is not None:
+                score += RECENCY_WEIGHT * (1 - rank / len(recent_rank))
+            scored.append((score, path))
+        return [(path, score) for score, path in heapq.nlargest(limit, scored)]
+
+
+_indexes = {}
+_rebuilding = set()
+_indexes_lock = threading.Lock()
+
+
+def get_path_index(root, version, rel_paths):
+    """Return the process-wide PathIndex for ``root``.
+
+    The first call builds the index synchronously. When ``version`` changes
+    afterwards the previous index keeps answering queries while a new one is
+    built in a background thread.
+    """
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached is not None:
+            if cached[0] != version and key not in _rebuilding:
+                _rebuilding.add(key)
+                threading.Thread(
+                    target=_rebuild, args=(key, version, list(rel_paths)),
+                    name="quick-open-index", daemon=True
+                ).start()
+            return cached[1]
+    index = PathIndex(rel_paths)
+    with _indexes_lock:
+        _indexes[key] = (version, index)
+    return index
+
+
+def _rebuild(key, version, rel_paths):
+    try:
+        index = PathIndex(rel_paths)
+        with _indexes_lock:
+            _indexes[key] = (version, index)
+    finally:
+        with _indexes_lock:
+            _rebuilding.discard(key)
@@ -0,0 +1,209 @@
+"""
+Content-addressed cache for rendered markdown HTML.
+
+Entries are keyed by a SHA-256 over the markdown source, the renderer
+configuration, ``RENDERER_VERSION`` and the versions of the libraries doing
+the rendering, so a hit is always safe to reuse: the same document shown in
+the viewer, the print view and the HTML download is converted once per
+process. An in-memory LRU is bounded by bytes; an optional on-disk tier
+(``RENDER_CACHE_DIR``) lets sessions, restarts and replicas sharing a volume
+reuse each other's work.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import markdown
+import pygments
+
+# Version of the app's own rendering code: bump it whenever the output of the
+# preprocessing (fence_scanner, the Mermaid blocks) or of code_highlight changes
+RENDERER_VERSION = 1
+
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Unset keeps the cache in memory only
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", "")
+RENDER_CACHE_DISK_MAX_BYTES = int(os.getenv("RENDER_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+# The disk tier is pruned after this many writes
+_PRUNE_EVERY_WRITES = 100
+
+
+def render_cache_key(content, config):
+    """Return the cache key for rendering ``content`` with the JSON-serialisable ``config``."""
+    digest = hashlib.sha256()
+    header = {
+        "config": config,
+        "markdown": markdown.__version__,
+        "pygments": pygments.__version__,
+        "renderer": RENDERER_VERSION,
+    }
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(b"\0")
+    digest.update(content.encode('utf-8', errors='surrogatepass'))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Byte-bounded LRU of rendered HTML with an optional directory-backed second tier."""
+
+    # File name suffix of the entries of the disk tier
+    suffix = ".html"
+
+    def __init__(self, max_bytes=RENDER_CACHE_MAX_BYTES, disk_dir=None,
+                 disk_max_bytes=RENDER_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.size_bytes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._entries = OrderedDict()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached HTML for ``key`` or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0]
+        html = self._read_disk(key)
+        with self._lock:
+            if html is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._store(key, html)
+        return html
+
+    def put(self, key, html):
+        """Store rendered HTML in memory and, if configured, on disk."""
+        with self._lock:
+            self._store(key, html)
+        self._write_disk(key, html)
+
+    def get_or_render(self, key, render):
+        """Return the cached HTML for ``key``, calling ``render()`` to fill a miss."""
+        html = self.get(key)
+        if html is None:
+            html = render()
+            self.put(key, html)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    @staticmethod
+    def _encode(html):
+        return html.encode('utf-8', errors='surrogatepass')
+
+    @staticmethod
+    def _decode(data):
+        return data.decode('utf-8')
+
+    def _store(self, key, html):
+        size = len(self._encode(html))
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size_bytes -= old[1]
+        self._entries[key] = (html, size)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}{self.suffix}")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                html = self._decode(f.read())
+            # Refresh the mtime so pruning drops the least recently used files
+            os.utime(path)
+            return html
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _write_disk(self, key, html):
+        """Write atomically so concurrent readers (other replicas) never see partial files."""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(self._encode(html))
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % _PRUNE_EVERY_WRITES == 0
+        if prune:
+            self.prune_disk()
+
+    def prune_disk(self):
+        """Delete the least recently used files until the disk tier fits its budget."""
+        if not self.disk_dir:
+            return
+        files = []
+        total = 0
+        try:
+            shards = list(os.scandir(self.disk_dir))
+        except OSError:
+            return
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            try:
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(self.suffix):
+                        st_result = entry.stat()
+                        files.append((st_result.st_mtime, st_result.st_size, entry.path))
+                        total += st_result.st_size
+            except OSError:
+                continue
+        files.sort()
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache():
+    """Return the process-wide RenderCache, shared by all sessions."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache(disk_dir=RENDER_CACHE_DIR or None)
+        return _cache
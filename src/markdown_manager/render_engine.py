@@ -0,0 +1,135 @@
+"""
+Pooled markdown converters.
+
+Building a ``markdown.Markdown`` instance loads and registers every extension,
+which costs more than converting a typical document. The engine keeps a pool
+of preconfigured converters per extension profile; a render borrows one,
+resets it and returns it, so the setup cost is paid once per pooled instance
+instead of once per render. The engine is process-wide and thread-safe, so
+all Streamlit sessions and worker threads share the same converters.
+
+``RENDER_BACKEND`` can switch the default profile to another markdown engine
+with equivalent output (see ``markdown_backends``).
+"""
+
+import copy
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import markdown
+
+from markdown_backends import PYTHON_MARKDOWN, create_backend
+
+# Converters kept per profile; extra instances created under load are discarded
+RENDER_POOL_SIZE = int(os.getenv("RENDER_POOL_SIZE", str(min(8, (os.cpu_count() or 1) + 2))))
+
+DEFAULT_PROFILE = "default"
+# Engine of the default profile: "python-markdown" or the opt-in "markdown-it" (needs
+# markdown-it-py; CommonMark block rules, so not identical output)
+RENDER_BACKEND = os.getenv("RENDER_BACKEND", PYTHON_MARKDOWN)
+
+# Extensions used for the viewer, editor preview, print and HTML exports
+DEFAULT_EXTENSIONS = [
+    'markdown.extensions.codehilite',
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.tables',
+    'markdown.extensions.toc',
+    'markdown.extensions.nl2br',
+    'markdown.extensions.attr_list',
+    'markdown.extensions.def_list',
+    # Memoized highlighting and fast language detection; must follow codehilite
+    'code_highlight:CachedHighlightExtension',
+    # Mermaid detection and fence highlighting in a single pass
+    'fence_scanner:FenceScanExtension'
+]
+DEFAULT_EXTENSION_CONFIGS = {
+    'markdown.extensions.codehilite': {
+        'css_class': 'highlight',
+        'use_pygments': True,
+        'guess_lang': True,
+        'noclasses': False
+    }
+}
+
+
+class RenderEngine:
+    """Thread-safe pools of reusable ``markdown.Markdown`` converters keyed by profile."""
+
+    def __init__(self, pool_size=RENDER_POOL_SIZE, backend=RENDER_BACKEND):
+        self.pool_size = pool_size
+        self._profiles = {}
+        self._pools = {}
+        self._created = {}
+        self._lock = threading.Lock()
+        self.register_profile(DEFAULT_PROFILE, DEFAULT_EXTENSIONS, DEFAULT_EXTENSION_CONFIGS)
+        # None: the default profile uses the pooled Python-Markdown converters
+        self.backend = create_backend(backend, DEFAULT_EXTENSION_CONFIGS['markdown.extensions.codehilite'])
+
+    @property
+    def backend_name(self):
+        return self.backend.name if self.backend is not None else PYTHON_MARKDOWN
+
+    def register_profile(self, name, extensions, extension_configs=None):
+        """Define (or redefine) the extensions used by profile ``name``."""
+        with self._lock:
+            self._profiles[name] = (list(extensions), copy.deepcopy(extension_configs or {}))
+            # Converters built for an older definition must not be reused
+            self._pools[name] = queue.LifoQueue()
+            self._created[name] = 0
+
+    def profile_config(self, name=DEFAULT_PROFILE):
+        """Return a JSON-serialisable description of a profile, e.g. for cache keys."""
+        if name == DEFAULT_PROFILE and self.backend is not None:
+            return self.backend.config()
+        extensions, configs = self._profiles[name]
+        return {"extensions": extensions, "extension_configs": configs}
+
+    def _new_converter(self, name):
+        extensions, configs = self._profiles[name]
+        # Extensions may keep references to their config, so give each instance its own copy
+        return markdown.Markdown(extensions=extensions, extension_configs=copy.deepcopy(configs))
+
+    @contextmanager
+    def converter(self, profile=DEFAULT_PROFILE):
+        """Borrow a reset converter for ``profile`` and return it to the pool afterwards."""
+        pool = self._pools[profile]
+        try:
+            md = pool.get_nowait()
+        except queue.Empty:
+            md = self._new_converter(profile)
+            with self._lock:
+                self._created[profile] += 1
+        try:
+            yield md
+        finally:
+            md.reset()
+            # A profile re-registered meanwhile has a new pool; drop converters of the old one
+            if self._pools.get(profile) is pool and pool.qsize() < self.pool_size:
+                pool.put(md)
+
+    def convert(self, text, profile=DEFAULT_PROFILE):
+        """Convert markdown ``text`` to HTML with a pooled converter (or the configured backend)."""
+        if profile == DEFAULT_PROFILE and self.backend is not None:
+            return self.backend.convert(text)
+        with self.converter(profile) as md:
+            return md.convert(text)
+
+    def stats(self):
+        """Return ``{profile: (created, idle)}`` converter counts."""
+        with self._lock:
+            return {name: (self._created[name], self._pools[name].qsize()) for name in self._profiles}
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_render_engine():
+    """Return the process-wide RenderEngine, shared by all sessions."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RenderEngine()
+        return _engine
@@ -0,0 +1,305 @@
+"""
+Full-text search over the markdown files of a folder.
+
+Documents are kept in an SQLite FTS5 inverted index stored per project in
+``.fyiai/index/search.sqlite3``. Queries are ranked with BM25 (paths weigh more
+than body text), support ``"quoted phrases"`` and prefix matching of the last
+word, and return highlighted snippets. Updates are incremental: a file is only
+re-read when its mtime or size changed, and only re-indexed when its content
+hash changed. The same pass records each document's headings (see
+``heading_index``) for the project-wide "go to heading" search.
+"""
+
+import hashlib
+import html
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from heading_index import extract_headings
+
+SEARCH_INDEX_FILE_NAME = "search.sqlite3"
+SEARCH_SCHEMA_VERSION = 2
+# Files larger than this are indexed by their first bytes only
+MAX_INDEXED_BYTES = 2 * 1024 * 1024
+# Background refreshes are skipped if the index was updated this recently
+REFRESH_INTERVAL_SECONDS = 30
+
+# Private-use markers survive html.escape and are swapped for <mark> tags
+_HIT_START = "\ue000"
+_HIT_END = "\ue001"
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def build_fts_query(query):
+    """Translate user input into an FTS5 MATCH expression.
+
+    Quoted text becomes a phrase, other words are ANDed together and the last
+    bare word matches as a prefix so results appear while typing.
+    Returns an empty string if the query has no searchable words.
+    """
+    parts = []
+    last_is_word = False
+    for phrase, word in _QUERY_TOKEN.findall(query):
+        if phrase:
+            words = _WORD.findall(phrase)
+            if words:
+                parts.append('"' + " ".join(words) + '"')
+                last_is_word = False
+        else:
+            for w in _WORD.findall(word):
+                parts.append(f'"{w}"')
+                last_is_word = True
+    if not parts:
+        return ""
+    if last_is_word:
+        parts[-1] += "*"
+    return " ".join(parts)
+
+
+def highlight_snippet(raw_snippet):
+    """HTML-escape a snippet, collapse whitespace and wrap the matched terms in ``<mark>``."""
+    escaped = " ".join(html.escape(raw_snippet).split())
+    return escaped.replace(_HIT_START, "<mark>").replace(_HIT_END, "</mark>")
+
+
+class SearchIndex:
+    """BM25-ranked FTS5 index of the markdown files below ``root``."""
+
+    def __init__(self, root, db_path=None):
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or os.path.join(self.root, ".fyiai", "index", SEARCH_INDEX_FILE_NAME)
+        self.last_updated = 0.0
+        # (done, total) while a background update runs, else None
+        self.progress = None
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._update_thread = None
+        self._init_schema()
+
+    def _connect(self):
+        """Return this thread's connection to the index database."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SEARCH_SCHEMA_VERSION:
+            conn.executescript("""
+                DROP TABLE IF EXISTS docs;
+                DROP TABLE IF EXISTS content;
+                DROP TABLE IF EXISTS headings;
+                CREATE TABLE docs (
+                    id INTEGER PRIMARY KEY,
+                    rel_path TEXT UNIQUE NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    sha1 TEXT NOT NULL
+                );
+                CREATE VIRTUAL TABLE content USING fts5(
+                    path, body, tokenize = 'unicode61 remove_diacritics 2'
+                );
+                CREATE TABLE headings (
+                    doc_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    level INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    anchor TEXT NOT NULL,
+                    line INTEGER NOT NULL
+                );
+                CREATE INDEX headings_doc ON headings (doc_id);
+            """)
+            conn.execute(f"PRAGMA user_version = {SEARCH_SCHEMA_VERSION}")
+            conn.commit()
+
+    def update(self, markdown_files):
+        """Synchronise the index with ``(rel_path, full_path)`` pairs.
+
+        Returns a dict with the number of added, updated, removed and unchanged documents.
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._write_lock:
+            conn = self._connect()
+            known = {
+                rel: (doc_id, mtime_ns, size, sha1)
+                for doc_id, rel, mtime_ns, size, sha1 in
+                conn.execute("SELECT id, rel_path, mtime_ns, size, sha1 FROM docs")
+            }
+            seen = set()
+            total = len(markdown_files)
+            for done, (rel_path, full_path) in enumerate(markdown_files, 1):
+                seen.add(rel_path)
+                if done % 200 == 0:
+                    self.progress = (done, total)
+                try:
+                    st_result = os.stat(full_path)
+                except OSError:
+                    continue
+                existing = known.get(rel_path)
+                if existing and existing[1] == st_result.st_mtime_ns and existing[2] == st_result.st_size:
+                    stats["unchanged"] += 1
+                    continue
+                try:
+                    with open(full_path, 'rb') as f:
+                        data = f.read(MAX_INDEXED_BYTES)
+                except OSError:
+                    continue
+                sha1 = hashlib.sha1(data).hexdigest()
+                # Headings come from the whole file, so truncated files are always re-read
+                truncated = st_result.st_size > MAX_INDEXED_BYTES
+                if existing and existing[3] == sha1 and not truncated:
+                    conn.execute("UPDATE docs SET mtime_ns = ?, size = ? WHERE id = ?",
+                                 (st_result.st_mtime_ns, st_result.st_size, existing[0]))
+                    stats["unchanged"] += 1
+                    continue
+                body = data.decode('utf-8', errors='replace')
+                if existing:
+                    doc_id = existing[0]
+                    conn.execute("UPDATE docs SET mtime_ns = ?, size = ?, sha1 = ? WHERE id = ?",
+                                 (st_result.st_mtime_ns, st_result.st_size, sha1, doc_id))
+                    conn.execute("DELETE FROM content WHERE rowid = ?", (doc_id,))
+                    conn.execute("DELETE FROM headings WHERE doc_id = ?", (doc_id,))
+                    stats["updated"] += 1
+                else:
+                    cur = conn.execute("INSERT INTO docs (rel_path, mtime_ns, size, sha1) VALUES (?, ?, ?, ?)",
+                                       (rel_path, st_result.st_mtime_ns, st_result.st_size, sha1))
+                    doc_id = cur.lastrowid
+                    stats["added"] += 1
+                conn.execute("INSERT INTO content (rowid, path, body) VALUES (?, ?, ?)",
+                             (doc_id, rel_path.replace(os.sep, "/"), body))
+                conn.executemany(
+                    "INSERT INTO headings (doc_id, position, level, title, anchor, line) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(doc_id, position) + tuple(heading)
+                     for position, heading in enumerate(self._read_headings(full_path, body, truncated))]
+                )
+
+            for rel_path, (doc_id, _, _, _) in known.items():
+                if rel_path not in seen:
+                    conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+                    conn.execute("DELETE FROM content WHERE rowid = ?", (doc_id,))
+                    conn.execute("DELETE FROM headings WHERE doc_id = ?", (doc_id,))
+                    stats["removed"] += 1
+            conn.commit()
+            self.last_updated = time.time()
+            self.progress = None
+        return stats
+
+    @staticmethod
+    def _read_headings(full_path, body, truncated):
+        if not truncated:
+            return extract_headings(body.splitlines())
+        try:
+            with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
+                return extract_headings(f)
+        except OSError:
+            return []
+
+    def update_in_background(self, markdown_files, force=False):
+        """Start a background update unless one is running or the index is fresh.
+
+        Returns True if an update was started.
+        """
+        if self.is_updating():
+            return False
+        if not force and time.time() - self.last_updated < REFRESH_INTERVAL_SECONDS:
+            return False
+        self.progress = (0, len(markdown_files))
+        self._update_thread = threading.Thread(
+            target=self.update, args=(list(markdown_files),), name="search-index-update", daemon=True
+        )
+        self._update_thread.start()
+        return True
+
+    def is_updating(self):
+        return self._update_thread is not None and self._update_thread.is_alive()
+
+    def document_count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def search(self, query, limit=20):
+        """Return the best matches as dicts with rel_path, full_path, score and snippet (HTML)."""
+        match = build_fts_query(query)
+        if not match:
+            return []
+        try:
+            rows = self._connect().execute(
+                """
+                SELECT docs.rel_path,
+                       bm25(content, 5.0, 1.0) AS score,
+                       snippet(content, 1, ?, ?, ' … ', 16)
+                FROM content JOIN docs ON docs.id = content.rowid
+                WHERE content MATCH ?
+                ORDER BY score
+                LIMIT ?
+                """,
+                (_HIT_START, _HIT_END, match, limit)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return []
+        return [
+            {
+                "rel_path": rel_path,
+                "full_path": os.path.join(self.root, rel_path),
+                # bm25() is lower-is-better; flip it so higher means more relevant
+                "score": -score,
+                "snippet": highlight_snippet(raw_snippet),
+            }
+            for rel_path, score, raw_snippet in rows
+        ]
+
+    def find_headings(self, query, limit=20):
+        """Return headings whose title contains ``query``, best matches first.
+
+        Results are dicts with rel_path, full_path, level, title, anchor and
+        line; titles starting with the query rank first, then higher levels.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        rows = self._connect().execute(
+            """
+            SELECT docs.rel_path, headings.level, headings.title, headings.anchor, headings.line
+            FROM headings JOIN docs ON docs.id = headings.doc_id
+            WHERE headings.title LIKE ? ESCAPE '\\'
+            ORDER BY headings.title LIKE ? ESCAPE '\\' DESC, headings.level, docs.rel_path, headings.position
+            LIMIT ?
+            """,
+            (f"%{escaped}%", f"{escaped}%", limit)
+        ).fetchall()
+        return [
+            {
+                "rel_path": rel_path,
+                "full_path": os.path.join(self.root, rel_path),
+                "level": level,
+                "title": title,
+                "anchor": anchor,
+                "line": line,
+            }
+            for rel_path, level, title, anchor, line in rows
+        ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(root):
+    """Return the process-wide SearchIndex for ``root``, shared by all sessions."""
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = SearchIndex(key)
+            _indexes[key] = index
+        return index
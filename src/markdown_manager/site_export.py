@@ -0,0 +1,238 @@
+"""
+Headless export of a folder of markdown files to a static HTML site.
+
+Every markdown file found below the source folder is rendered with the same
+engine and page styling as the app's print view and written next to its
+siblings in the output folder as ``.html``; relative links to ``.md`` files
+are rewritten to point at the exported pages. Pages are rendered across a
+process pool, and a manifest in the output folder records the SHA-256 of each
+source, so a rerun only renders files that changed (or all of them after the
+renderer configuration changed) and removes pages whose source was deleted.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import markdown
+import pygments
+
+from file_index import get_file_index
+from html_document import (DOCUMENT_TEMPLATE_VERSION, MERMAID_BUNDLE_PATH, MERMAID_CDN_URL,
+                           MERMAID_VERSION, build_html_document, render_markdown_html)
+from render_cache import RENDERER_VERSION
+from render_engine import get_render_engine
+
+# Processes used to render pages; 1 renders in the calling process
+SITE_EXPORT_WORKERS = int(os.getenv("SITE_EXPORT_WORKERS", str(os.cpu_count() or 1)))
+
+MANIFEST_NAME = ".export-manifest.json"
+MANIFEST_VERSION = 1
+ASSETS_DIR = "assets"
+# Pages sent to a worker per task; amortises pickling for folders of small files
+_CHUNK_SIZE = 8
+
+# href values of <a> tags as written by Python-Markdown
+_LINK_HREF = re.compile(r'(<a\b[^>]*?\bhref=")([^"]*)(")', re.IGNORECASE)
+_SCHEME = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+_MARKDOWN_SUFFIX = re.compile(r"\.(?:md|markdown)$", re.IGNORECASE)
+
+# rendered/skipped/removed: counts; failed: list of (rel_path, error message)
+ExportSummary = namedtuple("ExportSummary", "rendered skipped removed failed")
+
+
+def output_name(rel_path):
+    """Return the exported page's path for a markdown file, e.g. ``docs/a.md`` -> ``docs/a.html``."""
+    return os.path.splitext(rel_path)[0] + ".html"
+
+
+def _rewrite_href(match):
+    href = match.group(2)
+    if _SCHEME.match(href) or href.startswith(("//", "#")):
+        return match.group(0)
+    path, sep, fragment = href.partition("#")
+    path, qsep, query = path.partition("?")
+    if not _MARKDOWN_SUFFIX.search(path):
+        return match.group(0)
+    path = _MARKDOWN_SUFFIX.sub(".html", path)
+    return f"{match.group(1)}{path}{qsep}{query}{sep}{fragment}{match.group(3)}"
+
+
+def rewrite_markdown_links(html_content):
+    """Point relative links to ``.md``/``.markdown`` files at their exported ``.html`` pages."""
+    return _LINK_HREF.sub(_rewrite_href, html_content)
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _export_page(task):
+    """Render one page; runs in a worker process, so it takes and returns plain values.
+
+    Returns ``(rel_path, error)`` with ``error`` None on success.
+    """
+    rel_path, source_path, target_path, mermaid_src = task
+    try:
+        with open(source_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        body = rewrite_markdown_links(render_markdown_html(content))
+        title = os.path.splitext(os.path.basename(rel_path))[0]
+        _write_atomic(target_path, build_html_document(body, title, mermaid_src=mermaid_src))
+        return rel_path, None
+    except Exception as e:
+        return rel_path, str(e)
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _config_digest(mermaid_mode):
+    # Everything besides the source that shapes a page, as in render_cache_key
+    config = {
+        "manifest": MANIFEST_VERSION,
+        "renderer": get_render_engine().profile_config(),
+        "markdown": markdown.__version__,
+        "pygments": pygments.__version__,
+        "renderer_version": RENDERER_VERSION,
+        "template": DOCUMENT_TEMPLATE_VERSION,
+        "mermaid": mermaid_mode,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _load_manifest(path, config):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    pages = data.get("pages")
+    if data.get("config") != config or not isinstance(pages, dict):
+        return {}
+    return pages
+
+
+def _mermaid_src(rel_path, has_bundle):
+    if not has_bundle:
+        return MERMAID_CDN_URL
+    depth = rel_path.count(os.sep)
+    return "../" * depth + f"{ASSETS_DIR}/mermaid.min.js?v={MERMAID_VERSION}"
+
+
+def _write_index(output_dir, pages):
+    """Write a plain listing of all pages as ``index.html``."""
+    items = "\n".join(
+        f'<li><a href="{html.escape(output_name(rel).replace(os.sep, "/"))}">{html.escape(rel)}</a></li>'
+        for rel in pages
+    )
+    body = f"<h1>Index</h1>\n<ul>\n{items}\n</ul>"
+    _write_atomic(os.path.join(output_dir, "index.html"), build_html_document(body, "Index"))
+
+
+def _collect(results, total, progress):
+    failed = []
+    for done, (rel_path, error) in enumerate(results, start=1):
+        if error is not None:
+            failed.append((rel_path, error))
+        if progress:
+            progress(done, total, rel_path)
+    return failed
+
+
+def export_site(source_dir, output_dir, ignore_patterns=None, workers=SITE_EXPORT_WORKERS,
+                force=False, progress=None, ignore_root=None):
+    """Export the markdown files below ``source_dir`` to HTML pages in ``output_dir``.
+
+    Only sources whose content changed since the previous export are rendered,
+    unless ``force`` is set. ``progress(done, total, rel_path)`` is called
+    after each rendered page. Pages that fail are reported in the summary and
+    retried on the next export. ``ignore_patterns`` are relative to
+    ``ignore_root`` (default: ``source_dir``).
+    """
+    source_dir = os.path.abspath(source_dir)
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    has_bundle = os.path.isfile(MERMAID_BUNDLE_PATH)
+    config = _config_digest("vendored" if has_bundle else "cdn")
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    previous = {} if force else _load_manifest(manifest_path, config)
+
+    files = get_file_index(source_dir, ignore_patterns, ignore_root).refresh()
+    pages = {}
+    tasks = []
+    skipped = 0
+    for rel_path, full_path in files:
+        try:
+            st_result = os.stat(full_path)
+        except OSError:
+            continue
+        entry = previous.get(rel_path)
+        target_path = os.path.join(output_dir, output_name(rel_path))
+        # Unchanged stat info means unchanged content; otherwise compare hashes
+        if (entry and entry.get("mtime") == st_result.st_mtime_ns and entry.get("size") == st_result.st_size
+                and os.path.exists(target_path)):
+            pages[rel_path] = entry
+            skipped += 1
+            continue
+        try:
+            digest = _file_digest(full_path)
+        except OSError:
+            continue
+        pages[rel_path] = {"sha256": digest, "mtime": st_result.st_mtime_ns, "size": st_result.st_size}
+        if entry and entry.get("sha256") == digest and os.path.exists(target_path):
+            skipped += 1
+            continue
+        tasks.append((rel_path, full_path, target_path, _mermaid_src(rel_path, has_bundle)))
+
+    total = len(tasks)
+    if workers > 1 and total > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, total)) as executor:
+            results = executor.map(_export_page, tasks, chunksize=_CHUNK_SIZE)
+            failed = _collect(results, total, progress)
+    else:
+        failed = _collect(map(_export_page, tasks), total, progress)
+    failed_paths = {rel_path for rel_path, _ in failed}
+    for rel_path in failed_paths:
+        # Left out of the manifest so the next export tries again
+        pages.pop(rel_path, None)
+
+    removed = 0
+    for rel_path in previous.keys() - pages.keys() - failed_paths:
+        try:
+            os.remove(os.path.join(output_dir, output_name(rel_path)))
+            removed += 1
+        except OSError:
+            pass
+
+    if has_bundle:
+        assets_dir = os.path.join(output_dir, ASSETS_DIR)
+        os.makedirs(assets_dir, exist_ok=True)
+        shutil.copyfile(MERMAID_BUNDLE_PATH, os.path.join(assets_dir, "mermaid.min.js"))
+    if not any(output_name(rel_path) == "index.html" for rel_path, _ in files):
+        _write_index(output_dir, sorted(pages))
+
+    _write_atomic(manifest_path, json.dumps({"config": config, "pages": pages}, indent=1, sort_keys=True))
+    return ExportSummary(total - len(failed), skipped, removed, failed)
@@ -0,0 +1,139 @@
+// Markdown viewer component. The page is loaded once and kept across reruns;
+// each rerun only posts the rendered document HTML to it.
+(function () {
+    "use strict";
+
+    const MIN_HEIGHT = 500;
+    // The vendored bundle first; the CDN only if it is missing. Keep the version
+    // in sync with MERMAID_VERSION in html_document.py.
+    const MERMAID_SOURCES = [
+        "vendor/mermaid.min.js?v=10.9.1",
+        "https://cdn.jsdelivr.net/npm/mermaid@10.9.1/dist/mermaid.min.js"
+    ];
+    const content = document.getElementById("content");
+    let currentHtml = null;
+    let baseDir = "";
+    let lastHeight = 0;
+    let lastScrollNonce = null;
+
+    function send(type, data) {
+        window.parent.postMessage(Object.assign({ isStreamlitMessage: true, type: type }, data), "*");
+    }
+
+    function setFrameHeight() {
+        const height = Math.max(MIN_HEIGHT, Math.ceil(content.getBoundingClientRect().bottom) + 16);
+        if (height !== lastHeight) {
+            lastHeight = height;
+            send("streamlit:setFrameHeight", { height: height });
+        }
+    }
+
+    let mermaidLoading = null;
+
+    // Load Mermaid the first time a document contains a diagram
+    function loadMermaid() {
+        if (!mermaidLoading) {
+            mermaidLoading = new Promise(function (resolve) {
+                function tryLoad(index) {
+                    if (index >= MERMAID_SOURCES.length) {
+                        resolve(null);
+                        return;
+                    }
+                    const script = document.createElement("script");
+                    script.src = MERMAID_SOURCES[index];
+                    script.onload = function () {
+                        try {
+                            window.mermaid.initialize({ startOnLoad: false, securityLevel: "loose" });
+                        } catch (e) {
+                            console.error("Mermaid init error", e);
+                        }
+                        resolve(window.mermaid);
+                    };
+                    script.onerror = function () { tryLoad(index + 1); };
+                    document.head.appendChild(script);
+                }
+                tryLoad(0);
+            });
+        }
+        return mermaidLoading;
+    }
+
+    function renderDiagrams() {
+        if (!content.querySelector(".mermaid")) {
+            return;
+        }
+        const html = currentHtml;
+        loadMermaid().then(function (mermaid) {
+            // Skip if another document arrived while the bundle was loading
+            if (!mermaid || html !== currentHtml) {
+                return;
+            }
+            return mermaid.run({ nodes: content.querySelectorAll(".mermaid") });
+        }).catch(function (e) {
+            console.error("Mermaid run error", e);
+        });
+    }
+
+    // Jump to a heading picked outside the viewer; each request is carried out once
+    function scrollToAnchor(target) {
+        if (!target || target.nonce === lastScrollNonce) {
+            return;
+        }
+        lastScrollNonce = target.nonce;
+        const element = document.getElementById(target.anchor);
+        if (element) {
+            // Wait for Streamlit to apply the new frame height, then scroll the page to it
+            requestAnimationFrame(function () {
+                requestAnimationFrame(function () { element.scrollIntoView({ block: "start" }); });
+            });
+        }
+    }
+
+    function isMarkdownLink(href) {
+        if (!href || /^(https?:|mailto:|#)/i.test(href)) {
+            return false;
+        }
+        const path = href.split("#")[0].toLowerCase();
+        return path.endsWith(".md") || path.endsWith(".markdown");
+    }
+
+    // Local markdown links are sent back to Streamlit, which opens the target file
+    document.addEventListener("click", function (e) {
+        const link = e.target.closest("a");
+        if (!link) {
+            return;
+        }
+        const href = link.getAttribute("href");
+        if (isMarkdownLink(href)) {
+            e.preventDefault();
+            send("streamlit:setComponentValue", {
+                value: { action: "navigate_to_file", href: href, baseDir: baseDir, nonce: Date.now() },
+                dataType: "json"
+            });
+        }
+    });
+
+    window.addEventListener("message", function (event) {
+        if (!event.data || event.data.type !== "streamlit:render") {
+            return;
+        }
+        const args = event.data.args || {};
+        baseDir = args.base_dir || "";
+        // Reruns that did not change the document leave the page (and diagrams) alone
+        if (args.html !== currentHtml) {
+            currentHtml = args.html;
+            content.innerHTML = currentHtml || "";
+            renderDiagrams();
+        }
+        setFrameHeight();
+        scrollToAnchor(args.scroll_to);
+    });
+
+    // Diagrams and images change the height after rendering
+    if (window.ResizeObserver) {
+        new ResizeObserver(setFrameHeight).observe(content);
+    }
+    window.addEventListener("load", setFrameHeight);
+
+    send("streamlit:componentReady", { apiVersion: 1 });
+})();
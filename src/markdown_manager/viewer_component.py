@@ -0,0 +1,46 @@
+"""
+Markdown viewer as a Streamlit custom component.
+
+The page in ``viewer/`` holds the viewer styles, the Pygments theme, the
+Mermaid loader and the link handling. Streamlit serves it as static files that
+the browser caches and keeps its iframe across reruns, so a rerun only sends
+the rendered document HTML instead of a full page with every asset inlined.
+
+Mermaid is vendored as ``viewer/vendor/mermaid.min.js`` (fetched with
+``scripts/vendor_mermaid.py``) and served from the same route, so diagrams
+render on hosts without internet access; the CDN is only used when the
+bundle is missing.
+"""
+
+import os
+
+import streamlit.components.v1 as components
+
+from html_document import MERMAID_BUNDLE_PATH, MERMAID_CDN_URL, MERMAID_VERSION
+
+VIEWER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "viewer")
+
+_markdown_viewer = components.declare_component("markdown_viewer", path=VIEWER_DIR)
+
+
+def mermaid_script_url():
+    """URL of the Mermaid bundle for pages rendered inside the app (e.g. the print view).
+
+    Points at the vendored copy served by the app when it exists, and at the
+    CDN otherwise. The URL is relative to the app page, which also works under
+    ``server.baseUrlPath``; the version parameter keeps browser caches correct.
+    """
+    if os.path.isfile(MERMAID_BUNDLE_PATH):
+        asset = os.path.relpath(MERMAID_BUNDLE_PATH, VIEWER_DIR).replace(os.sep, "/")
+        return f"component/{_markdown_viewer.name}/{asset}?v={MERMAID_VERSION}"
+    return MERMAID_CDN_URL
+
+
+def markdown_viewer(html_content, base_dir, key=None, scroll_to=None):
+    """Show rendered markdown.
+
+    ``scroll_to`` (``{"anchor", "nonce"}``) scrolls to the element with that id
+    once per nonce, e.g. for a heading picked in the outline. Returns the last clicked local markdown link as
+    ``{"action": "navigate_to_file", "href", "baseDir", "nonce"}``, or None.
+    """
+    return _markdown_viewer(html=html_content, base_dir=base_dir, scroll_to=scroll_to, key=key, default=None)
@@ -0,0 +1,158 @@
+"""
+Shared process pool for CPU-heavy rendering jobs.
+
+Markdown conversion is pure Python and holds the GIL, so a session converting
+a large document used to stall the script threads of every other session on
+the server. ``WorkerPool`` runs these jobs in worker processes; the calling
+thread only waits on a future, so the other sessions keep running. Exports,
+which a session does not wait for, run in ``export_jobs`` instead.
+
+- At most ``RENDER_QUEUE_LIMIT`` jobs may be queued or running at once.
+  Further submissions fail at once with ``WorkerPoolBusy``, so a burst of
+  large documents cannot build up an unbounded backlog.
+- A job that is still running when its timeout expires raises ``JobTimeout``.
+  Its worker is killed and the pool restarted, so a pathological document
+  cannot hold a worker indefinitely. Jobs of other sessions caught in the
+  restart are resubmitted once.
+- Jobs smaller than ``RENDER_INLINE_MAX_BYTES`` run in the calling thread,
+  because for them the round trip to a worker costs more than the work.
+  ``RENDER_WORKERS=0`` runs every job inline.
+
+Workers are started with ``spawn``: forking a multi-threaded server process
+is unsafe. Job functions must be importable module-level functions. Under
+``streamlit run`` a new worker also imports the app script once (as
+``__mp_main__``, so its ``main()`` does not run).
+"""
+
+import os
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from html_document import render_markdown_html
+from render_engine import get_render_engine
+
+# Worker processes; 0 runs every job in the calling thread
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Jobs queued or running at once before new ones are refused
+RENDER_QUEUE_LIMIT = int(os.getenv("RENDER_QUEUE_LIMIT", "32"))
+# Seconds a job may take, from submission to result
+RENDER_JOB_TIMEOUT = float(os.getenv("RENDER_JOB_TIMEOUT", "120"))
+# Jobs with less input than this run inline
+RENDER_INLINE_MAX_BYTES = int(os.getenv("RENDER_INLINE_MAX_BYTES", str(128 * 1024)))
+
+
+class WorkerPoolBusy(RuntimeError):
+    """Raised when the pool already holds ``RENDER_QUEUE_LIMIT`` jobs."""
+
+
+class JobTimeout(TimeoutError):
+    """Raised when a job did not finish within its timeout."""
+
+
+class WorkerPool:
+    """Bounded, restartable process pool with per-job timeouts."""
+
+    def __init__(self, workers=RENDER_WORKERS, queue_limit=RENDER_QUEUE_LIMIT,
+                 timeout=RENDER_JOB_TIMEOUT, inline_max_bytes=RENDER_INLINE_MAX_BYTES):
+        self.workers = workers
+        self.timeout = timeout
+        self.inline_max_bytes = inline_max_bytes
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def run(self, fn, *args, size=None, timeout=None):
+        """Return ``fn(*args)``, computed in a worker process unless the job is small.
+
+        ``size`` is the size of the job's input (e.g. the length of the
+        markdown); jobs below ``inline_max_bytes`` run in the calling thread. Raises
+        ``WorkerPoolBusy`` when the queue is full and ``JobTimeout`` after
+        ``timeout`` seconds (default: the pool's timeout).
+        """
+        if self.workers <= 0 or (size is not None and size < self.inline_max_bytes):
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise WorkerPoolBusy("too many rendering jobs are waiting; try again shortly")
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    return self._wait(executor, self._submit(executor, fn, args), timeout)
+                except BrokenProcessPool:
+                    # Another job's timeout (or a crashed worker) took the pool down
+                    self._kill(executor)
+                    if attempt:
+                        raise
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+            return self._executor
+
+    @staticmethod
+    def _submit(executor, fn, args):
+        try:
+            return executor.submit(fn, *args)
+        except RuntimeError as e:
+            # Shut down by a concurrent restart between lookup and submission
+            raise BrokenProcessPool(str(e)) from None
+
+    def _wait(self, executor, future, timeout):
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if not future.cancel():
+                self._kill(executor)
+            raise JobTimeout(f"job did not finish within {timeout:g} seconds") from None
+        except CancelledError:
+            raise BrokenProcessPool("job was cancelled by a pool restart") from None
+
+    def _kill(self, executor):
+        """Stop a pool whose worker is stuck; the next job starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # ProcessPoolExecutor cannot stop a running job; end its processes instead
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Return the process-wide WorkerPool, shared by all sessions."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+        return _pool
+
+
+def convert_markdown(content):
+    """Convert markdown with the worker's render engine (the job behind ``render_html``)."""
+    return get_render_engine().convert(content)
+
+
+def render_html(content, pool=None):
+    """``render_markdown_html`` with the conversion of a cache miss run on the pool."""
+    pool = pool or get_worker_pool()
+    return render_markdown_html(
+        content,
+        convert=lambda text: pool.run(convert_markdown, text, size=len(text))
+    )
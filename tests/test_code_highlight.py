@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import patch
+
+import markdown
+
+import code_highlight
+from code_highlight import detect_language, highlight_code
+
+EXTENSIONS = ['codehilite', 'fenced_code', 'code_highlight:CachedHighlightExtension',
+              'fence_scanner:FenceScanExtension']
+CONFIGS = {'codehilite': {'css_class': 'highlight', 'guess_lang': True}}
+
+
+class TestDetectLanguage(unittest.TestCase):
+
+    def setUp(self):
+        code_highlight.clear_highlight_caches()
+
+    def test_common_languages(self):
+        """Heuristics recognise the languages our runbooks use."""
+        samples = {
+            "python": "import os\n\ndef main():\n    print(os.getcwd())\n",
+            "bash": "pip install -e .\ncd src\ngit status\n",
+            "sql": "SELECT id, name FROM users WHERE id = 1;\n",
+            "json": '{"a": [1, 2]}',
+            "yaml": "services:\n  web:\n    image: nginx\n",
+            "powershell": "$path = Get-Location\nWrite-Host $path\n",
+        }
+        for lang, code in samples.items():
+            self.assertEqual(detect_language(code), lang, code)
+
+    def test_result_is_memoized(self):
+        """Pygments' guess runs once per distinct snippet."""
+        with patch.object(code_highlight, 'guess_lexer', wraps=code_highlight.guess_lexer) as guess:
+            detect_language("just some words")
+            detect_language("just some words")
+        self.assertEqual(guess.call_count, 1)
+
+
+class TestHighlightCache(unittest.TestCase):
+
+    def setUp(self):
+        code_highlight.clear_highlight_caches()
+
+    def test_labeled_fences_match_codehilite(self):
+        """Labeled fences render exactly as plain codehilite + fenced_code."""
+        text = "```python\nx = 1\n```\n\n```js {hl_lines=\"1\"}\nlet a = 1;\n```\n"
+        plain = markdown.markdown(text, extensions=EXTENSIONS[:2], extension_configs=CONFIGS)
+        cached = markdown.markdown(text, extensions=EXTENSIONS, extension_configs=CONFIGS)
+        self.assertEqual(cached, plain)
+
+    def test_fragments_are_reused_across_documents(self):
+        """The same snippet is highlighted once, whichever document it is in."""
+        with patch.object(code_highlight, 'CodeHilite', wraps=code_highlight.CodeHilite) as hilite:
+            for title in ("One", "Two"):
+                markdown.markdown(f"# {title}\n\n```\npip install -e .\n```\n",
+                                  extensions=EXTENSIONS, extension_configs=CONFIGS)
+        self.assertEqual(hilite.call_count, 1)
+
+    def test_options_are_part_of_the_key(self):
+        """A different style or language produces a separate entry."""
+        config = {'css_class': 'highlight', 'guess_lang': False, 'pygments_style': 'default'}
+        html = highlight_code("x = 1\n", "python", config)
+        self.assertNotEqual(html, highlight_code("x = 1\n", "python", dict(config, css_class='other')))
+        self.assertNotEqual(html, highlight_code("x = 1\n", "text", config))
+
+
+if __name__ == '__main__':
+    unittest.main()
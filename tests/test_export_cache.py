@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import export_cache
+from export_cache import ExportCache, get_export_cache, pdf_export_key, printable_html_key
+
+
+class TestExportCacheKeys(unittest.TestCase):
+
+    def test_pdf_key_depends_on_content_converter_and_page_size(self):
+        """Changing the text, the converter version or the page size changes the key."""
+        key = pdf_export_key("# Title")
+        self.assertEqual(key, pdf_export_key("# Title"))
+        self.assertNotEqual(key, pdf_export_key("# Title!"))
+        with mock.patch.object(export_cache, "CONVERTER_VERSION", -1):
+            self.assertNotEqual(key, pdf_export_key("# Title"))
+        with mock.patch.object(export_cache, "PAGE_SIZE", (612.0, 792.0)):
+            self.assertNotEqual(key, pdf_export_key("# Title"))
+
+    def test_print_key_differs_from_pdf_key_and_by_title(self):
+        """The same document gets distinct keys per artifact and print title."""
+        key = printable_html_key("# Title", "notes", "mermaid.js")
+        self.assertNotEqual(key, pdf_export_key("# Title"))
+        self.assertNotEqual(key, printable_html_key("# Title", "other", "mermaid.js"))
+        self.assertNotEqual(key, printable_html_key("# Title", "notes", "cdn.js"))
+
+
+class TestExportCache(unittest.TestCase):
+
+    def setUp(self):
+        self.disk_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.disk_dir, ignore_errors=True)
+
+    def test_artifacts_are_shared_through_the_directory(self):
+        """A second cache on the same directory (another replica) serves the bytes unchanged."""
+        data = b"%PDF-1.4\n\x00\xff binary"
+        ExportCache(max_bytes=1024, disk_dir=self.disk_dir).put("abcd", data)
+        self.assertTrue(os.path.exists(os.path.join(self.disk_dir, "ab", "abcd.export")))
+        other = ExportCache(max_bytes=1024, disk_dir=self.disk_dir)
+        self.assertEqual(other.get_or_render("abcd", lambda: self.fail("rebuilt")), data)
+        self.assertEqual(other.stats["disk_hits"], 1)
+
+    def test_disk_tier_is_pruned_to_its_budget(self):
+        """Pruning keeps the directory within its byte budget."""
+        cache = ExportCache(max_bytes=1024, disk_dir=self.disk_dir, disk_max_bytes=250)
+        for n in range(5):
+            cache.put(f"{n:02d}key", bytes(100))
+        cache.prune_disk()
+        remaining = sum(len(files) for _, _, files in os.walk(self.disk_dir))
+        self.assertEqual(remaining, 2)
+
+    def test_shared_instance(self):
+        self.assertIs(get_export_cache(), get_export_cache())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import time
+import unittest
+
+from export_jobs import (CANCELLED, DONE, FAILED, STAGE_LAYOUT, ExportJobQueue, JobCancelled,
+                         JobTimeout, WorkerPoolBusy, pdf_job)
+
+
+def _steps_job(progress, steps, delay=0.0):
+    for done in range(1, steps + 1):
+        time.sleep(delay)
+        progress(done, steps)
+    return os.getpid()
+
+
+def _failing_job(progress):
+    raise ValueError("broken document")
+
+
+def _stuck_job(progress, seconds):
+    # Never reports progress, so it cannot see its cancel flag
+    time.sleep(seconds)
+
+
+class TestExportJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = ExportJobQueue(workers=1, queue_limit=2, inline_max_bytes=100)
+
+    def tearDown(self):
+        self.jobs.shutdown()
+
+    def wait(self, job_id, timeout=30):
+        deadline = time.monotonic() + timeout
+        job = self.jobs.get(job_id)
+        while not job.future.done() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return job
+
+    def test_small_jobs_run_inline_with_progress(self):
+        job_id = self.jobs.submit(_steps_job, 3, size=10)
+        job = self.jobs.get(job_id)
+        self.assertEqual((job.status, job.result()), (DONE, os.getpid()))
+        self.assertEqual(self.jobs.progress(job_id), (3, 3, STAGE_LAYOUT))
+        failed = self.jobs.get(self.jobs.submit(_failing_job, size=10))
+        self.assertEqual(failed.status, FAILED)
+        self.assertIsInstance(failed.error, ValueError)
+
+    def test_pdf_job_runs_in_worker_process(self):
+        job = self.wait(self.jobs.submit(pdf_job, "<h1>Title</h1><p>Text</p>", label="doc.pdf"))
+        self.assertEqual(job.status, DONE)
+        self.assertTrue(job.result().startswith(b"%PDF"))
+        done, total, stage = self.jobs.progress(job.id)
+        self.assertEqual((done, total, stage), (2, 2, STAGE_LAYOUT))
+
+    def test_running_job_is_cancelled_at_next_progress_report(self):
+        job_id = self.jobs.submit(_steps_job, 200, 0.05)
+        deadline = time.monotonic() + 30
+        while self.jobs.progress(job_id)[0] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.jobs.cancel(job_id)
+        job = self.wait(job_id)
+        self.assertEqual(job.status, CANCELLED)
+        self.assertIsInstance(job.future.exception(), JobCancelled)
+        self.assertLess(self.jobs.progress(job_id)[0], 200)
+
+    def test_full_queue_refuses_jobs_until_a_slot_is_free(self):
+        running = self.jobs.submit(_steps_job, 100, 0.05)
+        queued = self.jobs.submit(_steps_job, 1)
+        with self.assertRaises(WorkerPoolBusy):
+            self.jobs.submit(_steps_job, 1)
+        self.jobs.cancel(queued)
+        self.jobs.discard(running)
+        self.wait(queued)
+        deadline = time.monotonic() + 30
+        while len(self.jobs._free_slots) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.wait(self.jobs.submit(_steps_job, 1, size=10)).status, DONE)
+
+
+class TestExportJobDeadlines(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = ExportJobQueue(workers=1, queue_limit=3, inline_max_bytes=100,
+                                   timeout=2, watch_seconds=0.1)
+
+    def tearDown(self):
+        self.jobs.shutdown()
+
+    def wait_for(self, condition, timeout=30):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def test_job_past_its_deadline_is_killed_and_the_rest_move_on(self):
+        stuck = self.jobs.submit(_stuck_job, 60)
+        queued = self.jobs.submit(_steps_job, 1)
+        self.wait_for(lambda: self.jobs.get(stuck).status == FAILED)
+        self.assertIsInstance(self.jobs.get(stuck).error, JobTimeout)
+        self.wait_for(lambda: self.jobs.get(queued).status == DONE)
+        self.assertEqual(self.jobs.get(queued).status, DONE)
+
+    def test_stuck_cancelled_job_is_killed(self):
+        self.jobs.timeout = 60
+        stuck = self.jobs.submit(_stuck_job, 60)
+        self.wait_for(lambda: self.jobs.get(stuck).future.running())
+        self.jobs.cancel(stuck)
+        self.wait_for(lambda: self.jobs.get(stuck).future.done())
+        self.assertEqual(self.jobs.get(stuck).status, CANCELLED)
+        self.assertRaises(JobCancelled, self.jobs.get(stuck).result)
+
+    def test_uncollected_results_expire_without_new_submissions(self):
+        self.jobs.result_ttl = 0.5
+        job_id = self.jobs.submit(_steps_job, 1, size=10)
+        self.wait_for(lambda: self.jobs.get(job_id) is None, timeout=10)
+        self.assertIsNone(self.jobs.get(job_id))
+        self.assertEqual(len(self.jobs._free_slots), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from fence_scanner import Fence, preprocess_mermaid, scan_fences
+from render_engine import RenderEngine
+
+
+class TestScanFences(unittest.TestCase):
+
+    def test_fences_follow_fenced_code_rules(self):
+        """Tilde and longer markers work; a shorter or different marker does not close a fence."""
+        lines = ["intro", "~~~python", "x = 1", "~~~", "````", "```", "inner", "```", "````", "outro"]
+        items = list(scan_fences(lines))
+        self.assertEqual(items[0], "intro")
+        self.assertEqual((items[1].lang, items[1].lines), ("python", ["x = 1"]))
+        self.assertEqual(items[2].lines, ["```", "inner", "```"])
+        self.assertEqual(items[3], "outro")
+
+    def test_unclosed_fence_is_text(self):
+        """An unclosed opener stays a line and fences after it are still found."""
+        items = list(scan_fences(["```", "text", "~~~", "code", "~~~"]))
+        self.assertEqual(items[:2], ["```", "text"])
+        self.assertIsInstance(items[2], Fence)
+        self.assertEqual(items[2].lines, ["code"])
+
+    def test_lists_are_scanned_like_streams(self):
+        """The regex scan of a list finds the same fences as the line-by-line scan."""
+        lines = ["```", "```python x", "a", "```", "````", "~~~", "```", "````", "",
+                 "```{.py #id}", "b", "```  ", "~~~.js hl_lines=\"1\"", "~~~", "```", "``` ", "```"]
+
+        def flatten(items):
+            return [item if isinstance(item, str) else
+                    (item.open_line, item.lang, item.attrs, item.hl_lines, item.lines, item.close_line)
+                    for item in items]
+
+        self.assertEqual(flatten(scan_fences(lines)), flatten(scan_fences(iter(lines))))
+        self.assertEqual(preprocess_mermaid(lines), list(preprocess_mermaid(iter(lines))))
+
+    def test_lines_are_consumed_lazily(self):
+        """Blocks are yielded as soon as they close, so files can be streamed."""
+        consumed = []
+
+        def source():
+            for line in ["a", "```", "b", "```", "c"]:
+                consumed.append(line)
+                yield line
+
+        scanner = scan_fences(source())
+        next(scanner)
+        self.assertEqual(consumed, ["a"])
+        self.assertIsInstance(next(scanner), Fence)
+        self.assertEqual(consumed, ["a", "```", "b", "```"])
+
+
+class TestMermaid(unittest.TestCase):
+
+    def test_mermaid_detection(self):
+        """Labeled mermaid fences and unlabeled graphs become divs; other code is kept."""
+        text = ("```mermaid\nA-->B\n```\n```\n\nflowchart LR\n```\n```python\ngraph = {}\n```\n"
+                "```\ngraph \n```\n~~~MerMaid\n~~~")
+        self.assertEqual(
+            list(preprocess_mermaid(text.split("\n"))),
+            ['<div class="mermaid">', "A-->B", "</div>",
+             '<div class="mermaid">', "", "flowchart LR", "</div>",
+             "```python", "graph = {}", "```",
+             "```", "graph ", "```", '<div class="mermaid">', "</div>"]
+        )
+        self.assertEqual(list(preprocess_mermaid(iter(text.split("\n")))), preprocess_mermaid(text.split("\n")))
+
+    def test_render_pipeline(self):
+        """The engine renders diagrams as divs and highlights code in the same pass."""
+        html = RenderEngine().convert("```mermaid\ngraph TD\n```\n\n```python\nx = 1\n```\n\n```python hl_lines=\"1\"\ny\n```")
+        self.assertIn('<div class="mermaid">\ngraph TD\n</div>', html)
+        self.assertIn('<div class="highlight"><pre><span></span><code><span class="n">x</span>', html)
+        # Line highlighting is still handled by fenced_code
+        self.assertIn('<span class="hll">', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import file_index
+from file_index import FileIndex, INDEX_DIR, INDEX_FILE_NAME
+
+
+class TestFileIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small folder tree for each test."""
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "docs", "nested"))
+        self._write("README.md")
+        self._write(os.path.join("docs", "guide.markdown"))
+        self._write(os.path.join("docs", "nested", "notes.md"))
+        self._write(os.path.join("docs", "image.png"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write(self, rel_path, content="# Title\n"):
+        with open(os.path.join(self.root, rel_path), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def _age_tree(self):
+        """Push all mtimes into the past so the index trusts them."""
+        old = 1_000_000_000
+        for dirpath, _, _ in os.walk(self.root):
+            os.utime(dirpath, (old, old))
+
+    def test_refresh_lists_markdown_files(self):
+        """Only markdown files are returned, sorted by relative path."""
+        files = FileIndex(self.root).refresh()
+        self.assertEqual(
+            [rel for rel, _ in files],
+            sorted(["README.md", os.path.join("docs", "guide.markdown"),
+                    os.path.join("docs", "nested", "notes.md")])
+        )
+        for rel, full in files:
+            self.assertEqual(full, os.path.join(self.root, rel))
+
+    def test_index_is_persisted(self):
+        """A new index instance loads the saved listing from .fyiai/index."""
+        FileIndex(self.root).refresh()
+        self.assertTrue(os.path.exists(os.path.join(self.root, INDEX_DIR, INDEX_FILE_NAME)))
+
+        index = FileIndex(self.root)
+        index._load()
+        self.assertEqual(len(index._files), 3)
+
+    def test_unchanged_directories_are_not_rescanned(self):
+        """Directories with a trusted, unchanged mtime are served from the index."""
+        index = FileIndex(self.root)
+        index.refresh()
+        self._age_tree()
+        index.refresh()
+
+        with patch.object(file_index, 'scan_directory', wraps=file_index.scan_directory) as scan:
+            index.refresh()
+        scan.assert_not_called()
+
+    def test_changed_directory_is_rescanned(self):
+        """Adding a file bumps the version and shows up in the listing."""
+        index = FileIndex(self.root)
+        index.refresh()
+        self._age_tree()
+        index.refresh()
+        version = index.version
+
+        self._write(os.path.join("docs", "nested", "new.md"))
+        files = index.refresh()
+        self.assertIn(os.path.join("docs", "nested", "new.md"), [rel for rel, _ in files])
+        self.assertEqual(index.version, version + 1)
+
+    def test_ignored_directories_are_pruned(self):
+        """Default ignore rules keep dependency folders out of the index."""
+        os.makedirs(os.path.join(self.root, "node_modules", "pkg"))
+        self._write(os.path.join("node_modules", "pkg", "README.md"))
+        files = FileIndex(self.root).refresh()
+        self.assertEqual(len(files), 3)
+
+    def test_removed_directory_is_dropped(self):
+        """Deleting a directory removes its files from the index."""
+        index = FileIndex(self.root)
+        index.refresh()
+        shutil.rmtree(os.path.join(self.root, "docs", "nested"))
+        files = index.refresh()
+        self.assertNotIn(os.path.join("docs", "nested", "notes.md"), [rel for rel, _ in files])
+
+    def test_new_ignore_patterns_drop_the_stale_listing(self):
+        """Changing the patterns empties the snapshot until the next refresh lists the new set."""
+        os.makedirs(os.path.join(self.root, "node_modules"))
+        self._write(os.path.join("node_modules", "README.md"))
+        index = FileIndex(self.root)
+        index.refresh()
+        version = index.version
+        index.set_ignore_patterns(["docs"])
+        self.assertFalse(index.has_listing())
+        self.assertEqual(index.snapshot(), (version + 1, (), ()))
+        files = [rel for rel, _ in index.refresh()]
+        self.assertEqual(files, ["README.md", os.path.join("node_modules", "README.md")])
+        self.assertTrue(index.has_listing())
+        self.assertGreater(index.snapshot()[0], version + 1)
+
+    def test_ignore_patterns_are_relative_to_the_ignore_root(self):
+        """Indexing a subfolder applies anchored patterns as seen from the project root."""
+        docs = os.path.join(self.root, "docs")
+        index = FileIndex(docs, ["/docs/nested/"], ignore_root=self.root)
+        self.assertEqual([rel for rel, _ in index.refresh()], ["guide.markdown"])
+        index.set_ignore_patterns(["/docs/nested/"])
+        self.assertEqual(len(index.refresh()), 2)
+        index.set_ignore_patterns(["/docs/nested/"], ignore_root=self.root)
+        self.assertEqual(FileIndex(docs, ["/docs/nested/"], ignore_root=self.root).refresh(),
+                         index.refresh())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from file_scanner import (DEFAULT_IGNORE_PATTERNS, IgnoreRules, ignore_base,
+                          load_ignore_patterns, scan_markdown_files)
+
+
+class TestIgnoreRules(unittest.TestCase):
+
+    def test_directory_patterns(self):
+        """Trailing-slash rules only match directories, at any depth."""
+        rules = IgnoreRules(["node_modules/"])
+        self.assertTrue(rules.is_ignored("node_modules", is_dir=True))
+        self.assertTrue(rules.is_ignored("web/node_modules", is_dir=True))
+        self.assertFalse(rules.is_ignored("node_modules", is_dir=False))
+
+    def test_anchored_and_wildcard_patterns(self):
+        """Rules containing a slash are anchored at the patterns' root."""
+        rules = IgnoreRules(["/drafts", "docs/*.tmp.md", "**/generated/**"])
+        self.assertTrue(rules.is_ignored("drafts", is_dir=True))
+        self.assertFalse(rules.is_ignored("notes/drafts", is_dir=True))
+        self.assertTrue(rules.is_ignored("docs/a.tmp.md"))
+        self.assertFalse(rules.is_ignored("docs/sub/a.tmp.md"))
+        self.assertTrue(rules.is_ignored("a/generated/b.md"))
+
+    def test_base_keeps_rules_relative_to_their_root(self):
+        """Scanning a subfolder matches paths as seen from the patterns' root."""
+        rules = IgnoreRules(["/docs/drafts/", "drafts/", "/*.tmp.md"], base="docs")
+        self.assertTrue(rules.is_ignored("drafts", is_dir=True))
+        self.assertTrue(rules.is_ignored("sub/drafts", is_dir=True))
+        self.assertFalse(rules.is_ignored("a.tmp.md"))
+        self.assertFalse(IgnoreRules(["/docs/drafts/"]).is_ignored("drafts", is_dir=True))
+
+    def test_ignore_base(self):
+        """The base is the scan root below the patterns' root, or empty outside it."""
+        root = os.path.abspath("project")
+        self.assertEqual(ignore_base(os.path.join(root, "docs", "api"), root), "docs/api")
+        self.assertEqual(ignore_base(root, root), "")
+        self.assertEqual(ignore_base(os.path.abspath("elsewhere"), root), "")
+        self.assertEqual(ignore_base(root, None), "")
+
+    def test_negation_and_comments(self):
+        """The last matching rule wins; comments are skipped."""
+        rules = IgnoreRules(["# comment", "*.md", "!keep.md"])
+        self.assertTrue(rules.is_ignored("other.md"))
+        self.assertFalse(rules.is_ignored("keep.md"))
+        self.assertFalse(rules.is_ignored("# comment"))
+
+
+class TestScanMarkdownFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for rel in ["README.md", "docs/guide.md", "docs/deep/notes.markdown",
+                    ".git/info.md", "node_modules/pkg/README.md", "ai-summary/x/summary.md",
+                    "drafts/wip.md"]:
+            path = os.path.join(self.root, *rel.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("# Doc\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _scan(self, rules=None, max_workers=None):
+        return sorted(rel.replace(os.sep, "/") for rel, _ in
+                      scan_markdown_files(self.root, rules, max_workers))
+
+    def test_default_rules_prune_noise(self):
+        """VCS, dependency and AI summary folders are skipped."""
+        self.assertEqual(self._scan(),
+                         ["README.md", "docs/deep/notes.markdown", "docs/guide.md", "drafts/wip.md"])
+
+    def test_serial_and_parallel_agree(self):
+        """The thread pool finds exactly what a serial walk finds."""
+        self.assertEqual(self._scan(max_workers=1), self._scan(max_workers=8))
+
+    def test_project_config_patterns(self):
+        """ignore_patterns from the sync config are added to the defaults."""
+        config_dir = os.path.join(self.root, ".fyiai", "cloud", "sync")
+        os.makedirs(config_dir)
+        with open(os.path.join(config_dir, "config.json"), 'w', encoding='utf-8') as f:
+            json.dump({"ignore_patterns": ["drafts/"]}, f)
+
+        patterns = load_ignore_patterns(self.root)
+        self.assertEqual(patterns[:len(DEFAULT_IGNORE_PATTERNS)], DEFAULT_IGNORE_PATTERNS)
+        self.assertNotIn("drafts/wip.md", self._scan(IgnoreRules(patterns)))
+
+    def test_project_config_patterns_are_relative_to_the_project_root(self):
+        """Anchored config patterns still apply when a subfolder is scanned."""
+        config_dir = os.path.join(self.root, ".fyiai", "cloud", "sync")
+        os.makedirs(config_dir)
+        with open(os.path.join(config_dir, "config.json"), 'w', encoding='utf-8') as f:
+            json.dump({"ignore_patterns": ["/docs/deep/"]}, f)
+
+        docs = os.path.join(self.root, "docs")
+        rules = IgnoreRules(load_ignore_patterns(self.root), ignore_base(docs, self.root))
+        found = sorted(rel.replace(os.sep, "/") for rel, _ in scan_markdown_files(docs, rules))
+        self.assertEqual(found, ["guide.md"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import unittest
+
+from file_tree import FileTree, ancestor_dirs
+
+
+def _pairs(*rel_paths):
+    return [(os.path.join(*p.split("/")), "/root/" + p) for p in rel_paths]
+
+
+class TestFileTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = FileTree(_pairs("b.md", "A.md", "docs/guide.md", "docs/api/ref.md", "Zeta/x.md"))
+
+    def test_children_are_sorted_directories_first(self):
+        """Entries list directories before files, each case-insensitively sorted."""
+        names = [(kind, name) for kind, _, name in self.tree.entries("")]
+        self.assertEqual(names, [("dir", "docs"), ("dir", "Zeta"), ("file", "A.md"), ("file", "b.md")])
+
+    def test_recursive_file_counts(self):
+        """Each directory knows how many files live below it."""
+        self.assertEqual(len(self.tree), 5)
+        self.assertEqual(self.tree.file_count("docs"), 2)
+        self.assertEqual(self.tree.file_count(os.path.join("docs", "api")), 1)
+
+    def test_entries_are_paged(self):
+        """A limit returns only the first page of a directory."""
+        self.assertEqual(len(self.tree.entries("", limit=3)), 3)
+        self.assertEqual(self.tree.entry_count(""), 4)
+
+    def test_ancestor_dirs(self):
+        """Ancestors are returned outermost first."""
+        self.assertEqual(ancestor_dirs(os.path.join("a", "b", "c.md")), ["a", os.path.join("a", "b")])
+        self.assertEqual(ancestor_dirs("c.md"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import file_watcher
+from file_watcher import FolderWatcher
+
+
+def wait_for(predicate, timeout=5.0):
+    """Poll until predicate() is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestFolderWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        with open(os.path.join(self.root, "a.md"), 'w', encoding='utf-8') as f:
+            f.write("# A\n")
+        self.watcher = None
+
+    def tearDown(self):
+        if self.watcher:
+            self.watcher.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _snapshot_names(self):
+        return [rel for rel, _ in self.watcher.snapshot()[1]]
+
+    def test_initial_snapshot(self):
+        """Starting the watcher indexes the folder synchronously."""
+        self.watcher = FolderWatcher(self.root)
+        self.watcher.start()
+        self.assertEqual(self._snapshot_names(), ["a.md"])
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_picks_up_new_directories(self):
+        """Files in newly created directories show up without a manual refresh."""
+        self.watcher = FolderWatcher(self.root)
+        self.watcher.start()
+        self.assertTrue(wait_for(lambda: self.watcher.backend == "inotify"))
+
+        os.makedirs(os.path.join(self.root, "sub"))
+        with open(os.path.join(self.root, "sub", "b.md"), 'w', encoding='utf-8') as f:
+            f.write("# B\n")
+
+        expected = os.path.join("sub", "b.md")
+        self.assertTrue(wait_for(lambda: expected in self._snapshot_names()))
+
+    @patch.object(file_watcher, 'FILE_WATCHER_POLL_INTERVAL', 0.05)
+    @patch.object(file_watcher.sys, 'platform', 'win32')
+    def test_polling_fallback(self):
+        """Without inotify the watcher polls the index."""
+        self.watcher = FolderWatcher(self.root)
+        self.watcher.start()
+        self.assertTrue(wait_for(lambda: self.watcher.backend == "polling"))
+
+        os.remove(os.path.join(self.root, "a.md"))
+        self.assertTrue(wait_for(lambda: self._snapshot_names() == []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from heading_index import extract_headings, get_document_outline
+from render_engine import get_render_engine
+
+
+class TestExtractHeadings(unittest.TestCase):
+
+    def test_anchors_match_rendered_ids(self):
+        """Anchors equal the ids the toc extension gives the rendered headings."""
+        text = (
+            "# Intro\n\n## Intro\n\nSetext Title\n============\n\n"
+            "Second *level* `code`\n---------------------\n\n"
+            "# [Link](https://example.com) & **bold** snake_case_name\n\n"
+            "# Custom {#my-id}\n\n> # Quoted\n\n# Žlutý kůň\n\n# Intro\n"
+        )
+        rendered = get_render_engine().convert(text)
+        expected = [(int(level), anchor) for level, anchor in re.findall(r'<h([1-6]) id="([^"]*)"', rendered)]
+        self.assertEqual([(h.level, h.anchor) for h in extract_headings(text.splitlines())], expected)
+
+    def test_fenced_code_is_skipped(self):
+        """Hash lines in fences are not headings; line numbers count the fence lines."""
+        text = "# One\n\n```bash\n# comment\n```\n\n## Two ##\n"
+        self.assertEqual(
+            [(h.level, h.title, h.line) for h in extract_headings(text.splitlines())],
+            [(1, "One", 0), (2, "Two", 6)]
+        )
+
+    def test_empty_headings_keep_their_anchor(self):
+        """A heading without text is not listed but still takes an id, as in the rendered page."""
+        headings = extract_headings(["#", "", "# _1"])
+        self.assertEqual([(h.title, h.anchor) for h in headings], [("_1", "_2")])
+
+
+class TestDocumentOutline(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "doc.md")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_outline_follows_file_changes(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("# First\n")
+        self.assertEqual([h.title for h in get_document_outline(self.path)], ["First"])
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("# First\n\n## Second\n")
+        self.assertEqual([h.title for h in get_document_outline(self.path)], ["First", "Second"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from large_document import LargeDocument, get_large_document
+
+
+class TestLargeDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "book.md")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, text):
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+
+    def test_outline_skips_fenced_code(self):
+        """Hash lines inside fences are not headings; text before the first heading is its own page."""
+        self.write("Preface\n\n# One\n\n```bash\n# comment\n```\n\n## Two ##\n\ntext\n")
+        document = LargeDocument(self.path)
+        self.assertEqual([(h.level, h.title) for h in document.headings], [(1, "One"), (2, "Two")])
+        self.assertEqual(document.page_title(0), "Start of document")
+        self.assertEqual(document.page_text(document.headings[1].page), "## Two ##\n\ntext\n")
+
+    def test_unclosed_fence_does_not_hide_headings(self):
+        """As in fenced_code, an opener without a closing fence is plain text."""
+        self.write("# A\n\n```\nnot closed\n\n# B\n")
+        self.assertEqual([h.title for h in LargeDocument(self.path).headings], ["A", "B"])
+
+    def test_long_sections_split_outside_fences(self):
+        """Pages cover the file contiguously and never cut through a code block."""
+        code = "```\n" + "line\n\n" * 50 + "```\n\n"
+        self.write("# Big\n\n" + ("para\n\n" * 20 + code) * 5 + "# Next\n\nend\n")
+        document = LargeDocument(self.path, page_bytes=200)
+        text = "".join(document.page_text(i) for i in range(len(document.pages)))
+        with open(self.path, encoding="utf-8", newline="") as f:
+            self.assertEqual(text, f.read())
+        self.assertGreater(len(document.pages), 3)
+        for i in range(len(document.pages)):
+            self.assertEqual(document.page_text(i).count("```") % 2, 0)
+        self.assertEqual(document.page_title(len(document.pages) - 1), "Next")
+
+    def test_index_is_shared_until_the_file_changes(self):
+        """The process-wide index is reused, then rebuilt after the file is modified."""
+        self.write("# First\n")
+        document = get_large_document(self.path)
+        self.assertIs(get_large_document(self.path), document)
+        time.sleep(0.01)
+        self.write("# First\n\n# Second\n")
+        self.assertEqual(len(get_large_document(self.path).headings), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import re
+import unittest
+
+from markdown_backends import MARKDOWN_IT, PYTHON_MARKDOWN, MarkdownIt, parse_attrs
+from render_engine import RenderEngine
+
+SAMPLE = """# Title {#custom .lead}
+
+## Setup `pip` & *run*
+
+## Setup `pip` & *run*
+
+A [link](guide.md){: .internal} and
+a second line.
+
+Term
+: Definition
+
+| a | b |
+|:--|--:|
+| 1 | 2 |
+
+```python
+x = 1
+```
+
+```
+graph TD
+    A --> B
+```
+"""
+
+
+class TestParseAttrs(unittest.TestCase):
+
+    def test_ids_classes_and_values(self):
+        self.assertEqual(
+            parse_attrs('#intro .a .b data-x="1 2" lang=en'),
+            [("id", "intro"), ("data-x", "1 2"), ("lang", "en"), ("class", "a b")]
+        )
+
+
+class TestBackendSelection(unittest.TestCase):
+
+    def test_unknown_backend_falls_back_to_python_markdown(self):
+        engine = RenderEngine(backend="no-such-engine")
+        self.assertIsNone(engine.backend)
+        self.assertEqual(engine.backend_name, PYTHON_MARKDOWN)
+        self.assertIn("extensions", engine.profile_config())
+
+
+@unittest.skipIf(MarkdownIt is None, "markdown-it-py is not installed")
+class TestMarkdownItBackend(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = RenderEngine(backend=PYTHON_MARKDOWN).convert(SAMPLE)
+        cls.engine = RenderEngine(backend=MARKDOWN_IT)
+        cls.html = cls.engine.convert(SAMPLE)
+
+    def test_heading_ids_match_toc(self):
+        """Custom ids, slugs and _1 suffixes are the same as with the toc extension."""
+        ids = re.compile(r'<h[1-6][^>]* id="([^"]*)"')
+        self.assertEqual(ids.findall(self.html), ids.findall(self.reference))
+        self.assertIn('class="lead"', self.html)
+
+    def test_blocks_match_python_markdown(self):
+        """Highlighted code, Mermaid, tables, attr_list, def_list and nl2br render alike."""
+        for fragment in ('<div class="mermaid">\ngraph TD\n    A --> B\n</div>',
+                         '<span class="n">x</span> <span class="o">=</span>',
+                         '<th style="text-align: left;">a</th>',
+                         '<dt>Term</dt>\n<dd>Definition</dd>',
+                         'and<br />\na second line.'):
+            self.assertIn(fragment, self.reference)
+            self.assertIn(fragment, self.html)
+        self.assertIn('<a href="guide.md" class="internal">link</a>', self.html)
+
+    def test_block_structure_follows_commonmark(self):
+        """Not a drop-in replacement: a list right after a paragraph line starts a list."""
+        text = "Steps:\n- one\n- two\n"
+        self.assertIn("Steps:<br />\n- one", RenderEngine(backend=PYTHON_MARKDOWN).convert(text))
+        self.assertIn("<ul>\n<li>one</li>", self.engine.convert(text))
+
+    def test_backend_is_part_of_the_cache_config(self):
+        config = self.engine.profile_config()
+        self.assertEqual(config["backend"], MARKDOWN_IT)
+        self.assertNotEqual(config, RenderEngine(backend=PYTHON_MARKDOWN).profile_config())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import re
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pdf_book
+from pdf_book import _BookTemplate, _document_elements, build_book, build_book_bytes
+from pdf_export import FRAME_WIDTH
+
+
+class TestPdfBook(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for name, text in (("intro.md", "# Intro\n\nWelcome.\n\n## Setup\n\nSteps."),
+                           ("guide/usage.md", "# Usage\n\n### Deep heading\n\n- one\n- two\n")):
+            path = os.path.join(self.tmp.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            self.files.append((name, path))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def outline_titles(self, pdf_data):
+        return re.findall(rb"/Title \(([^)]*)\)", pdf_data)
+
+    def test_document_elements_prefix_anchors(self):
+        rel_path, elements, error = _document_elements((3, *self.files[0], FRAME_WIDTH))
+        self.assertEqual((rel_path, error), ("intro.md", None))
+        self.assertIn('<a name="doc3-intro"/>', elements[0].text)
+
+    def test_book_has_outline_in_file_order(self):
+        pdf_data, summary = build_book_bytes(self.files, "Handbook", workers=1)
+        self.assertTrue(pdf_data.startswith(b"%PDF"))
+        self.assertEqual((summary.documents, summary.failed), (2, []))
+        # Title page, then one page per document
+        self.assertEqual(summary.pages, 3)
+        titles = self.outline_titles(pdf_data)
+        self.assertEqual(titles[0], b"Handbook")
+        self.assertEqual(titles[1:], [b"intro.md", b"Intro", b"Setup", b"guide/usage.md", b"Usage", b"Deep heading"])
+
+    def test_outline_levels_do_not_skip(self):
+        doc = _BookTemplate(os.path.join(self.tmp.name, "out.pdf"))
+        entries = []
+        doc.beforeDocument()
+        doc.page = 1
+        doc.canv = type("Canvas", (), {
+            "bookmarkPage": lambda self, key: None,
+            "addOutlineEntry": lambda self, text, key, level, closed: entries.append((text, level)),
+        })()
+        _, elements, _ = _document_elements((0, *self.files[1], FRAME_WIDTH))
+        for flowable in elements:
+            doc.afterFlowable(flowable)
+        self.assertEqual(entries, [("Usage", 0), ("Deep heading", 1)])
+
+    def test_unreadable_files_are_reported(self):
+        output = os.path.join(self.tmp.name, "book.pdf")
+        files = self.files + [("missing.md", os.path.join(self.tmp.name, "missing.md"))]
+        progress = []
+        summary = build_book(files, output, workers=2, progress=lambda *args: progress.append(args),
+                             inline_max_bytes=0)
+        self.assertEqual(summary.documents, 2)
+        self.assertEqual([rel_path for rel_path, _ in summary.failed], ["missing.md"])
+        self.assertEqual([done for done, _, _ in progress], [1, 2, 3])
+        with open(output, "rb") as f:
+            self.assertIn(b"guide/usage.md", b"".join(self.outline_titles(f.read())))
+
+    def test_small_books_are_converted_without_a_pool(self):
+        with mock.patch.object(pdf_book, "ProcessPoolExecutor", side_effect=AssertionError("pool started")):
+            _, summary = build_book_bytes(self.files, workers=4)
+        self.assertEqual(summary.documents, 2)
+
+    def test_failing_progress_stops_the_pool(self):
+        files = self.files * 40
+
+        def cancel(done, total, rel_path):
+            raise KeyboardInterrupt("cancelled")
+
+        started = time.monotonic()
+        with self.assertRaises(KeyboardInterrupt):
+            build_book_bytes(files, workers=2, progress=cancel, inline_max_bytes=0)
+        # The remaining documents were dropped rather than converted
+        self.assertLess(time.monotonic() - started, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
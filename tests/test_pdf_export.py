@@ -0,0 +1,98 @@
+import io
+import unittest
+from unittest import mock
+
+from reportlab.platypus import ListFlowable, Paragraph, Preformatted, Table
+
+from html_document import render_markdown_html
+from pdf_export import MarkdownToPDFConverter, build_pdf, get_pdf_styles, html_to_pdf_bytes
+
+
+class TestPdfExport(unittest.TestCase):
+
+    def setUp(self):
+        self.converter = MarkdownToPDFConverter()
+
+    def elements(self, markdown_text):
+        return self.converter.markdown_to_pdf_elements(markdown_text)
+
+    def test_styles_are_built_once(self):
+        self.assertIs(MarkdownToPDFConverter().styles, get_pdf_styles())
+        self.assertIn('TableHeader-right', get_pdf_styles())
+
+    def test_paragraph_markup_and_heading_anchor(self):
+        heading, paragraph = self.elements(
+            "# Intro {#start}\n\nSome **bold**, *italic*, `a < b` and [a link](https://example.com).\n"
+        )
+        self.assertEqual(heading.style.name, 'CustomH1')
+        self.assertIn('<a name="start"/>', heading.text)
+        self.assertIn("<b>bold</b>", paragraph.text)
+        self.assertIn('<font name="Courier">a &lt; b</font>', paragraph.text)
+        self.assertIn('<a href="https://example.com"', paragraph.text)
+
+    def test_tables_become_table_flowables(self):
+        long_cell = "word " * 40
+        [table] = self.elements(f"| Name | Count |\n|:-----|------:|\n| **a** | 1 |\n| {long_cell} | 2 |\n")
+        self.assertIsInstance(table, Table)
+        self.assertEqual((table._nrows, table._ncols), (3, 2))
+        self.assertEqual(table.repeatRows, 1)
+        self.assertEqual(table._cellvalues[0][0], "Name")
+        self.assertEqual(table._cellvalues[1][1], "1")
+        # Cells with markup or too long for one line are wrapped in paragraphs
+        self.assertIsInstance(table._cellvalues[1][0], Paragraph)
+        self.assertIsInstance(table._cellvalues[2][0], Paragraph)
+
+    def test_nested_lists_and_code_blocks(self):
+        outer, code = self.elements("- one\n- two\n    1. inner\n    2. inner\n\n```python\nif a < b:\n    pass\n```\n")
+        self.assertIsInstance(outer, ListFlowable)
+        self.assertEqual(len(outer._flowables), 2)
+        nested = outer._flowables[1]._flowables[1]
+        self.assertIsInstance(nested, ListFlowable)
+        self.assertEqual(nested._bulletType, "1")
+        self.assertIsInstance(code, Preformatted)
+        self.assertEqual(code.lines, ["if a < b:", "    pass"])
+
+    def test_nested_tables_get_their_cell_width(self):
+        """Tables in table cells are laid out within the column, however deep."""
+        nested = "<table><tr><td><table><tr><td>n</td></tr></table></td></tr></table>"
+        [outer] = self.converter.html_to_pdf_elements(nested)
+        inner = outer._cellvalues[0][0][0]
+        self.assertIsInstance(inner, Table)
+        self.assertLessEqual(sum(inner._colWidths), outer._colWidths[0] - 12)
+        deep = "<table>" + "<tr><td>cell text</td><td>more</td></tr>" + "</table>"
+        for _ in range(4):
+            deep = f"<table><tr>{'<td>x</td>' * 5}<td>{deep}</td></tr></table>"
+        for html_content in (nested, deep):
+            self.assertTrue(html_to_pdf_bytes(html_content).startswith(b"%PDF"))
+
+    def test_raw_inline_html_left_open_is_balanced_per_paragraph(self):
+        """Tags open at a block's end are closed there and reopened in the next block."""
+        first, second = self.elements("Hello <b>bold\n\nnext para</b>")
+        self.assertEqual((first.text, second.text), ("Hello <b>bold</b>", "<b>next para</b>"))
+        [paragraph] = self.elements("<b><i>x</b> y</i> z")
+        self.assertEqual(paragraph.text, "<b><i>x</i></b><i> y</i> z")
+        for markdown_text in ("Hello <b>bold\n\nnext para</b>", "<div>raw <em>x</div>"):
+            self.assertTrue(html_to_pdf_bytes(render_markdown_html(markdown_text)).startswith(b"%PDF"))
+
+    def test_build_pdf_in_memory(self):
+        """The PDF never touches the disk and matches one written to a file object."""
+        markdown_text = "# Report\n\n| a | b |\n|---|---|\n| 1 | 2 |\n\n```mermaid\ngraph TD\n  A-->B\n```\n"
+        real_open = open
+
+        def read_only_open(file, mode="r", *args, **kwargs):
+            self.assertFalse(set(mode) & set("wax+"), f"{file} opened for writing")
+            return real_open(file, mode, *args, **kwargs)
+
+        # Invariant mode leaves out the timestamps, so two builds are byte-identical
+        with mock.patch("reportlab.rl_config.invariant", 1):
+            output = io.BytesIO()
+            build_pdf(markdown_text, output)
+            with mock.patch("builtins.open", read_only_open), \
+                    mock.patch("tempfile.NamedTemporaryFile", side_effect=AssertionError("temporary file")):
+                pdf = html_to_pdf_bytes(render_markdown_html(markdown_text))
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(pdf, output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
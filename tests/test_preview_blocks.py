@@ -0,0 +1,69 @@
+import unittest
+
+from preview_blocks import (dedupe_heading_ids, needs_full_render, render_incremental,
+                            split_blocks)
+
+
+class TestSplitBlocks(unittest.TestCase):
+
+    def test_headings_paragraphs_and_fences(self):
+        """Blank lines and headings split blocks; fences stay whole."""
+        text = "# Title\nIntro line\n\n```python\na = 1\n\nb = 2\n```\n\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+        self.assertEqual(split_blocks(text), [
+            "# Title",
+            "Intro line",
+            "```python\na = 1\n\nb = 2\n```",
+            "| a | b |\n|---|---|\n| 1 | 2 |",
+        ])
+
+    def test_fences_follow_the_renderer(self):
+        """Fences open and close like fenced_code: longer closers and unclosed fences are text."""
+        self.assertEqual(split_blocks("````\n```\n\nstill code\n````\n\nAfter"),
+                         ["````\n```\n\nstill code\n````", "After"])
+        self.assertEqual(split_blocks("```\nnever closed\n\nText"), ["```\nnever closed", "Text"])
+        self.assertEqual(split_blocks("```python\na\n````\n\nb\n```"), ["```python\na\n````\n\nb\n```"])
+
+    def test_continuations_stay_together(self):
+        """Loose lists, indented continuations and quotes are not split."""
+        text = "- one\n\n- two\n\n    more of two\n\n> quote\n\n> more\n\nAfter"
+        self.assertEqual(split_blocks(text), [
+            "- one\n\n- two\n\n    more of two",
+            "> quote\n\n> more",
+            "After",
+        ])
+
+    def test_cross_block_features_force_full_render(self):
+        """Reference links, [TOC] and raw HTML need the whole document."""
+        self.assertTrue(needs_full_render("See [x][1]\n\n[1]: http://example.com\n"))
+        self.assertTrue(needs_full_render("[TOC]\n\n# A\n"))
+        self.assertTrue(needs_full_render("<div>\n\nhi\n\n</div>\n"))
+        self.assertFalse(needs_full_render("# A\n\nText with <b>inline</b> html\n"))
+
+
+class TestRenderIncremental(unittest.TestCase):
+
+    def test_only_changed_blocks_are_rendered(self):
+        """Unchanged blocks come from the cache after an edit."""
+        from render_cache import RenderCache
+        cache = RenderCache()
+        rendered = []
+
+        def render_block(block):
+            rendered.append(block)
+            return f"<p>{block}</p>"
+
+        render_incremental("a\n\nb\n\nc", render_block, cache, cache_key=lambda b: b)
+        rendered.clear()
+        html = render_incremental("a\n\nB\n\nc", render_block, cache, cache_key=lambda b: b)
+        self.assertEqual(rendered, ["B"])
+        self.assertEqual(html, "<p>a</p>\n<p>B</p>\n<p>c</p>")
+
+    def test_heading_ids_are_unique(self):
+        """Repeated heading ids get toc-style suffixes."""
+        html = '<h2 id="setup">Setup</h2>\n<h2 id="setup">Setup</h2>\n<h3 id="setup">Setup</h3>'
+        self.assertEqual(dedupe_heading_ids(html),
+                         '<h2 id="setup">Setup</h2>\n<h2 id="setup_1">Setup</h2>\n<h3 id="setup_2">Setup</h3>')
+
+
+if __name__ == '__main__':
+    unittest.main()
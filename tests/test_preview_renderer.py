@@ -0,0 +1,51 @@
+import threading
+import time
+import unittest
+
+from preview_renderer import PreviewRenderer
+
+
+class TestPreviewRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.rendered = []
+        self.renderer = PreviewRenderer(self._render, debounce_seconds=0.05)
+
+    def tearDown(self):
+        self.renderer.stop()
+
+    def _render(self, text):
+        self.rendered.append(text)
+        return f"<p>{text}</p>"
+
+    def test_bursts_are_coalesced(self):
+        """Only the last text of a burst of edits is rendered."""
+        for text in ("a", "ab", "abc"):
+            self.renderer.submit(text)
+        html, pending = self.renderer.result(wait=2)
+        self.assertEqual((html, pending), ("<p>abc</p>", False))
+        self.assertEqual(self.rendered, ["abc"])
+
+    def test_last_preview_is_kept_while_pending(self):
+        """A newer submission keeps serving the previous preview until it is ready."""
+        self.renderer.render_now("old")
+        release = threading.Event()
+        self.renderer.render = lambda text: release.wait(2) and f"<p>{text}</p>"
+
+        self.renderer.submit("new")
+        time.sleep(0.1)
+        self.assertEqual(self.renderer.result(), ("<p>old</p>", True))
+        release.set()
+        self.assertEqual(self.renderer.result(wait=2), ("<p>new</p>", False))
+
+    def test_render_errors_are_reported(self):
+        """A failing render keeps the old preview and exposes the error."""
+        self.renderer.render_now("ok")
+        self.renderer.render = lambda text: 1 / 0
+        self.renderer.submit("broken")
+        self.assertEqual(self.renderer.result(wait=2), ("<p>ok</p>", False))
+        self.assertIsInstance(self.renderer.error, ZeroDivisionError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from quick_open import PathIndex, fuzzy_score
+
+
+class TestFuzzyScore(unittest.TestCase):
+
+    def test_non_subsequence_does_not_match(self):
+        """Queries whose characters are not in order are rejected."""
+        self.assertIsNone(fuzzy_score("emdr", "docs/readme.md"))
+
+    def test_file_name_beats_directory(self):
+        """A substring of the file name outranks the same text in a directory."""
+        self.assertGreater(fuzzy_score("guide", "a/guide.md"), fuzzy_score("guide", "guide/a.md"))
+
+    def test_word_boundaries_beat_scattered_letters(self):
+        """Initials of words score higher than letters in the middle of words."""
+        self.assertGreater(fuzzy_score("dn", "deploy_notes.md"), fuzzy_score("dn", "addendum.md"))
+
+    def test_offsets_survive_lowercase_expansion(self):
+        """'İ' lowercases to two characters; later offsets still index the original path."""
+        self.assertEqual(fuzzy_score("xb", "İx/ab"), fuzzy_score("xb", "Ix/ab"))
+        self.assertEqual(fuzzy_score("ist", "İstanbul.md"), fuzzy_score("ist", "Istanbul.md"))
+
+
+class TestPathIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PathIndex([
+            "README.md",
+            "docs/deploy/notes.md",
+            "docs/deploy/README.md",
+            "docs/design/overview.md",
+            "runbooks/payments-overview.md",
+        ])
+
+    def _paths(self, query, **kwargs):
+        return [path for path, _ in self.index.search(query, **kwargs)]
+
+    def test_substring_queries(self):
+        """Trigram candidates are verified, including queries spanning directories."""
+        self.assertEqual(self._paths("overview")[0], "docs/design/overview.md")
+        self.assertEqual(self._paths("deploy/read"), ["docs/deploy/README.md"])
+        self.assertEqual(self._paths("xyz"), [])
+
+    def test_fuzzy_queries(self):
+        """Scattered characters match as a subsequence of the path."""
+        self.assertEqual(self._paths("rbpay")[0], "runbooks/payments-overview.md")
+        self.assertIn("docs/deploy/notes.md", self._paths("dpl nts"))
+
+    def test_recent_files_rank_higher(self):
+        """Among equally good matches, the recently opened file wins."""
+        self.assertEqual(self._paths("readme")[0], "README.md")
+        self.assertEqual(self._paths("readme", recent=["docs/deploy/README.md"])[0], "docs/deploy/README.md")
+
+    def test_dotted_capital_i_is_found(self):
+        """Paths with characters whose lowercase form is longer are indexed and matched."""
+        index = PathIndex(["İstanbul/Notes.md", "other.md"])
+        self.assertEqual([path for path, _ in index.search("istnotes")], ["İstanbul/Notes.md"])
+        self.assertEqual([path for path, _ in index.search("İstanbul")], ["İstanbul/Notes.md"])
+
+    def test_empty_query_lists_recent_files(self):
+        """Without a query the recent files present in the index are offered."""
+        self.assertEqual(self._paths("", recent=["gone.md", "docs/design/overview.md"]),
+                         ["docs/design/overview.md"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import render_cache
+from render_cache import RenderCache, render_cache_key
+
+
+class TestRenderCacheKey(unittest.TestCase):
+
+    def test_key_depends_on_content_and_config(self):
+        """Changing the text or the renderer configuration changes the key."""
+        key = render_cache_key("# Title", {"extensions": ["tables"]})
+        self.assertEqual(key, render_cache_key("# Title", {"extensions": ["tables"]}))
+        self.assertNotEqual(key, render_cache_key("# Title!", {"extensions": ["tables"]}))
+        self.assertNotEqual(key, render_cache_key("# Title", {"extensions": ["toc"]}))
+
+    def test_key_depends_on_renderer_version(self):
+        """Bumping RENDERER_VERSION invalidates HTML rendered by older app code."""
+        key = render_cache_key("# Title", {})
+        with patch.object(render_cache, "RENDERER_VERSION", render_cache.RENDERER_VERSION + 1):
+            self.assertNotEqual(key, render_cache_key("# Title", {}))
+
+
+class TestRenderCache(unittest.TestCase):
+
+    def setUp(self):
+        self.disk_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.disk_dir, ignore_errors=True)
+
+    def test_get_or_render_renders_once(self):
+        """A second lookup is served from memory."""
+        cache = RenderCache(max_bytes=1024)
+        calls = []
+        render = lambda: calls.append(1) or "<p>x</p>"
+        self.assertEqual(cache.get_or_render("k", render), "<p>x</p>")
+        self.assertEqual(cache.get_or_render("k", render), "<p>x</p>")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats["hits"], 1)
+
+    def test_lru_is_bounded_by_bytes(self):
+        """Least recently used entries are evicted once the byte budget is exceeded."""
+        cache = RenderCache(max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+        cache.put("c", "cccc")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "aaaa")
+        self.assertLessEqual(cache.size_bytes, 10)
+
+        cache.put("huge", "x" * 100)
+        self.assertIsNone(cache.get("huge"))
+
+    def test_disk_tier_is_shared(self):
+        """A fresh cache (another process or replica) finds entries on disk."""
+        RenderCache(disk_dir=self.disk_dir).put("ab12", "<h1>T</h1>")
+        other = RenderCache(disk_dir=self.disk_dir)
+        self.assertEqual(other.get("ab12"), "<h1>T</h1>")
+        self.assertEqual(other.stats["disk_hits"], 1)
+
+    def test_disk_tier_is_pruned(self):
+        """Pruning removes files until the disk budget is met."""
+        cache = RenderCache(disk_dir=self.disk_dir, disk_max_bytes=15)
+        for key in ("aa01", "aa02", "aa03"):
+            cache.put(key, "0123456789")
+        cache.prune_disk()
+        remaining = [name for _, _, names in os.walk(self.disk_dir) for name in names]
+        self.assertEqual(len(remaining), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
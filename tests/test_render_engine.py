@@ -0,0 +1,58 @@
+import threading
+import unittest
+
+import markdown
+
+from render_engine import DEFAULT_EXTENSION_CONFIGS, DEFAULT_EXTENSIONS, RenderEngine
+
+SAMPLE = "# Setup\n\n## Setup\n\n```python\nx = 1\n```\n\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+
+
+class TestRenderEngine(unittest.TestCase):
+
+    def test_output_matches_fresh_converter(self):
+        """Pooled converters are reset, so repeated renders match a fresh instance."""
+        engine = RenderEngine()
+        expected = markdown.Markdown(extensions=DEFAULT_EXTENSIONS,
+                                     extension_configs=DEFAULT_EXTENSION_CONFIGS).convert(SAMPLE)
+        self.assertEqual(engine.convert(SAMPLE), expected)
+        # Heading ids would become setup_2, setup_3 if toc state leaked between renders
+        self.assertEqual(engine.convert(SAMPLE), expected)
+
+    def test_converters_are_reused(self):
+        """Sequential renders share one converter instance."""
+        engine = RenderEngine()
+        for _ in range(5):
+            engine.convert("text")
+        self.assertEqual(engine.stats()["default"], (1, 1))
+
+    def test_pool_is_bounded_under_concurrency(self):
+        """Concurrent renders get separate converters; only pool_size are kept."""
+        engine = RenderEngine(pool_size=2)
+        barrier = threading.Barrier(4)
+        results = []
+
+        def render():
+            with engine.converter() as md:
+                barrier.wait()
+                results.append(md.convert("*hi*"))
+
+        threads = [threading.Thread(target=render) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, ["<p><em>hi</em></p>"] * 4)
+        self.assertEqual(engine.stats()["default"], (4, 2))
+
+    def test_profiles(self):
+        """Each profile renders with its own extensions."""
+        engine = RenderEngine()
+        engine.register_profile("plain", [])
+        self.assertIn("<table>", engine.convert(SAMPLE))
+        self.assertNotIn("<table>", engine.convert(SAMPLE, profile="plain"))
+        self.assertEqual(engine.profile_config("plain"), {"extensions": [], "extension_configs": {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from search_index import SearchIndex, build_fts_query, highlight_snippet
+
+
+class TestQueryParsing(unittest.TestCase):
+
+    def test_words_phrases_and_prefix(self):
+        """Bare words are ANDed, the last one as a prefix; quotes make phrases."""
+        self.assertEqual(build_fts_query('deploy kube'), '"deploy" "kube"*')
+        self.assertEqual(build_fts_query('"blue green" deploy'), '"blue green" "deploy"*')
+        self.assertEqual(build_fts_query('deploy "blue green"'), '"deploy" "blue green"')
+
+    def test_operators_are_neutralised(self):
+        """FTS5 syntax in user input cannot break the query."""
+        self.assertEqual(build_fts_query('NEAR( a:b - ^c'), '"NEAR" "a" "b" "c"*')
+        self.assertEqual(build_fts_query('  ** '), '')
+
+    def test_snippet_is_escaped(self):
+        """Document HTML is escaped while hit markers become <mark> tags."""
+        self.assertEqual(highlight_snippet("<b>x</b>"), "&lt;b&gt;<mark>x</mark>&lt;/b&gt;")
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self._write("deploy.md", "# Deployment\n\nUse a blue green rollout for the payments service.\n")
+        self._write("notes.md", "# Notes\n\nGreen tea and blue skies.\n")
+        self.index = SearchIndex(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write(self, name, content):
+        with open(os.path.join(self.root, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def _files(self):
+        return sorted((n, os.path.join(self.root, n)) for n in os.listdir(self.root) if n.endswith(".md"))
+
+    def test_phrase_query_and_snippet(self):
+        """Phrase queries only match adjacent words and highlight them."""
+        self.index.update(self._files())
+        results = self.index.search('"blue green"')
+        self.assertEqual([r["rel_path"] for r in results], ["deploy.md"])
+        self.assertIn("<mark>blue green</mark>", results[0]["snippet"])
+
+    def test_ranking_prefers_path_matches(self):
+        """A term in the path outranks the same term in another body."""
+        self._write("green.md", "# Colours\n\nSome text.\n")
+        self.index.update(self._files())
+        self.assertEqual(self.index.search("green")[0]["rel_path"], "green.md")
+
+    def test_incremental_update(self):
+        """Only changed files are re-indexed and deleted files are dropped."""
+        self.assertEqual(self.index.update(self._files())["added"], 2)
+        self.assertEqual(self.index.update(self._files())["unchanged"], 2)
+
+        self._write("notes.md", "# Notes\n\nNothing about colours any more, just kubernetes.\n")
+        os.remove(os.path.join(self.root, "deploy.md"))
+        stats = self.index.update(self._files())
+        self.assertEqual((stats["updated"], stats["removed"]), (1, 1))
+        self.assertEqual([r["rel_path"] for r in self.index.search("kubernetes")], ["notes.md"])
+        self.assertEqual(self.index.search("payments"), [])
+
+    def test_heading_search(self):
+        """Headings are indexed with their anchors and follow edits; prefix matches rank first."""
+        self._write("guide.md", "# Guide\n\n## Blue Deployment\n\n## Deployment checklist\n")
+        self.index.update(self._files())
+        hits = self.index.find_headings("deploy")
+        self.assertEqual([(h["rel_path"], h["anchor"]) for h in hits],
+                         [("deploy.md", "deployment"), ("guide.md", "deployment-checklist"),
+                          ("guide.md", "blue-deployment")])
+        self.assertEqual(self.index.find_headings("100%"), [])
+
+        os.remove(os.path.join(self.root, "deploy.md"))
+        self.index.update(self._files())
+        self.assertEqual(len(self.index.find_headings("deploy")), 2)
+
+    def test_index_is_stored_in_project(self):
+        """The index lives in the folder's .fyiai/index directory and survives reopening."""
+        self.index.update(self._files())
+        self.assertTrue(os.path.exists(os.path.join(self.root, ".fyiai", "index", "search.sqlite3")))
+        self.assertEqual(SearchIndex(self.root).document_count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
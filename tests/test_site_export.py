@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import site_export
+from site_export import MANIFEST_NAME, export_site, rewrite_markdown_links
+
+
+class TestSiteExport(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.temp_dir, "docs")
+        self.output = os.path.join(self.temp_dir, "site")
+        self.write("index.md", "# Home\n\nSee [the guide](guide/intro.md#setup).\n")
+        self.write(os.path.join("guide", "intro.md"), "# Intro\n\n## Setup\n\nBack [home](../index.md).\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.source, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, rel_path):
+        with open(os.path.join(self.output, rel_path), encoding="utf-8") as f:
+            return f.read()
+
+    def test_rewrite_markdown_links(self):
+        """Only relative links to markdown files change; fragments and queries are kept."""
+        html = ('<a href="a.md">a</a> <a href="../b.markdown?x=1#top">b</a> '
+                '<a href="https://example.com/c.md">c</a> <a href="d.txt">d</a> <a href="#e.md">e</a>')
+        self.assertEqual(
+            rewrite_markdown_links(html),
+            '<a href="a.html">a</a> <a href="../b.html?x=1#top">b</a> '
+            '<a href="https://example.com/c.md">c</a> <a href="d.txt">d</a> <a href="#e.md">e</a>'
+        )
+
+    def test_exports_pages_with_rewritten_links(self):
+        summary = export_site(self.source, self.output, workers=1)
+        self.assertEqual((summary.rendered, summary.skipped, summary.failed), (2, 0, []))
+        self.assertIn('href="guide/intro.html#setup"', self.read("index.html"))
+        page = self.read(os.path.join("guide", "intro.html"))
+        self.assertIn('href="../index.html"', page)
+        self.assertIn("<title>intro</title>", page)
+
+    def test_rerun_renders_only_changed_sources(self):
+        export_site(self.source, self.output, workers=1)
+        self.assertEqual(export_site(self.source, self.output, workers=1).rendered, 0)
+
+        self.write("index.md", "# Home, edited\n")
+        summary = export_site(self.source, self.output, workers=1)
+        self.assertEqual((summary.rendered, summary.skipped), (1, 1))
+        self.assertIn("Home, edited", self.read("index.html"))
+        self.assertEqual(export_site(self.source, self.output, workers=1, force=True).rendered, 2)
+
+    def test_new_page_template_or_library_renders_every_page(self):
+        export_site(self.source, self.output, workers=1)
+        with mock.patch.object(site_export, "DOCUMENT_TEMPLATE_VERSION", -1):
+            self.assertEqual(export_site(self.source, self.output, workers=1).rendered, 2)
+        with mock.patch.object(site_export.pygments, "__version__", "0.0"):
+            self.assertEqual(export_site(self.source, self.output, workers=1).rendered, 2)
+
+    def test_deleted_sources_are_removed(self):
+        export_site(self.source, self.output, workers=1)
+        os.remove(os.path.join(self.source, "guide", "intro.md"))
+        summary = export_site(self.source, self.output, workers=1)
+        self.assertEqual(summary.removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.output, "guide", "intro.html")))
+        with open(os.path.join(self.output, MANIFEST_NAME), encoding="utf-8") as f:
+            self.assertEqual(list(json.load(f)["pages"]), ["index.md"])
+
+    def test_process_pool_matches_inline_export(self):
+        inline = os.path.join(self.temp_dir, "inline")
+        export_site(self.source, inline, workers=1)
+        summary = export_site(self.source, self.output, workers=2)
+        self.assertEqual((summary.rendered, summary.failed), (2, []))
+        with open(os.path.join(inline, "index.html"), encoding="utf-8") as f:
+            self.assertEqual(self.read("index.html"), f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
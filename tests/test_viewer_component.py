@@ -0,0 +1,50 @@
+import os
+import re
+import unittest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "markdown_manager")
+VIEWER_DIR = os.path.join(SRC_DIR, "viewer")
+
+
+class TestViewerAssets(unittest.TestCase):
+
+    def read(self, name):
+        with open(os.path.join(VIEWER_DIR, name), encoding="utf-8") as f:
+            return f.read()
+
+    def test_page_references_its_assets(self):
+        """index.html loads the stylesheet and script shipped next to it."""
+        page = self.read("index.html")
+        local = [asset for asset in re.findall(r'(?:href|src)="([^"]+)"', page) if "://" not in asset]
+        self.assertEqual(sorted(local), ["viewer.css", "viewer.js"])
+        for asset in local:
+            self.assertTrue(os.path.isfile(os.path.join(VIEWER_DIR, asset)), asset)
+
+    def test_stylesheet_is_plain_css(self):
+        """No f-string brace escaping survived the move out of app.py."""
+        css = self.read("viewer.css")
+        self.assertNotIn("{{", css)
+        self.assertEqual(css.count("{"), css.count("}"))
+        self.assertIn(".highlight .k ", css)
+
+    def test_script_speaks_the_component_protocol(self):
+        """The page announces itself and renders the HTML sent on each rerun."""
+        script = self.read("viewer.js")
+        for message in ("streamlit:componentReady", "streamlit:render", "streamlit:setFrameHeight",
+                        "streamlit:setComponentValue"):
+            self.assertIn(message, script)
+
+    def test_mermaid_is_loaded_locally_first(self):
+        """The viewer tries the vendored bundle before the CDN, pinned to the same version."""
+        with open(os.path.join(SRC_DIR, "html_document.py"), encoding="utf-8") as f:
+            version = re.search(r'MERMAID_VERSION = "([^"]+)"', f.read()).group(1)
+        script = self.read("viewer.js")
+        sources = re.search(r"MERMAID_SOURCES = \[(.*?)\]", script, re.S).group(1)
+        urls = re.findall(r'"([^"]+)"', sources)
+        self.assertEqual(urls[0], f"vendor/mermaid.min.js?v={version}")
+        self.assertIn(f"mermaid@{version}/", urls[1])
+        self.assertNotIn("cdn.jsdelivr.net", self.read("index.html"))
+
+
+if __name__ == '__main__':
+    unittest.main()
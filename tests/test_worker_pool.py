@@ -0,0 +1,48 @@
+import os
+import threading
+import time
+import unittest
+
+from render_engine import get_render_engine
+from worker_pool import JobTimeout, WorkerPool, WorkerPoolBusy, render_html
+
+
+class TestWorkerPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = WorkerPool(workers=1, queue_limit=1, timeout=30, inline_max_bytes=100)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_runs_jobs_in_worker_process(self):
+        self.assertNotEqual(self.pool.run(os.getpid), os.getpid())
+
+    def test_small_jobs_run_inline(self):
+        self.assertEqual(self.pool.run(os.getpid, size=10), os.getpid())
+        inline = WorkerPool(workers=0)
+        self.assertEqual(inline.run(os.getpid), os.getpid())
+
+    def test_full_queue_refuses_jobs(self):
+        self.pool.run(os.getpid)  # start the worker
+        worker = threading.Thread(target=self.pool.run, args=(time.sleep, 1))
+        worker.start()
+        time.sleep(0.2)
+        with self.assertRaises(WorkerPoolBusy):
+            self.pool.run(os.getpid)
+        worker.join()
+        self.assertIsInstance(self.pool.run(os.getpid), int)
+
+    def test_timeout_restarts_pool(self):
+        first_pid = self.pool.run(os.getpid)
+        with self.assertRaises(JobTimeout):
+            self.pool.run(time.sleep, 30, timeout=0.5)
+        self.assertNotEqual(self.pool.run(os.getpid), first_pid)
+
+    def test_render_html_matches_inline_render(self):
+        text = "# Pooled\n\n" + "Some *text* and `code`.\n\n" * 20
+        self.assertEqual(render_html(text, pool=self.pool), get_render_engine().convert(text))
+
+
+if __name__ == "__main__":
+    unittest.main()